@@ -0,0 +1,159 @@
+"""``POST /api/batch/``: several API reads in one round trip.
+
+The body is ``{"requests": [{"method": "GET", "url": "/api/...", "headers": {...}}, ...],
+"parallel": false}``. The batch request goes through middleware and authentication
+once. Each sub-request is then resolved against the URL conf and dispatched straight
+to its view, with the already-authenticated user forced onto it. The response is
+``{"responses": [{"status", "headers", "body"}, ...]}`` in request order. Only safe
+methods are allowed. With ``"parallel": true`` the sub-requests run on a thread pool.
+"""
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection
+from django.urls import Resolver404, resolve
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD')
+# Outer headers that describe the batch request itself rather than the caller.
+SKIPPED_HEADERS = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_RANGE')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=SAFE_METHODS, default='GET')
+    url = serializers.CharField(max_length=2000)
+    headers = serializers.DictField(child=serializers.CharField(), required=False, default=dict)
+
+    def validate_url(self, value):
+        parts = urlsplit(value)
+        if parts.scheme or parts.netloc or not parts.path.startswith('/api/') or parts.path.startswith('/api/batch/'):
+            raise serializers.ValidationError('Must be an /api/ path other than /api/batch/')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(f'At most {settings.BATCH_MAX_REQUESTS} requests per batch')
+        return value
+
+
+def _build_request(outer, spec):
+    parts = urlsplit(spec['url'])
+    environ = {key: value for key, value in outer.META.items() if isinstance(value, str) and key not in SKIPPED_HEADERS}
+    for name, value in spec['headers'].items():
+        key = name.upper().replace('-', '_')
+        environ[key if key in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{key}'] = value
+    environ.update({
+        'REQUEST_METHOD': spec['method'],
+        'PATH_INFO': parts.path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': parts.query,
+        'wsgi.input': io.BytesIO(b''),
+        'wsgi.url_scheme': outer.scheme,
+    })
+    request = WSGIRequest(environ)
+    request.user = outer.user
+    if outer.user.is_authenticated:
+        # Picked up by rest_framework.request.Request: skips re-authenticating the sub-request.
+        request._force_auth_user = outer.user
+        request._force_auth_token = outer.auth
+    return request
+
+
+def _body(response):
+    if getattr(response, 'streaming', False):
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    content = response.content
+    if not content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(content)
+    return content.decode(response.charset or 'utf-8', errors='replace')
+
+
+def _release(response):
+    """Close what ``response`` holds open, such as the file of a streamed download.
+
+    Unlike ``response.close()`` this does not send ``request_finished``: its
+    ``close_old_connections`` receiver would drop the database connection after every
+    sub-request. The batch request itself finishes, and cleans up, once.
+    """
+    for closer in response._resource_closers:
+        try:
+            closer()
+        except Exception:
+            logger.exception('Could not close a batched response')
+    response._resource_closers.clear()
+    response.closed = True
+
+
+def dispatch(outer, spec):
+    """Run one sub-request in-process and return its ``{status, headers, body}``."""
+    request = _build_request(outer, spec)
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return {'status': status.HTTP_404_NOT_FOUND, 'headers': {}, 'body': {'error': 'Not found'}}
+    response = None
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+        body = _body(response)
+    except Exception:
+        logger.exception('Batched request to %s failed', spec['url'])
+        return {'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'headers': {}, 'body': {'error': 'Server error'}}
+    finally:
+        if response is not None:
+            _release(response)
+    headers = {name: value for name, value in response.items() if name not in ('Content-Length', 'Vary')}
+    return {'status': response.status_code, 'headers': headers, 'body': body}
+
+
+def _dispatch_in_thread(outer, spec):
+    try:
+        return dispatch(outer, spec)
+    finally:
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.BATCH_MAX_WORKERS, thread_name_prefix='batch')
+    return _executor
+
+
+class BatchView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        specs = serializer.validated_data['requests']
+        # Sub-requests see the authenticated user through the underlying HttpRequest.
+        outer = request._request
+        outer.user, outer.auth = request.user, request.auth
+        if serializer.validated_data['parallel'] and len(specs) > 1:
+            responses = list(_get_executor().map(lambda spec: _dispatch_in_thread(outer, spec), specs))
+        else:
+            responses = [dispatch(outer, spec) for spec in specs]
+        return Response({'responses': responses})
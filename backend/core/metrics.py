@@ -0,0 +1,143 @@
+"""In-process request metrics, exposed in the Prometheus text format at ``/metrics``.
+
+``core.middleware.PerformanceMiddleware`` observes one sample per request into the
+histograms below, labelled by the view that handled it: ``ResourceViewSet.list`` for
+a viewset action, ``TokenObtainPairView.post`` for a plain API view. Observing is a
+dict lookup, a bisect and a few additions under a lock.
+
+The histograms live in process memory. With several worker processes each one keeps
+its own, and a scrape sees the process that answered it. Scrape each worker
+directly, or add the samples up across scrapes.
+"""
+import bisect
+import hmac
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label, value):
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                # One slot per bucket and +Inf, then the sum.
+                series = self._series[label] = [0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        with self._lock:
+            snapshot = {label: list(series) for label, series in self._series.items()}
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label, series in sorted(snapshot.items()):
+            view = _escape(label)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{view}"}} {series[-1]:.6g}')
+            lines.append(f'{self.name}_count{{view="{view}"}} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        with self._lock:
+            snapshot = dict(self._values)
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for (view, status), value in sorted(snapshot.items()):
+            lines.append(f'{self.name}{{view="{_escape(view)}",status="{status}"}} {value}')
+        return lines
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = Histogram('http_request_duration_seconds', 'Time to produce the response.', DURATION_BUCKETS)
+DB_DURATION = Histogram('http_request_db_duration_seconds', 'Time spent in SQL per request.', DURATION_BUCKETS)
+DB_QUERIES = Histogram('http_request_db_queries', 'SQL statements per request.', QUERY_BUCKETS)
+SERIALIZER_DURATION = Histogram(
+    'http_request_serializer_duration_seconds', 'Time spent in serializer .data per request.', DURATION_BUCKETS
+)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Response body size.', SIZE_BUCKETS)
+RESPONSES = Counter('http_responses_total', 'Responses by view and status code.')
+REGISTRY = (REQUEST_DURATION, DB_DURATION, DB_QUERIES, SERIALIZER_DURATION, RESPONSE_SIZE, RESPONSES)
+
+
+def record(view, status, duration, db_duration, queries, serializer_duration, size):
+    REQUEST_DURATION.observe(view, duration)
+    DB_DURATION.observe(view, db_duration)
+    DB_QUERIES.observe(view, queries)
+    SERIALIZER_DURATION.observe(view, serializer_duration)
+    RESPONSE_SIZE.observe(view, size)
+    RESPONSES.inc((view, status))
+
+
+def render():
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+
+def clear():
+    for metric in REGISTRY:
+        metric.clear()
+
+
+def has_scrape_token(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+class CanScrapeMetrics(permissions.BasePermission):
+    """Staff users, or any caller presenting ``settings.METRICS_TOKEN`` as a bearer token."""
+
+    def has_permission(self, request, view):
+        return has_scrape_token(request) or bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    permission_classes = [CanScrapeMetrics]
+
+    def get_authenticators(self):
+        # The scrape token is not a JWT; leave it to the permission.
+        if has_scrape_token(self.request):
+            return []
+        return super().get_authenticators()
+
+    def get(self, request):
+        return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,148 @@
+"""Per-request performance instrumentation.
+
+``PerformanceMiddleware`` measures each request and:
+- SQL statements and their time, from a ``connection.execute_wrapper`` (no debug
+  cursor, so this also works with ``DEBUG = False``);
+- time spent building serializer ``.data``;
+- time spent rendering the response and the total time;
+- the response size, taken from ``Content-Length`` for streamed files.
+
+The numbers go into a ``Server-Timing`` header that browser dev tools show, and into
+the histograms of ``core.metrics``. Requests slower than
+``settings.SLOW_REQUEST_THRESHOLD_MS`` are logged with their slowest statements.
+Set ``PERFORMANCE_METRICS = False`` to take the middleware out of the stack.
+"""
+import contextvars
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework import serializers
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+SLOW_STATEMENTS = 5
+STATEMENT_PREVIEW = 300
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.render = 0.0
+        self.render_started = None
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db += elapsed
+            self.statements.append((elapsed, sql))
+
+
+def _timed_data(prop):
+    def data(self):
+        timings = _current.get()
+        if timings is None:
+            return prop.fget(self)
+        started = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            timings.serializer += time.perf_counter() - started
+    return property(data)
+
+
+def _instrument_serializers():
+    # ``.data`` is only read on the outermost serializer; nested ones go through
+    # ``to_representation``, so nothing is counted twice.
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(cls.data.fget, 'timed', False):
+            cls.data = _timed_data(cls.data)
+            cls.data.fget.timed = True
+
+
+def view_label(request):
+    """``ViewSet.action`` or ``View.method`` for the view that handled ``request``."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    cls = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if cls is None:
+        return match.view_name or f'{func.__module__}.{getattr(func, "__name__", "view")}'
+    method = request.method.lower()
+    action = (getattr(func, 'actions', None) or {}).get(method, method)
+    return f'{cls.__name__}.{action}'
+
+
+def response_size(response):
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _instrument_serializers()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+        label = view_label(request)
+        size = response_size(response)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+            f'serializer;dur={timings.serializer * 1000:.1f}',
+            f'render;dur={timings.render * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        metrics.record(label, response.status_code, total, timings.db, timings.queries, timings.serializer, size)
+        if total * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            self.log_slow(request, label, response, total, timings)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time the rendering.
+        timings = _current.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(self._rendered(timings))
+        return response
+
+    @staticmethod
+    def _rendered(timings):
+        def callback(response):
+            timings.render += time.perf_counter() - timings.render_started
+        return callback
+
+    def log_slow(self, request, label, response, total, timings):
+        slowest = sorted(timings.statements, key=lambda statement: statement[0], reverse=True)[:SLOW_STATEMENTS]
+        logger.warning(
+            'Slow request %s %s (%s) %s in %.0f ms: %d queries in %.0f ms, serializer %.0f ms\n%s',
+            request.method, request.get_full_path(), label, response.status_code, total * 1000, timings.queries,
+            timings.db * 1000, timings.serializer * 1000,
+            '\n'.join(f'  {elapsed * 1000:.1f} ms  {sql[:STATEMENT_PREVIEW]}' for elapsed, sql in slowest),
+        )
@@ -0,0 +1,101 @@
+"""Bulk moderation: one action applied to many rows with set-based statements.
+
+A request names its rows either by ``ids`` or by a ``filter`` (field lookups that
+each view whitelists). The matching rows are locked and read in one SELECT. The
+change is then applied with one UPDATE or DELETE in the same transaction. Every
+id gets an outcome: ``updated``, ``unchanged`` (already in the target state),
+``deleted`` or ``not_found``. A filter touches at most
+``settings.BULK_MODERATION_MAX`` rows per call. When more rows match, the response
+has ``"more": true`` and the caller repeats the request.
+"""
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+DELETED = 'deleted'
+NOT_FOUND = 'not_found'
+
+
+class BulkActionSerializer(serializers.Serializer):
+    """Subclasses declare ``action`` (a ChoiceField) and ``filter`` (a serializer of lookups)."""
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, required=False)
+
+    def validate_ids(self, value):
+        if len(value) > settings.BULK_MODERATION_MAX:
+            raise serializers.ValidationError(f'At most {settings.BULK_MODERATION_MAX} ids per request')
+        return list(dict.fromkeys(value))
+
+    def validate_filter(self, value):
+        if not value:
+            raise serializers.ValidationError('Filter must have at least one condition')
+        return value
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Pass either ids or filter')
+        return attrs
+
+
+def _target_rows(queryset, data, fields):
+    if 'ids' in data:
+        queryset = queryset.filter(pk__in=data['ids'])
+    else:
+        queryset = queryset.filter(**data['filter'])
+    limit = settings.BULK_MODERATION_MAX
+    rows = list(queryset.select_for_update().order_by('pk').values_list('pk', *fields)[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _outcomes(data, found):
+    if 'ids' in data:
+        return {pk: found.get(pk, NOT_FOUND) for pk in data['ids']}
+    return found
+
+
+def apply_update(queryset, data, values, extra=None):
+    """Set ``values`` (plus ``extra``, such as timestamps) on the targeted rows.
+
+    Returns ``(outcomes, more)``: an ``{id: outcome}`` dict in request order and
+    whether a filter matched more rows than were processed. Rows that already hold
+    ``values`` are reported ``unchanged`` and left alone.
+    """
+    fields = list(values)
+    target = [values[field] for field in fields]
+    with transaction.atomic():
+        rows, more = _target_rows(queryset, data, fields)
+        found = {pk: UNCHANGED if list(current) == target else UPDATED for pk, *current in rows}
+        changed = [pk for pk, outcome in found.items() if outcome == UPDATED]
+        if changed:
+            queryset.model._default_manager.filter(pk__in=changed).update(**values, **(extra or {}))
+    return _outcomes(data, found), more
+
+
+def apply_delete(queryset, data, fields=(), delete=None):
+    """Delete the targeted rows; returns ``(outcomes, more)`` like ``apply_update``.
+
+    ``delete(rows)`` receives the locked ``(pk, *fields)`` tuples and performs the
+    deletion; by default it is a plain queryset delete.
+    """
+    with transaction.atomic():
+        rows, more = _target_rows(queryset, data, fields)
+        if rows:
+            if delete is None:
+                queryset.model._default_manager.filter(pk__in=[row[0] for row in rows]).delete()
+            else:
+                delete(rows)
+    return _outcomes(data, {row[0]: DELETED for row in rows}), more
+
+
+def changed_ids(outcomes):
+    return [pk for pk, outcome in outcomes.items() if outcome in (UPDATED, DELETED)]
+
+
+def response_data(action, outcomes, more):
+    return {
+        'action': action,
+        'results': [{'id': pk, 'outcome': outcome} for pk, outcome in outcomes.items()],
+        'more': more,
+    }
@@ -0,0 +1,146 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _cursor_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on the queryset's ordering plus ``id`` as a tie-breaker.
+
+    The cursor holds the ordering values of the last row, so each page is a single
+    indexed range scan no matter how deep the client pages. Staff can add
+    ``?count=exact`` or ``?count=approx`` (planner estimate on PostgreSQL) to get a total.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = '-id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = self.get_ordering(queryset)
+        queryset = queryset.order_by(*[('-' if desc else '') + field for field, desc in self.fields])
+        self.count = self.get_count(queryset, request)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.seek(position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = [self.value_of(rows[-1], field) for field, _ in self.fields] if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            response['count'] = self.count
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['next', 'results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Return ``[(field, descending), ...]`` ending with ``id`` in the leading direction."""
+        ordering = [term for term in queryset.query.order_by if isinstance(term, str)] or [self.ordering]
+        fields = [(term.lstrip('-'), term.startswith('-')) for term in ordering]
+        fields = [(field, desc) for field, desc in fields if field not in ('pk', 'id')]
+        leading_desc = fields[0][1] if fields else self.ordering.startswith('-')
+        return fields + [('id', leading_desc)]
+
+    def value_of(self, instance, field):
+        value = instance
+        for part in field.split('__'):
+            value = getattr(value, part)
+        return value
+
+    def seek(self, position):
+        """Build ``(f1, f2, ...) > (v1, v2, ...)`` honoring each field's direction."""
+        if len(position) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        condition = None
+        for (field, desc), value in reversed(list(zip(self.fields, position))):
+            after = Q(**{f'{field}__{"lt" if desc else "gt"}': value})
+            condition = after if condition is None else after | (Q(**{field: value}) & condition)
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        # Full isoformat: DjangoJSONEncoder drops microseconds, which would break ties.
+        payload = json.dumps(position, default=_cursor_value)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode not in ('exact', 'approx') or not request.user.is_staff:
+            return None
+        if mode == 'approx':
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                return estimate
+        return queryset.order_by().count()
+
+
+def estimate_count(queryset):
+    """Row estimate from the PostgreSQL planner, or None on other databases."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,213 @@
+"""On-demand profiling of single requests by staff.
+
+A staff user adds ``X-Profile: 1`` (or ``?_profile=1``) to a request. That request
+then runs under ``cProfile`` and with a SQL trace (statement, parameters, duration).
+The result is stored in ``settings.PROFILE_ROOT`` as ``<id>.prof`` and ``<id>.json``:
+- ``.prof`` is a pstats file for snakeviz or ``python -m pstats``;
+- ``.json`` holds the request, the SQL trace and the top functions as text.
+
+The response carries the id in ``X-Profile-Id``. Profiles older than
+``settings.PROFILE_RETENTION_DAYS``, or beyond the newest ``settings.PROFILE_MAX_COUNT``,
+are deleted whenever a new one is stored. Staff list, read and download them under
+``/api/profiles/``.
+
+Requests without the trigger cost one header lookup and one substring check. The
+user is only resolved, from the session or the JWT, when the trigger is present.
+Only one request per process is profiled at a time. A request that triggers while
+another one is profiled runs normally, with ``X-Profile-Id: busy``.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection
+from django.http import FileResponse, Http404
+from rest_framework import permissions, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from users.authentication import CachedJWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_PARAMETER = '_profile=1'
+PROFILE_ID = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}$')
+TOP_FUNCTIONS = 40
+PARAMS_PREVIEW = 200
+
+_lock = threading.Lock()
+
+
+def is_requested(request):
+    if request.META.get(HEADER) == '1':
+        return True
+    # The substring test keeps the query string unparsed on ordinary requests.
+    return QUERY_PARAMETER in request.META.get('QUERY_STRING', '') and request.GET.get('_profile') == '1'
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except (APIException, InvalidToken, TokenError):
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+class SQLTrace:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append({
+                'sql': sql,
+                'params': repr(params)[:PARAMS_PREVIEW],
+                'many': many,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+def _path(profile_id, extension):
+    return os.path.join(settings.PROFILE_ROOT, f'{profile_id}.{extension}')
+
+
+def stored_ids():
+    """Ids of the stored profiles, newest first."""
+    try:
+        names = os.listdir(settings.PROFILE_ROOT)
+    except FileNotFoundError:
+        return []
+    return sorted((name[:-5] for name in names if name.endswith('.json') and PROFILE_ID.match(name[:-5])),
+                  reverse=True)
+
+
+def prune():
+    """Delete profiles beyond the retention limits. Returns how many were deleted."""
+    cutoff = time.strftime('%Y%m%dT%H%M%S', time.gmtime(time.time() - settings.PROFILE_RETENTION_DAYS * 86400))
+    expired = [
+        profile_id for position, profile_id in enumerate(stored_ids())
+        if position >= settings.PROFILE_MAX_COUNT or profile_id < cutoff
+    ]
+    for profile_id in expired:
+        for extension in ('json', 'prof'):
+            try:
+                os.remove(_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+    return len(expired)
+
+
+def load(profile_id):
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(_path(profile_id, 'json')) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def _store(request, response, profiler, trace, elapsed):
+    profile_id = f'{time.strftime("%Y%m%dT%H%M%S", time.gmtime())}-{uuid.uuid4().hex[:8]}'
+    os.makedirs(settings.PROFILE_ROOT, exist_ok=True)
+    profiler.dump_stats(_path(profile_id, 'prof'))
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    document = {
+        'id': profile_id,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user': request.user.pk if getattr(request, 'user', None) and request.user.is_authenticated else None,
+        'status': response.status_code,
+        'duration_ms': round(elapsed * 1000, 3),
+        'queries': len(trace.statements),
+        'sql_ms': round(sum(statement['ms'] for statement in trace.statements), 3),
+        'sql': trace.statements,
+        'functions': summary.getvalue(),
+    }
+    with open(_path(profile_id, 'json'), 'w') as handle:
+        json.dump(document, handle)
+    prune()
+    return profile_id
+
+
+def summarize(document):
+    return {key: document[key] for key in ('id', 'method', 'path', 'user', 'status', 'duration_ms', 'queries', 'sql_ms')}
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_requested(request) or not _is_staff(request):
+            return self.get_response(request)
+        if not _lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response['X-Profile-Id'] = 'busy'
+            return response
+        try:
+            profiler, trace = cProfile.Profile(), SQLTrace()
+            started = time.perf_counter()
+            with connection.execute_wrapper(trace):
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            elapsed = time.perf_counter() - started
+            try:
+                response['X-Profile-Id'] = _store(request, response, profiler, trace, elapsed)
+            except OSError:
+                logger.exception('Could not store the request profile')
+            return response
+        finally:
+            _lock.release()
+
+
+class ProfileListView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        documents = (load(profile_id) for profile_id in stored_ids())
+        return Response({'results': [summarize(document) for document in documents if document is not None]})
+
+
+class ProfileDetailView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, profile_id):
+        document = load(profile_id)
+        if document is None:
+            return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(document)
+
+
+class ProfileDownloadView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, profile_id):
+        if load(profile_id) is None:
+            raise Http404('Profile not found')
+        try:
+            handle = open(_path(profile_id, 'prof'), 'rb')
+        except FileNotFoundError:
+            raise Http404('Profile not found')
+        return FileResponse(handle, as_attachment=True, filename=f'{profile_id}.prof')
@@ -32,6 +32,12 @@ DEBUG = True
 
 ALLOWED_HOSTS = ['*']
 
+# The API runs behind a TLS-terminating proxy (Render) that sets X-Forwarded-Proto.
+# Without this, absolute URLs such as pagination `next` links come out as http://.
+# Set TRUST_X_FORWARDED_PROTO=False when no such proxy overwrites the header.
+if os.environ.get('TRUST_X_FORWARDED_PROTO', 'True') == 'True':
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
 
 # Application definition
 
@@ -48,10 +54,12 @@ INSTALLED_APPS = [
 
     'users',
     'library',
+    'tasks',
     'corsheaders',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -60,6 +68,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -100,6 +109,29 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Version stamps, the counter buffer, stats snapshots and cached users only work across
+# processes (web workers and `run_worker`) when this cache is shared. Set REDIS_URL to
+# share it; without it each process keeps its own local-memory cache.
+
+redis_url = os.environ.get('REDIS_URL')
+if redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': redis_url,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+SHARED_CACHE = bool(redis_url)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -144,7 +176,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
 }
 
@@ -184,3 +216,93 @@ CORS_ALLOW_HEADERS = [
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Write-behind view/download counters (see library/counters.py).
+# COUNTER_BUFFER is 'local' (per process) or 'cache' (shared via CACHES[COUNTER_CACHE_ALIAS]),
+# by default 'cache' when that cache is shared.
+# COUNTER_FLUSH_INTERVAL is in seconds; 0 writes through, empty leaves flushing to flush_counters.
+COUNTER_BUFFER = os.environ.get('COUNTER_BUFFER', 'cache' if SHARED_CACHE else 'local')
+COUNTER_CACHE_ALIAS = 'default'
+_counter_flush_interval = os.environ.get('COUNTER_FLUSH_INTERVAL', '5')
+COUNTER_FLUSH_INTERVAL = float(_counter_flush_interval) if _counter_flush_interval else None
+
+# Full-text search backend for resources (see library/search.py). Leave unset to pick
+# PostgreSQL tsvector or SQLite FTS5 from the database engine.
+RESOURCE_SEARCH_BACKEND = os.environ.get('RESOURCE_SEARCH_BACKEND') or None
+
+# Admin statistics are served from a cached snapshot refreshed in the background once
+# it is older than this many seconds; ?fresh=1 forces a recomputation.
+STATS_SNAPSHOT_MAX_AGE = int(os.environ.get('STATS_SNAPSHOT_MAX_AGE', 60))
+
+# Cache holding ETag version stamps (see core/versions.py). Must be shared between
+# processes in production (see REDIS_URL), otherwise one may answer 304 for stale data.
+VERSION_STAMP_CACHE = 'default'
+
+# Hand resource download bodies to the front server: None, 'x-accel-redirect' (nginx,
+# internal location DOWNLOAD_ACCEL_PREFIX aliased to MEDIA_ROOT) or 'x-sendfile'.
+DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD') or None
+DOWNLOAD_ACCEL_PREFIX = os.environ.get('DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+
+# Chunked uploads (see library/uploads.py): largest accepted chunk in bytes and how long
+# an idle, unfinished session is kept before cleanup_uploads removes it (seconds).
+UPLOAD_CHUNK_MAX_SIZE = int(os.environ.get('UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024))
+UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 24 * 60 * 60))
+
+# Resource previews (see library/previews.py): longest side in pixels of the PNG
+# thumbnail and of the JPEG preview.
+PREVIEW_THUMBNAIL_SIZE = int(os.environ.get('PREVIEW_THUMBNAIL_SIZE', 256))
+PREVIEW_SIZE = int(os.environ.get('PREVIEW_SIZE', 1024))
+
+# Background tasks (see tasks/queue.py), run by `manage.py run_worker`. TASKS_EAGER runs
+# them in-process after commit instead. Lease, delays and poll interval are in seconds.
+TASKS_EAGER = os.environ.get('TASKS_EAGER', 'False') == 'True'
+TASK_LEASE_SECONDS = int(os.environ.get('TASK_LEASE_SECONDS', 300))
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_RETRY_MAX_DELAY = 60 * 60
+TASK_POLL_INTERVAL = float(os.environ.get('TASK_POLL_INTERVAL', 1))
+TASK_RETENTION_DAYS = 7
+
+# Periodic jobs queued by the worker's scheduler (cron syntax, TIME_ZONE).
+TASK_SCHEDULE = {
+    'cleanup-uploads': {'task': 'library.cleanup_uploads', 'cron': '15 * * * *'},
+    'compact-stats': {'task': 'library.compact_stats', 'cron': '30 3 * * *'},
+    'gc-blobs': {'task': 'library.gc_blobs', 'cron': '0 4 * * *'},
+    'purge-tasks': {'task': 'tasks.purge', 'cron': '45 4 * * *'},
+}
+# The worker can only drain the web processes' counters and refresh the snapshots they
+# read through a shared cache; with per-process caches these jobs would do nothing.
+if COUNTER_BUFFER == 'cache' and SHARED_CACHE:
+    TASK_SCHEDULE['flush-counters'] = {'task': 'library.flush_counters', 'cron': '* * * * *'}
+if SHARED_CACHE:
+    TASK_SCHEDULE['refresh-resource-stats'] = {'task': 'library.refresh_stats', 'cron': '* * * * *'}
+    TASK_SCHEDULE['refresh-user-stats'] = {'task': 'users.refresh_stats', 'cron': '* * * * *'}
+
+# POST /api/batch/ (see core/batch.py): most sub-requests per batch and threads used for
+# "parallel": true batches.
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+
+# Authenticated users are cached for this many seconds (see users/authentication.py).
+# Saving a user invalidates the entry at once through its version stamp, as long as
+# the default cache and VERSION_STAMP_CACHE are shared between web processes.
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+
+# Bulk moderation endpoints (see core/moderation.py): most ids per request, and most
+# rows a filter request changes before it answers "more": true.
+BULK_MODERATION_MAX = int(os.environ.get('BULK_MODERATION_MAX', 1000))
+
+# Request instrumentation (see core/middleware.py and core/metrics.py): Server-Timing
+# headers and per-view histograms served at /metrics. Requests slower than the
+# threshold (milliseconds) are logged with their slowest SQL. /metrics is open to
+# staff, and to scrapers sending "Authorization: Bearer <METRICS_TOKEN>" when set.
+PERFORMANCE_METRICS = os.environ.get('PERFORMANCE_METRICS', 'True') == 'True'
+SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 500))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# On-demand profiles of single staff requests (see core/profiling.py), stored outside
+# MEDIA_ROOT because the SQL trace holds query parameters. The newest PROFILE_MAX_COUNT
+# profiles younger than PROFILE_RETENTION_DAYS are kept.
+PROFILE_ROOT = os.environ.get('PROFILE_ROOT', os.path.join(BASE_DIR, 'profiles'))
+PROFILE_MAX_COUNT = int(os.environ.get('PROFILE_MAX_COUNT', 50))
+PROFILE_RETENTION_DAYS = int(os.environ.get('PROFILE_RETENTION_DAYS', 7))
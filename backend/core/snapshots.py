@@ -0,0 +1,58 @@
+"""Cached snapshots of expensive read-only computations (admin statistics).
+
+A snapshot is served from the cache while it is younger than ``max_age``. An older
+snapshot is still served, and a background thread recomputes it, so only the very
+first request (or an explicit ``fresh=True``) waits for the computation.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'snapshots'
+
+
+def _store(key, compute):
+    data = compute()
+    snapshot = {'generated_at': time.time(), 'data': data}
+    cache.set(f'{KEY_PREFIX}:{key}', snapshot, timeout=None)
+    return snapshot
+
+
+def _refresh_in_background(key, compute):
+    lock = f'{KEY_PREFIX}:{key}:refreshing'
+    if not cache.add(lock, 1, timeout=60):
+        return
+
+    def run():
+        try:
+            _store(key, compute)
+        except Exception:
+            logger.exception('Failed to refresh snapshot %s', key)
+        finally:
+            cache.delete(lock)
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_snapshot(key, compute, max_age=None, fresh=False):
+    """Return ``{'generated_at': epoch seconds, 'data': compute()}`` for ``key``."""
+    if max_age is None:
+        max_age = getattr(settings, 'STATS_SNAPSHOT_MAX_AGE', 60)
+    snapshot = None if fresh else cache.get(f'{KEY_PREFIX}:{key}')
+    if snapshot is None:
+        return _store(key, compute)
+    if time.time() - snapshot['generated_at'] > max_age:
+        _refresh_in_background(key, compute)
+    return snapshot
+
+
+def refresh_snapshot(key, compute):
+    """Recompute ``key`` now; used by periodic jobs that keep snapshots warm."""
+    return _store(key, compute)
@@ -0,0 +1,53 @@
+"""Sparse fieldsets for read endpoints: ``?fields=``, ``?omit=`` and ``?expand=``.
+
+``?fields=id,title`` keeps only the listed fields and ``?omit=description`` drops
+fields. ``?expand=tags`` chooses which of a serializer's ``expandable_fields`` are
+rendered as nested objects; without the parameter all of them are, and with an
+empty ``?expand=`` they are rendered as primary keys. ``SparseFieldsetMixin``
+prunes the serializer. Views pass ``requested_fields`` to their queryset builders,
+so joins, prefetches and subqueries for dropped fields are skipped as well. Write
+requests always get the full serializer.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+ALWAYS_INCLUDED = ('id',)
+
+
+def _param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+def requested_fields(request, field_names):
+    """Return the names in ``field_names`` selected by ``?fields=``/``?omit=``, or None for all."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields, omit = _param(request, 'fields'), _param(request, 'omit')
+    if fields is None and omit is None:
+        return None
+    selected = set(field_names) if fields is None else set(field_names) & fields
+    selected -= omit or set()
+    return selected | (set(ALWAYS_INCLUDED) & set(field_names))
+
+
+def requested_expansions(request, expandable):
+    if request is None or request.method not in SAFE_METHODS:
+        return set(expandable)
+    expand = _param(request, 'expand')
+    return set(expandable) if expand is None else expand & set(expandable)
+
+
+class SparseFieldsetMixin:
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        selected = requested_fields(request, self.fields.keys())
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+        self.expand = requested_expansions(request, self.expandable_fields)
@@ -20,6 +20,9 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from django.conf import settings
 from django.conf.urls.static import static
+from core.batch import BatchView
+from core.metrics import MetricsView
+from core.profiling import ProfileDetailView, ProfileDownloadView, ProfileListView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -45,8 +48,13 @@ urlpatterns = [
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path('api/users/', include('users.urls')),
     path('api/library/', include('library.urls')),
+    path('api/batch/', BatchView.as_view(), name='batch'),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
+    path('api/profiles/<str:profile_id>/download/', ProfileDownloadView.as_view(), name='profile-download'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,80 @@
+"""Time-series rollups of resource activity stored in ResourceStat.
+
+Writers call ``record``/``record_many`` with deltas for today's bucket; readers ask
+``series`` for a date range. ``compact`` folds old daily rows into weekly and then
+monthly buckets so the table stays small.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import ResourceStat
+
+METRICS = [metric for metric, _ in ResourceStat.METRIC_CHOICES]
+
+
+def _add(resource_id, metric, period, date, amount):
+    rows = ResourceStat.objects.filter(resource_id=resource_id, metric=metric, period=period, date=date)
+    if rows.update(value=F('value') + amount):
+        return
+    try:
+        with transaction.atomic():
+            ResourceStat.objects.create(
+                resource_id=resource_id, metric=metric, period=period, date=date, value=amount
+            )
+    except IntegrityError:
+        # Either another writer created the row first or the resource is gone.
+        rows.update(value=F('value') + amount)
+
+
+def record_many(deltas, date=None):
+    """Add ``{(resource_id, metric): amount}`` to the daily buckets for ``date`` (today by default)."""
+    date = date or timezone.localdate()
+    for (resource_id, metric), amount in deltas.items():
+        if amount:
+            _add(resource_id, metric, 'day', date, amount)
+
+
+def record(resource_id, metric, amount=1, date=None):
+    record_many({(resource_id, metric): amount}, date)
+
+
+def series(start, end, metrics=None, **filters):
+    """Return ``{metric: [{date, period, value}, ...]}`` for buckets starting in [start, end]."""
+    metrics = metrics or METRICS
+    rows = (
+        ResourceStat.objects.filter(date__gte=start, date__lte=end, metric__in=metrics, **filters)
+        .values('metric', 'period', 'date')
+        .annotate(total=Sum('value'))
+        .order_by('date', 'period')
+    )
+    result = {metric: [] for metric in metrics}
+    for row in rows:
+        result[row['metric']].append({'date': row['date'], 'period': row['period'], 'value': row['total']})
+    return result
+
+
+def _fold(source, target, trunc, before):
+    with transaction.atomic():
+        rows = ResourceStat.objects.filter(period=source, date__lt=before)
+        buckets = (
+            rows.annotate(bucket=trunc('date'))
+            .values('resource_id', 'metric', 'bucket')
+            .annotate(total=Sum('value'))
+            .order_by()
+        )
+        for bucket in buckets:
+            _add(bucket['resource_id'], bucket['metric'], target, bucket['bucket'], bucket['total'])
+        folded, _ = rows.delete()
+    return folded
+
+
+def compact(keep_days=90, keep_weeks=52):
+    """Fold daily rows older than ``keep_days`` into weeks and weekly rows older than ``keep_weeks`` into months."""
+    today = timezone.localdate()
+    days = _fold('day', 'week', TruncWeek, today - timedelta(days=keep_days))
+    weeks = _fold('week', 'month', TruncMonth, today - timedelta(weeks=keep_weeks))
+    return days, weeks
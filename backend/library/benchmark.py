@@ -0,0 +1,161 @@
+"""In-process API benchmarks (``manage.py benchmark_api``).
+
+For each scale the benchmark seeds a synthetic dataset (see ``library.synthetic``)
+into an empty database. It then drives the hot endpoints through Django's test
+client, so routing, middleware, authentication, serialization and every query are
+measured without a network or a server. Each scenario repeats one request and
+records the p50 and p95 latency in milliseconds, the number of queries and the
+response size in bytes.
+
+Results are plain dicts, ``{scale: {scenario: {metric: value}}}``, so they can be
+saved as a baseline JSON and later compared with ``compare``.
+"""
+import math
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import counters
+from .models import Resource, Tag
+from .search import get_search_backend
+from .synthetic import PRESETS, DatasetGenerator
+
+SCALES = {
+    'tiny': {'users': 200, 'tags': 20, 'resources': 1_000, 'ratings': 5_000, 'comments': 2_000, 'saves': 2_000},
+    **PRESETS,
+}
+PASSWORD = 'benchmark'
+SEARCH_TERM = 'algebra'
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Scenario:
+    def __init__(self, name, method, path, data=None, user=None, content_type=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.user = user
+        self.content_type = content_type
+
+
+class Benchmark:
+    def __init__(self, iterations=20, warmup=2, log=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.log = log or (lambda message: None)
+
+    def seed(self, scale, seed=0):
+        """Replace the database contents with the synthetic dataset of ``scale``."""
+        call_command('flush', interactive=False, verbosity=0)
+        get_search_backend().clear()
+        cache.clear()
+        DatasetGenerator(seed=seed, prefix='bench', password=PASSWORD, log=self.log).generate(**SCALES[scale])
+
+    def scenarios(self):
+        User = get_user_model()
+        admin = User.objects.create_user(
+            email='bench-admin@example.test', username='bench-admin', password=PASSWORD, is_staff=True,
+        )
+        reader = User.objects.filter(email__startswith='bench-', is_staff=False).order_by('pk').first()
+        visible = Resource.objects.filter(status='approved', is_hidden=False)
+        hot = visible.order_by('-views_count').values_list('pk', flat=True).first()
+        tag = Tag.objects.annotate(uses=Count('resources')).order_by('-uses').values_list('name', flat=True).first()
+        base = '/api/library/resources/'
+        return [
+            Scenario('list', 'get', base),
+            Scenario('list_search', 'get', base, {'search': SEARCH_TERM}),
+            Scenario('list_ordering', 'get', base, {'ordering': '-rating_avg'}),
+            Scenario('list_tag', 'get', base, {'tags__name': tag}),
+            Scenario('list_authenticated', 'get', base, user=reader),
+            Scenario('detail', 'get', f'{base}{hot}/'),
+            Scenario('comments', 'get', f'{base}{hot}/comments/'),
+            Scenario('ratings', 'get', f'{base}{hot}/ratings/'),
+            Scenario('save_toggle', 'post', f'{base}{hot}/save/', user=reader),
+            Scenario('download', 'get', f'{base}{hot}/download/'),
+            Scenario('stats', 'get', f'{base}stats/', user=admin),
+            Scenario(
+                'token_obtain', 'post', '/api/token/', {'email': admin.email, 'password': PASSWORD},
+                content_type='application/json',
+            ),
+        ]
+
+    def measure(self, scenario):
+        client = Client()
+        headers = {}
+        if scenario.user is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(scenario.user).access_token}'
+        kwargs = {'content_type': scenario.content_type} if scenario.content_type else {}
+        timings, queries, size, status = [], 0, 0, None
+        for n in range(self.warmup + self.iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, scenario.method)(scenario.path, scenario.data, **kwargs, **headers)
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                elapsed = time.perf_counter() - started
+            response.close()
+            if n >= self.warmup:
+                timings.append(elapsed * 1000)
+                queries, size, status = len(captured), len(body), response.status_code
+        return {
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'queries': queries,
+            'bytes': size,
+            'status': status,
+        }
+
+    def run(self, scales, only=None, seed=0):
+        results = {}
+        for scale in scales:
+            self.log(f'Seeding {scale}')
+            self.seed(scale, seed=seed)
+            results[scale] = {}
+            for scenario in self.scenarios():
+                if only and scenario.name not in only:
+                    continue
+                results[scale][scenario.name] = self.measure(scenario)
+                self.log(f'{scale} {scenario.name}: ' + ', '.join(
+                    f'{key} {value}' for key, value in results[scale][scenario.name].items()
+                ))
+            counters.flush()
+        return results
+
+
+def compare(results, baseline, latency=0.25, queries=0, size=0.10, min_latency_ms=1.0):
+    """List regressions of ``results`` against ``baseline``.
+
+    Latency may grow by the ``latency`` fraction (and always by ``min_latency_ms``, so
+    sub-millisecond noise never fails a run), queries by ``queries`` statements and
+    response size by the ``size`` fraction. Scenarios missing from either side are
+    skipped. Returns ``(scale, scenario, metric, baseline, current)`` tuples.
+    """
+    regressions = []
+    for scale, scenarios in results.items():
+        for name, current in scenarios.items():
+            before = baseline.get(scale, {}).get(name)
+            if before is None:
+                continue
+            limits = {
+                'p50_ms': max(before['p50_ms'] * (1 + latency), before['p50_ms'] + min_latency_ms),
+                'p95_ms': max(before['p95_ms'] * (1 + latency), before['p95_ms'] + min_latency_ms),
+                'queries': before['queries'] + queries,
+                'bytes': before['bytes'] * (1 + size),
+            }
+            regressions.extend(
+                (scale, name, metric, before[metric], current[metric])
+                for metric, limit in limits.items() if current[metric] > limit
+            )
+    return regressions
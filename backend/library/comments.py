@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Resource
+
+
+def apply_comment_change(resource_id, delta):
+    """Move a resource's stored ``comment_count`` by ``delta``."""
+    Resource.objects.filter(pk=resource_id).update(comment_count=F('comment_count') + delta)
+
+
+def add_comment(resource, user, text):
+    with transaction.atomic():
+        comment = Comment.objects.create(resource=resource, user=user, text=text)
+        apply_comment_change(resource.pk, 1)
+    return comment
+
+
+def rebuild_comment_counts(resource_ids=None):
+    """Recompute ``comment_count`` from the Comment table, for every resource or only ``resource_ids``.
+
+    Returns rows fixed.
+    """
+    counted = Coalesce(
+        Subquery(
+            Comment.objects.filter(resource=OuterRef('pk')).order_by().values('resource')
+            .annotate(total=Count('id')).values('total')
+        ),
+        Value(0),
+    )
+    stale = Resource.objects.annotate(expected=counted).exclude(comment_count=F('expected'))
+    if resource_ids is not None:
+        stale = stale.filter(pk__in=resource_ids)
+    with transaction.atomic():
+        return Resource.objects.filter(pk__in=list(stale.values_list('pk', flat=True))).update(comment_count=counted)
@@ -0,0 +1,233 @@
+"""Write-behind counters for ``Resource.views_count`` and ``downloads_count``.
+
+Increments are accumulated in a buffer and written as batched ``F()`` updates, so the
+read path never takes a row lock. ``settings.COUNTER_FLUSH_INTERVAL`` controls when:
+
+* ``0`` writes through immediately (one UPDATE per increment),
+* a positive number of seconds flushes from a background thread,
+* ``None`` only flushes on ``flush()``, the ``flush_counters`` command or shutdown.
+
+``settings.COUNTER_BUFFER`` selects the buffer: ``'local'`` keeps deltas in process
+memory, ``'cache'`` keeps them in a Django cache shared by all workers so that any
+process (including ``manage.py flush_counters``) can drain them.
+
+Flushes do not bump the ``resources`` or ``resource:<pk>`` version stamps: the counts
+are not part of the ETags, or every flush would invalidate every list and detail
+page. A client revalidating with ``If-None-Match`` keeps the counts it was served
+until the resource itself changes.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from . import analytics
+from .models import Resource
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('views_count', 'downloads_count')
+COUNTER_METRICS = {'views_count': 'views', 'downloads_count': 'downloads'}
+
+
+class LocalBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+
+    def add(self, field, pk, amount):
+        with self._lock:
+            self._pending[(field, pk)] += amount
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        return pending
+
+
+class CacheBuffer:
+    """Deltas live in cache keys; a journal of dirty keys lets any process find them.
+
+    A key is journaled when its dirty marker is (re)created, and the drainer deletes the
+    marker before reading the value, so increments racing with a drain are re-journaled
+    rather than lost. Values are taken with a relative ``decr`` for the same reason.
+    ``add`` takes a journal position before it writes the entry, so a drain stops at the
+    first position that is still empty and leaves it for the next drain.
+
+    Only one drainer runs at a time. ``drain`` holds a lock key, created with ``add``, for
+    the whole journal walk; a process that finds it held drains nothing this round, and
+    the lock expires after ``lock_timeout`` seconds if its holder died mid-drain.
+    """
+
+    prefix = 'library:counters'
+    lock_timeout = 60
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def _value_key(self, field, pk):
+        return f'{self.prefix}:{field}:{pk}'
+
+    def add(self, field, pk, amount):
+        key = self._value_key(field, pk)
+        self.cache.add(key, 0, timeout=None)
+        self.cache.incr(key, amount)
+        if self.cache.add(f'{key}:dirty', 1, timeout=None):
+            self.cache.add(f'{self.prefix}:journal', 0, timeout=None)
+            position = self.cache.incr(f'{self.prefix}:journal')
+            self.cache.set(f'{self.prefix}:journal:{position}', (field, pk), timeout=None)
+
+    def _gap_expired(self, position):
+        """Whether journal ``position`` has been missing for ``lock_timeout`` seconds.
+
+        Only a writer that died between taking and writing a position leaves such a gap;
+        skipping it then keeps the journal moving.
+        """
+        gap = f'{self.prefix}:gap:{position}'
+        now = time.time()
+        if self.cache.add(gap, now, timeout=self.lock_timeout * 10):
+            return False
+        return now - self.cache.get(gap, now) >= self.lock_timeout
+
+    def drain(self):
+        lock, token = f'{self.prefix}:lock', uuid.uuid4().hex
+        if not self.cache.add(lock, token, timeout=self.lock_timeout):
+            return Counter()
+        try:
+            return self._drain()
+        finally:
+            if self.cache.get(lock) == token:
+                self.cache.delete(lock)
+
+    def _drain(self):
+        pending = Counter()
+        head = self.cache.get(f'{self.prefix}:journal', 0)
+        tail = self.cache.get(f'{self.prefix}:drained', 0)
+        keys = {position: f'{self.prefix}:journal:{position}' for position in range(tail + 1, head + 1)}
+        found = self.cache.get_many(list(keys.values()))
+        drained = tail
+        for position, entry in keys.items():
+            if entry not in found and not self._gap_expired(position):
+                # add() has taken this position but not written it yet. Stop so that the
+                # next drain reads it; its key stays dirty and is never journaled again.
+                break
+            drained = position
+            if entry not in found:
+                continue
+            field, pk = found[entry]
+            key = self._value_key(field, pk)
+            self.cache.delete(f'{key}:dirty')
+            amount = self.cache.get(key, 0)
+            if amount:
+                self.cache.decr(key, amount)
+                pending[(field, pk)] += amount
+        self.cache.delete_many([keys[position] for position in range(tail + 1, drained + 1)])
+        self.cache.set(f'{self.prefix}:drained', drained, timeout=None)
+        return pending
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_flusher = None
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                if getattr(settings, 'COUNTER_BUFFER', 'local') == 'cache':
+                    _buffer = CacheBuffer(getattr(settings, 'COUNTER_CACHE_ALIAS', 'default'))
+                else:
+                    _buffer = LocalBuffer()
+    return _buffer
+
+
+def write_deltas(deltas):
+    """Apply ``{(field, pk): amount}`` with one UPDATE per (field, amount) group and roll them up."""
+    with transaction.atomic():
+        # Deltas of resources deleted since they were buffered are dropped. Their stats
+        # rows would fail the foreign key check at COMMIT, too late to catch per row,
+        # and the whole flush would be retried forever. The lock keeps the remaining
+        # resources from being deleted before the commit.
+        requested = {pk for _, pk in deltas}
+        existing = set(Resource.objects.select_for_update().filter(pk__in=requested).values_list('pk', flat=True))
+        deltas = {(field, pk): amount for (field, pk), amount in deltas.items() if pk in existing}
+        groups = defaultdict(list)
+        for (field, pk), amount in deltas.items():
+            if amount:
+                groups[(field, amount)].append(pk)
+        for (field, amount), pks in groups.items():
+            Resource.objects.filter(pk__in=pks).update(**{field: F(field) + amount})
+        analytics.record_many({(pk, COUNTER_METRICS[field]): amount for (field, pk), amount in deltas.items()})
+    return len(deltas)
+
+
+def flush():
+    """Write every buffered delta to the database. Returns the number of counters touched."""
+    deltas = get_buffer().drain()
+    if not deltas:
+        return 0
+    try:
+        return write_deltas(deltas)
+    except Exception:
+        # Put the deltas back so the next flush retries them.
+        buffer = get_buffer()
+        for (field, pk), amount in deltas.items():
+            buffer.add(field, pk, amount)
+        raise
+
+
+def increment(pk, field, amount=1):
+    if field not in COUNTER_FIELDS:
+        raise ValueError(f'{field} is not a buffered counter')
+    interval = getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5)
+    if interval == 0:
+        # Write-through runs on the read path: a plain F() update, no row lock.
+        with transaction.atomic():
+            if Resource.objects.filter(pk=pk).update(**{field: F(field) + amount}):
+                analytics.record(pk, COUNTER_METRICS[field], amount)
+        return
+    get_buffer().add(field, pk, amount)
+    if interval is not None:
+        _ensure_flusher(interval)
+
+
+def _ensure_flusher(interval):
+    global _flusher
+    if _flusher is not None:
+        return
+    with _buffer_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_forever, args=(interval,), daemon=True)
+            _flusher.start()
+
+
+def _flush_forever(interval):
+    from django.db import connection
+
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Failed to flush resource counters')
+        finally:
+            connection.close()
+
+
+@atexit.register
+def _flush_on_shutdown():
+    if _buffer is None:
+        return
+    try:
+        flush()
+    except Exception:
+        logger.exception('Failed to flush resource counters on shutdown')
@@ -0,0 +1,156 @@
+"""File responses with validators, byte ranges and optional front-server offload.
+
+``serve_file`` answers conditional requests (If-None-Match, If-Modified-Since,
+If-Range) from a single ``stat`` call, serves single and multiple byte ranges
+(``206``/``multipart/byteranges``) and, when ``settings.DOWNLOAD_OFFLOAD`` is set, hands
+the body to the front server with ``X-Accel-Redirect`` (nginx) or ``X-Sendfile``
+(Apache/lighttpd) so no Python worker is tied up for the transfer.
+"""
+import mimetypes
+import os
+import uuid
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_etags, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+MAX_RANGES = 16
+
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_ranges(header, size):
+    """Parse a ``Range`` header into sorted, merged ``[(start, end_inclusive), ...]``.
+
+    Returns None when the header should be ignored (absent, malformed or abusive) and
+    an empty list when it is well-formed but nothing is satisfiable.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    ranges = []
+    specs = header[len('bytes='):].split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+    for spec in specs:
+        start, sep, end = spec.strip().partition('-')
+        if not sep:
+            return None
+        try:
+            if start:
+                first, last = int(start), int(end) if end else size - 1
+            else:
+                suffix = int(end)
+                first, last = max(size - suffix, 0), size - 1
+        except ValueError:
+            return None
+        if first > last and start and end:
+            return None
+        if first < size and (start or int(end) > 0):
+            ranges.append((first, min(last, size - 1)))
+
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def _read(path, first, last):
+    with open(path, 'rb') as handle:
+        handle.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _multipart(path, ranges, size, content_type, boundary):
+    for first, last in ranges:
+        yield (
+            f'\r\n--{boundary}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Range: bytes {first}-{last}/{size}\r\n\r\n'
+        ).encode()
+        yield from _read(path, first, last)
+    yield f'\r\n--{boundary}--\r\n'.encode()
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _range_allowed(request, etag, mtime):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def _offload(path, response):
+    mode = getattr(settings, 'DOWNLOAD_OFFLOAD', None)
+    if mode == 'x-accel-redirect':
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        response['X-Accel-Redirect'] = quote(settings.DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/' + relative)
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = path
+
+
+def serve_file(request, path, filename, stat=None):
+    """Return a response for ``path``; ``stat`` may be passed to skip a second ``os.stat``."""
+    stat = stat or os.stat(path)
+    size, mtime = stat.st_size, stat.st_mtime
+    etag = file_etag(stat)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    validators = {
+        'ETag': etag,
+        'Last-Modified': http_date(mtime),
+        'Accept-Ranges': 'bytes',
+    }
+
+    if _not_modified(request, etag, mtime):
+        response = HttpResponse(status=304)
+    elif getattr(settings, 'DOWNLOAD_OFFLOAD', None):
+        # The front server applies Range itself; only the headers come from here.
+        response = HttpResponse(content_type=content_type)
+        _offload(path, response)
+    else:
+        ranges = parse_ranges(request.headers.get('Range'), size) if _range_allowed(request, etag, mtime) else None
+        if ranges is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        elif not ranges:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif len(ranges) == 1:
+            first, last = ranges[0]
+            response = StreamingHttpResponse(_read(path, first, last), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {first}-{last}/{size}'
+            response['Content-Length'] = str(last - first + 1)
+        else:
+            boundary = uuid.uuid4().hex
+            response = StreamingHttpResponse(
+                _multipart(path, ranges, size, content_type, boundary),
+                status=206,
+                content_type=f'multipart/byteranges; boundary={boundary}',
+            )
+
+    for header, value in validators.items():
+        response[header] = value
+    if response.status_code != 304:
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
@@ -0,0 +1,34 @@
+from rest_framework import filters
+
+from .search import get_search_backend
+
+
+class ResourceSearchFilter(filters.SearchFilter):
+    """SearchFilter that delegates matching and ranking to the configured search backend."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_backend().search(queryset, ' '.join(terms))
+
+
+class ResourceOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter that also accepts ``rating`` (best first) and ``-rating`` (worst first)."""
+
+    aliases = {
+        'rating': '-rating_avg',
+        '-rating': 'rating_avg',
+    }
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if params:
+            terms = [term.strip() for term in params.split(',')]
+            request_ordering = [self.aliases.get(term, term) for term in terms]
+            ordering = self.remove_invalid_fields(queryset, request_ordering, view, request)
+            if ordering:
+                return ordering
+        if 'search_rank' in queryset.query.annotations:
+            return ['-search_rank', *self.get_default_ordering(view)]
+        return self.get_default_ordering(view)
@@ -0,0 +1,218 @@
+"""Bulk catalog import from CSV or JSON Lines manifests (``manage.py import_resources``).
+
+A manifest record has ``id`` (a stable key, kept as ``Resource.external_id``),
+``title`` and ``file`` (a path relative to the files directory). It may also have
+``description``, ``tags`` (a list in JSONL, ``|``-separated in CSV), ``owner`` (an
+email) and ``status``. The manifest is read lazily and imported in batches. Each
+batch costs a fixed number of statements: records whose id is already imported are
+skipped, owners and tags are resolved with one query each, and the files are copied
+into the blob store on a thread pool. Then the resources, their tags and blob
+references are written with bulk statements in one transaction. Because imported ids
+are skipped, a run can be repeated or resumed from any batch boundary.
+"""
+import csv
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from core.versions import bump
+from . import tasks
+from .models import Blob, Resource, Tag
+from .search import get_search_backend
+from .storage import resource_storage
+
+TAG_SEPARATOR = '|'
+STATUSES = {value for value, _ in Resource.STATUS_CHOICES}
+
+
+def read_manifest(path, fmt=None):
+    """Yield the records of a CSV or JSONL manifest one at a time (None for unparsable lines)."""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            yield from csv.DictReader(handle)
+            return
+        for line in handle:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
+class Importer:
+    def __init__(self, files_dir, default_owner=None, default_status='approved', batch_size=500, workers=4,
+                 previews=True, on_error=None):
+        self.files_dir = os.path.realpath(files_dir)
+        self.default_owner = default_owner
+        self.default_status = default_status
+        self.batch_size = batch_size
+        self.workers = workers
+        self.previews = previews
+        self.on_error = on_error
+        self.stats = ImportStats()
+        self._tags = {}
+        self._owners = {}
+
+    def run(self, records, on_batch=None):
+        """Import ``records`` batch by batch; ``on_batch(stats)`` runs after each committed batch."""
+        records = iter(records)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='import') as executor:
+            self.executor = executor
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch)
+                if on_batch is not None:
+                    on_batch(self.stats)
+        return self.stats
+
+    def _fail(self, record, message):
+        self.stats.failed += 1
+        if self.on_error is not None:
+            key = record.get('id') if isinstance(record, dict) else None
+            self.on_error(key or f'record {self.stats.read}', message)
+
+    def _clean(self, record):
+        if not isinstance(record, dict):
+            raise ValueError('not a JSON object')
+        key, title, file = (str(record.get(name) or '').strip() for name in ('id', 'title', 'file'))
+        if not key or not title or not file:
+            raise ValueError('id, title and file are required')
+        if len(key) > 255 or len(title) > 200:
+            raise ValueError('id or title is too long')
+        tags = record.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(TAG_SEPARATOR)
+        tags = sorted({str(name).strip() for name in tags if str(name).strip()})
+        if any(len(name) > 50 for name in tags):
+            raise ValueError('tag names are limited to 50 characters')
+        status = str(record.get('status') or self.default_status).strip()
+        if status not in STATUSES:
+            raise ValueError(f'unknown status {status!r}')
+        path = os.path.realpath(os.path.join(self.files_dir, file))
+        if not path.startswith(self.files_dir + os.sep):
+            raise ValueError('file is outside the files directory')
+        owner = str(record.get('owner') or self.default_owner or '').strip()
+        if not owner:
+            raise ValueError('no owner and no default owner')
+        return {
+            'id': key, 'title': title, 'description': str(record.get('description') or ''), 'path': path,
+            'tags': tags, 'owner': owner, 'status': status,
+        }
+
+    def _resolve_owners(self, emails):
+        missing = set(emails) - set(self._owners)
+        if missing:
+            found = get_user_model().objects.filter(email__in=missing).values_list('email', 'pk')
+            self._owners.update(found)
+
+    def _resolve_tags(self, names):
+        missing = set(names) - set(self._tags)
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            self._tags.update(Tag.objects.filter(name__in=missing).values_list('name', 'pk'))
+
+    def _copy(self, row):
+        try:
+            return resource_storage.copy_in(row['path'])
+        except OSError as exc:
+            return exc
+
+    def import_batch(self, records):
+        self.stats.read += len(records)
+        rows = {}
+        for record in records:
+            try:
+                row = self._clean(record)
+            except ValueError as exc:
+                self._fail(record, str(exc))
+                continue
+            if row['id'] in rows:
+                self.stats.skipped += 1
+            else:
+                rows[row['id']] = row
+
+        existing = set(Resource.objects.filter(external_id__in=list(rows)).values_list('external_id', flat=True))
+        self.stats.skipped += len(existing)
+        self._resolve_owners({row['owner'] for row in rows.values()})
+        pending = []
+        for key, row in rows.items():
+            if key in existing:
+                continue
+            if row['owner'] not in self._owners:
+                self._fail(row, f'unknown owner {row["owner"]}')
+                continue
+            pending.append(row)
+
+        stored = []
+        for row, copied in zip(pending, self.executor.map(self._copy, pending)):
+            if isinstance(copied, Exception):
+                self._fail(row, f'cannot read file: {copied}')
+            else:
+                stored.append((row, copied))
+        if stored:
+            self._write(stored)
+
+    def _write(self, stored):
+        self._resolve_tags({name for row, _ in stored for name in row['tags']})
+        blobs = {sha256: (name, size) for _, (name, sha256, size) in stored}
+        references = Counter(name for _, (name, _, _) in stored)
+        now = timezone.now()
+        with transaction.atomic():
+            Blob.objects.bulk_create(
+                [Blob(sha256=sha256, name=name, size=size) for sha256, (name, size) in blobs.items()],
+                ignore_conflicts=True,
+            )
+            Blob.objects.filter(name__in=list(references)).update(
+                ref_count=F('ref_count') + Case(
+                    *[When(name=name, then=Value(count)) for name, count in references.items()], default=Value(0)
+                ),
+                updated_at=now,
+            )
+            Resource.objects.bulk_create([
+                Resource(
+                    external_id=row['id'], title=row['title'], description=row['description'], file=name,
+                    original_filename=os.path.basename(row['path']), owner_id=self._owners[row['owner']],
+                    status=row['status'],
+                )
+                for row, (name, _, _) in stored
+            ], batch_size=self.batch_size)
+            ids = dict(
+                Resource.objects.filter(external_id__in=[row['id'] for row, _ in stored])
+                .values_list('external_id', 'pk')
+            )
+            Resource.tags.through.objects.bulk_create([
+                Resource.tags.through(resource_id=ids[row['id']], tag_id=self._tags[name])
+                for row, _ in stored for name in row['tags']
+            ], ignore_conflicts=True)
+            get_search_backend().index(list(ids.values()))
+            if self.previews:
+                tasks.generate_previews_many.delay(sorted(ids.values()))
+            bump('resources')
+        self.stats.imported += len(stored)
+        self.stats.bytes += sum(size for _, (_, _, size) in stored)
@@ -0,0 +1,88 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from library.benchmark import SCALES, Benchmark, compare
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the hot API endpoints in-process on synthetic data in a throwaway test database, '
+        'optionally comparing against a baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='tiny', help=f'Comma-separated scales: {", ".join(SCALES)}')
+        parser.add_argument('--scenarios', help='Comma-separated scenario names (default: all)')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='Compare against this JSON file and fail on regressions')
+        parser.add_argument('--max-latency-regression', type=float, default=0.25,
+                            help='Allowed p50/p95 growth as a fraction of the baseline')
+        parser.add_argument('--max-query-increase', type=int, default=0)
+        parser.add_argument('--max-bytes-regression', type=float, default=0.10,
+                            help='Allowed response size growth as a fraction of the baseline')
+
+    def handle(self, *args, **options):
+        scales = [name.strip() for name in options['scales'].split(',') if name.strip()]
+        unknown = set(scales) - set(SCALES)
+        if unknown:
+            raise CommandError(f'Unknown scales: {", ".join(sorted(unknown))}')
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be positive')
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read baseline: {exc}')
+        only = set(options['scenarios'].split(',')) if options['scenarios'] else None
+
+        benchmark = Benchmark(iterations=options['iterations'], warmup=options['warmup'], log=self.stdout.write)
+        results = self.run_isolated(benchmark, scales, only, options['seed'])
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(f'Results written to {options["output"]}')
+        if baseline is None:
+            self.stdout.write(self.style.SUCCESS(f'Benchmarked {len(scales)} scale(s)'))
+            return
+        regressions = compare(
+            results, baseline, latency=options['max_latency_regression'], queries=options['max_query_increase'],
+            size=options['max_bytes_regression'],
+        )
+        for scale, name, metric, before, current in regressions:
+            self.stderr.write(f'{scale} {name}: {metric} {before} -> {current}')
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {options["baseline"]}'))
+
+    def run_isolated(self, benchmark, scales, only, seed):
+        """Run on a fresh test database, a private cache and a temporary MEDIA_ROOT."""
+        media = tempfile.TemporaryDirectory()
+        isolated = override_settings(
+            MEDIA_ROOT=media.name,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}},
+            VERSION_STAMP_CACHE='default',
+            COUNTER_BUFFER='local',
+            COUNTER_FLUSH_INTERVAL=None,
+            TASKS_EAGER=False,
+        )
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with isolated:
+                return benchmark.run(scales, only=only, seed=seed)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            media.cleanup()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from library import uploads
+
+
+class Command(BaseCommand):
+    help = 'Deletes unfinished chunked upload sessions that have been idle longer than UPLOAD_SESSION_TTL'
+
+    def handle(self, *args, **options):
+        removed = 0
+        for session in uploads.expired_sessions().iterator():
+            uploads.discard(session)
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired upload sessions'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from library.analytics import compact
+
+
+class Command(BaseCommand):
+    help = 'Folds old daily resource stats into weekly buckets and old weekly buckets into months'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=90, help='Daily rows newer than this are kept')
+        parser.add_argument('--keep-weeks', type=int, default=52, help='Weekly rows newer than this are kept')
+
+    def handle(self, *args, **options):
+        days, weeks = compact(keep_days=options['keep_days'], keep_weeks=options['keep_weeks'])
+        self.stdout.write(self.style.SUCCESS(f'Folded {days} daily rows into weeks and {weeks} weekly rows into months'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from library import counters
+
+
+class Command(BaseCommand):
+    help = 'Writes buffered view and download counters to the database'
+
+    def handle(self, *args, **options):
+        flushed = counters.flush()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} buffered counters'))
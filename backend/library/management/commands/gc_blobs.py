@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from library.storage import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored files that no resource references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--grace-minutes', type=int, default=60,
+            help='Keep unreferenced blobs this long so in-flight uploads can claim them',
+        )
+
+    def handle(self, *args, **options):
+        removed = collect_garbage(
+            batch_size=options['batch_size'],
+            grace=timedelta(minutes=options['grace_minutes']),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} unreferenced blobs'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library.synthetic import PRESETS, DatasetGenerator
+
+VOLUMES = ('users', 'tags', 'resources', 'ratings', 'comments', 'saves')
+
+
+class Command(BaseCommand):
+    help = 'Generates a deterministic synthetic dataset with skewed, realistic distributions for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+        for name in VOLUMES:
+            parser.add_argument(f'--{name}', type=int, help=f'Number of {name} (overrides the preset)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='synthetic', help='Prefix of generated usernames, emails and tags')
+        parser.add_argument('--password', help='Password for every generated user (default: unusable)')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Exponent of the resource popularity law')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        volumes = {name: options[name] if options[name] is not None else PRESETS[options['preset']][name]
+                   for name in VOLUMES}
+        if min(volumes['users'], volumes['tags'], volumes['resources']) < 1:
+            raise CommandError('users, tags and resources must be positive')
+        generator = DatasetGenerator(
+            seed=options['seed'], prefix=options['prefix'], batch_size=options['batch_size'], zipf=options['zipf'],
+            password=options['password'], log=self.stdout.write,
+        )
+        try:
+            counts = generator.generate(**volumes)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            'Generated ' + ', '.join(f'{count} {name}' for name, count in counts.items())
+        ))
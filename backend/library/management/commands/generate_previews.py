@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from library import previews
+from library.models import Resource
+
+
+class Command(BaseCommand):
+    help = 'Renders thumbnails and previews for resources that are missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Also retry resources whose rendering failed')
+        parser.add_argument('--all', action='store_true', help='Process every resource, not only pending ones')
+
+    def handle(self, *args, **options):
+        resources = Resource.objects.exclude(file='')
+        if not options['all']:
+            statuses = ['pending', 'failed'] if options['failed'] else ['pending']
+            resources = resources.filter(preview_status__in=statuses)
+        counts = {}
+        for pk in resources.values_list('pk', flat=True).iterator():
+            status = previews.generate(pk)
+            counts[status] = counts.get(status, 0) + 1
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items())) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f'Previews: {summary}'))
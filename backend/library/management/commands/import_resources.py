@@ -0,0 +1,62 @@
+import json
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.imports import Importer, read_manifest
+
+
+class Command(BaseCommand):
+    help = 'Imports resources from a CSV or JSONL manifest and a directory of files, resuming from a checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest')
+        parser.add_argument('--files', required=True, help='Directory the manifest file paths are relative to')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the manifest extension')
+        parser.add_argument('--owner', help='Email of the owner for records without one')
+        parser.add_argument('--status', default='approved', choices=['pending', 'approved', 'rejected'])
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4, help='Threads copying files')
+        parser.add_argument('--checkpoint', help='Defaults to <manifest>.checkpoint')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+        parser.add_argument('--no-previews', action='store_true', help='Do not queue preview generation')
+
+    def handle(self, *args, **options):
+        manifest = options['manifest']
+        if not os.path.isfile(manifest):
+            raise CommandError(f'No manifest at {manifest}')
+        if not os.path.isdir(options['files']):
+            raise CommandError(f'No directory at {options["files"]}')
+        checkpoint = options['checkpoint'] or f'{manifest}.checkpoint'
+        position = 0
+        if os.path.exists(checkpoint) and not options['restart']:
+            with open(checkpoint) as handle:
+                position = json.load(handle)['position']
+            self.stdout.write(f'Resuming after record {position}')
+
+        importer = Importer(
+            options['files'], default_owner=options['owner'], default_status=options['status'],
+            batch_size=options['batch_size'], workers=options['workers'], previews=not options['no_previews'],
+            on_error=lambda key, message: self.stderr.write(f'{key}: {message}'),
+        )
+
+        def on_batch(stats):
+            self.write_checkpoint(checkpoint, position + stats.read)
+            elapsed = max(stats.elapsed, 1e-6)
+            self.stdout.write(
+                f'{position + stats.read} records: {stats.imported} imported, {stats.skipped} skipped, '
+                f'{stats.failed} failed ({stats.read / elapsed:.0f} records/s, {stats.bytes / elapsed / 2**20:.1f} MB/s)'
+            )
+
+        stats = importer.run(islice(read_manifest(manifest, options['format']), position, None), on_batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats.imported} resources in {stats.elapsed:.1f}s '
+            f'({stats.skipped} already imported or repeated, {stats.failed} failed)'
+        ))
+
+    def write_checkpoint(self, path, position):
+        temp = f'{path}.tmp'
+        with open(temp, 'w') as handle:
+            json.dump({'position': position}, handle)
+        os.replace(temp, path)
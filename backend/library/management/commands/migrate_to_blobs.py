@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from library.models import Resource
+from library.storage import BLOB_DIR, migrate_file
+
+
+class Command(BaseCommand):
+    help = 'Moves resource files stored under resources/ into the content-addressed blob store'
+
+    def handle(self, *args, **options):
+        migrated = 0
+        legacy = Resource.objects.exclude(file='').exclude(file__startswith=f'{BLOB_DIR}/').only('id', 'file')
+        for resource in legacy.iterator():
+            if migrate_file(resource):
+                migrated += 1
+        self.stdout.write(self.style.SUCCESS(f'Moved {migrated} files into the blob store'))
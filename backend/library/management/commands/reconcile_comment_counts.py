@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from library.comments import rebuild_comment_counts
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds stored comment counts from the Comment table'
+
+    def handle(self, *args, **options):
+        fixed = rebuild_comment_counts()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled comment counts for {fixed} resources'))
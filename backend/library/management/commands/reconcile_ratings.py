@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from library.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds stored rating sums, counts, averages and histograms from the Rating table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = rebuild_rating_aggregates(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled rating aggregates for {fixed} resources'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0004_resource_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('views', 'Views'), ('downloads', 'Downloads'), ('ratings', 'Ratings'), ('saves', 'Saves')], max_length=10)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], default='day', max_length=5)),
+                ('date', models.DateField()),
+                ('value', models.IntegerField(default=0)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='library.resource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'date'], name='library_res_metric_8fbb5f_idx')],
+                'unique_together': {('resource', 'metric', 'period', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    'ALTER TABLE library_resource ADD COLUMN search_vector tsvector',
+    'CREATE INDEX library_resource_search_vector_idx ON library_resource USING gin (search_vector)',
+    """
+    UPDATE library_resource AS r SET search_vector =
+        setweight(to_tsvector('simple', coalesce(r.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(r.description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(u.username, '')), 'C')
+    FROM users_user AS u
+    WHERE u.id = r.owner_id
+    """,
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS library_resource_search_vector_idx',
+    'ALTER TABLE library_resource DROP COLUMN IF EXISTS search_vector',
+]
+SQLITE_FORWARD = [
+    'CREATE VIRTUAL TABLE library_resource_fts USING fts5(title, description, author)',
+    """
+    INSERT INTO library_resource_fts (rowid, title, description, author)
+    SELECT r.id, r.title, r.description, u.username
+    FROM library_resource AS r JOIN users_user AS u ON u.id = r.owner_id
+    """,
+]
+SQLITE_BACKWARD = [
+    'DROP TABLE IF EXISTS library_resource_fts',
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgres, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0005_resourcestat'),
+        ('users', '0004_user_block_reason_user_is_blocked'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
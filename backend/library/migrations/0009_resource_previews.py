@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0008_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='preview',
+            field=models.ImageField(blank=True, upload_to='previews/'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='preview_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], default='pending', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='previews/'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0009_resource_previews'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['resource', '-created_at', '-id'], name='comment_resource_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(condition=models.Q(('is_hidden', False), ('status', 'approved')), fields=['-created_at', '-id'], name='resource_listed_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-created_at', '-id'], name='resource_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(condition=models.Q(('is_hidden', False), ('status', 'approved')), fields=['owner', '-created_at', '-id'], name='resource_owner_listed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='resource_owner_recent_idx'),
+        ),
+        # Drop the single-column FK indexes only once the composite ones exist.
+        migrations.AlterField(
+            model_name='comment',
+            name='resource',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='library.resource'),
+        ),
+        migrations.AlterField(
+            model_name='resource',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='resources', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
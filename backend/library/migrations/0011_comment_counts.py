@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:43
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_comment_counts(apps, schema_editor):
+    Resource = apps.get_model('library', 'Resource')
+    Comment = apps.get_model('library', 'Comment')
+    rows = Comment.objects.order_by().values('resource_id').annotate(count=Count('id'))
+    for row in rows.iterator():
+        Resource.objects.filter(pk=row['resource_id']).update(comment_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0010_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['resource', '-created_at', '-id'], name='rating_resource_recent_idx'),
+        ),
+        migrations.RunPython(populate_comment_counts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,11 @@
+import os
+import uuid
+
 from django.db import models
 from django.conf import settings
 
+from .storage import get_resource_storage
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -9,39 +14,122 @@ class Tag(models.Model):
         return self.name
 
 
+class ResourceQuerySet(models.QuerySet):
+    def with_list_data(self, user=None, fields=None):
+        """Load everything ResourceSerializer reads so a page costs a fixed number of queries.
+
+        ``fields`` (see ``core.sparse.requested_fields``) limits the work to what those
+        serializer fields need.
+        """
+        def wanted(*names):
+            return fields is None or any(name in fields for name in names)
+
+        queryset = self
+        if wanted('owner'):
+            queryset = queryset.select_related('owner')
+        if wanted('tags'):
+            queryset = queryset.prefetch_related('tags')
+        if not wanted('description'):
+            queryset = queryset.defer('description')
+        if wanted('user_rating') and user is not None and user.is_authenticated:
+            queryset = queryset.annotate(
+                user_rating_value=models.Subquery(
+                    Rating.objects.filter(resource=models.OuterRef('pk'), user=user).values('rating')[:1]
+                )
+            )
+        return queryset
+
+
 class Resource(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
     )
+    PREVIEW_STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('unsupported', 'Unsupported'),
+        ('failed', 'Failed'),
+    )
     
     title = models.CharField(max_length=200)
     description = models.TextField()
-    file = models.FileField(upload_to='resources/')
+    file = models.FileField(upload_to='resources/', storage=get_resource_storage)
+    original_filename = models.CharField(max_length=255, blank=True)
+    thumbnail = models.ImageField(upload_to='previews/', blank=True)
+    preview = models.ImageField(upload_to='previews/', blank=True)
+    preview_status = models.CharField(max_length=12, choices=PREVIEW_STATUS_CHOICES, default='pending')
     tags = models.ManyToManyField(Tag, related_name='resources')
-    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='resources')
+    # Indexed by resource_owner_recent_idx, which starts with owner.
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='resources', db_index=False
+    )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     views_count = models.IntegerField(default=0)
     downloads_count = models.IntegerField(default=0)
     is_hidden = models.BooleanField(default=False)
     is_problematic = models.BooleanField(default=False)
+    # Key of the row in the manifest it was imported from (see library.imports).
+    external_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Rating aggregates, kept in step with Rating rows by library.ratings
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_avg = models.FloatField(default=0.0, db_index=True)
+    rating_1_count = models.IntegerField(default=0)
+    rating_2_count = models.IntegerField(default=0)
+    rating_3_count = models.IntegerField(default=0)
+    rating_4_count = models.IntegerField(default=0)
+    rating_5_count = models.IntegerField(default=0)
+    # Kept in step with Comment rows by library.comments
+    comment_count = models.IntegerField(default=0)
+
+    objects = ResourceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Public listings: status='approved', is_hidden=False, newest first (keyset on id).
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(status='approved', is_hidden=False),
+                name='resource_listed_recent_idx',
+            ),
+            # Moderation queue.
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(status='pending'), name='resource_pending_idx'
+            ),
+            # A user's public resources, and "my resources".
+            models.Index(
+                fields=['owner', '-created_at', '-id'],
+                condition=models.Q(status='approved', is_hidden=False),
+                name='resource_owner_listed_idx',
+            ),
+            models.Index(fields=['owner', '-created_at', '-id'], name='resource_owner_recent_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored file so blob reference counts can follow changes.
+        instance._loaded_file_name = instance.__dict__.get('file')
+        return instance
+
+    @property
+    def download_filename(self):
+        return self.original_filename or os.path.basename(self.file.name)
+
     @property
     def average_rating(self):
-        ratings = self.ratings.all()
-        if ratings.exists():
-            return round(ratings.aggregate(models.Avg('rating'))['rating__avg'] or 0, 1)
-        return 0.0
+        return round(self.rating_avg, 1)
 
     @property
-    def rating_count(self):
-        return self.ratings.count()
+    def rating_histogram(self):
+        return {stars: getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
 
 
 class Rating(models.Model):
@@ -53,13 +141,15 @@ class Rating(models.Model):
 
     class Meta:
         unique_together = ['resource', 'user']
+        indexes = [models.Index(fields=['resource', '-created_at', '-id'], name='rating_resource_recent_idx')]
 
     def __str__(self):
         return f"{self.user.username} - {self.resource.title}: {self.rating}"
 
 
 class Comment(models.Model):
-    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='comments')
+    # Indexed by comment_resource_recent_idx, which starts with resource.
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='comments', db_index=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -67,6 +157,70 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['resource', '-created_at', '-id'], name='comment_resource_recent_idx')]
 
     def __str__(self):
         return f"{self.user.username} on {self.resource.title}"
+
+
+class ResourceStat(models.Model):
+    """Pre-aggregated activity for one resource, metric and time bucket."""
+
+    METRIC_CHOICES = (
+        ('views', 'Views'),
+        ('downloads', 'Downloads'),
+        ('ratings', 'Ratings'),
+        ('saves', 'Saves'),
+    )
+    PERIOD_CHOICES = (
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    )
+
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='stats')
+    metric = models.CharField(max_length=10, choices=METRIC_CHOICES)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES, default='day')
+    date = models.DateField()
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['resource', 'metric', 'period', 'date']
+        indexes = [models.Index(fields=['metric', 'date'])]
+
+    def __str__(self):
+        return f"{self.resource_id} {self.metric} {self.period} {self.date}: {self.value}"
+
+
+class UploadSession(models.Model):
+    """A chunked upload in progress; bytes are appended to a part file as chunks arrive."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    resource = models.ForeignKey(Resource, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
+class Blob(models.Model):
+    """A stored file in the content-addressed store and the number of resources using it."""
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['ref_count', 'updated_at'])]
+
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
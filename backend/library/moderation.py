@@ -0,0 +1,106 @@
+"""Resource moderation actions, single or bulk (see ``core.moderation``).
+
+Updates skip ``save()`` and its signals, so the version stamps are bumped here.
+Deletes still go through Django's collector for the cascades. While the collector
+runs, the per-row receivers for the resources and their ratings and comments stand
+down (``is_bulk_deleting``): they would only adjust aggregates of rows that are
+being deleted. Blob references, the search index and the stamps are then updated
+once for the whole set. Single deletes (``delete_resource``) and user deletions
+(``deleting_users``) go the same way.
+"""
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.utils import timezone
+
+from core import moderation
+from core.versions import bump
+from .comments import rebuild_comment_counts
+from .models import Comment, Rating, Resource
+from .ratings import rebuild_rating_aggregates
+from .search import get_search_backend
+from .storage import change_references
+
+ACTIONS = {
+    'approve': {'status': 'approved'},
+    'reject': {'status': 'rejected'},
+    'hide': {'is_hidden': True},
+    'unhide': {'is_hidden': False},
+    'mark_problematic': {'is_problematic': True},
+    'unmark_problematic': {'is_problematic': False},
+    'delete': None,
+}
+
+_deleting = contextvars.ContextVar('library_bulk_deleting', default=frozenset())
+
+
+def is_bulk_deleting(resource_id):
+    return resource_id in _deleting.get()
+
+
+@contextmanager
+def _standing_down(resource_ids):
+    token = _deleting.set(_deleting.get() | frozenset(resource_ids))
+    try:
+        yield
+    finally:
+        _deleting.reset(token)
+
+
+def _delete(rows):
+    pks = [pk for pk, _ in rows]
+    with _standing_down(pks):
+        Resource.objects.filter(pk__in=pks).delete()
+    for name, count in Counter(name for _, name in rows if name).items():
+        change_references(name, -count)
+    get_search_backend().remove(pks)
+
+
+def delete_resource(resource):
+    """Delete one resource the way the bulk delete does, without per-rating aggregate updates."""
+    pk = resource.pk
+    with transaction.atomic():
+        _delete([(pk, getattr(resource, '_loaded_file_name', resource.file.name))])
+    bump('resources', f'resource:{pk}', f'comments:{pk}', f'ratings:{pk}')
+
+
+@contextmanager
+def deleting_users(user_ids):
+    """Delete the users ``user_ids`` inside the block, cascades included.
+
+    Their resources go like a bulk delete. Their ratings and comments on other
+    resources stand down too; those resources' aggregates are recomputed once
+    afterwards instead of once per deleted row.
+    """
+    owned = dict(Resource.objects.filter(owner__in=user_ids).values_list('pk', 'file'))
+    rated = set(Rating.objects.filter(user__in=user_ids).values_list('resource_id', flat=True))
+    commented = set(Comment.objects.filter(user__in=user_ids).values_list('resource_id', flat=True))
+    with transaction.atomic():
+        with _standing_down(owned.keys() | rated | commented):
+            yield
+        for name, count in Counter(name for name in owned.values() if name).items():
+            change_references(name, -count)
+        get_search_backend().remove(list(owned))
+        rebuild_rating_aggregates(resource_ids=rated - owned.keys())
+        rebuild_comment_counts(resource_ids=commented - owned.keys())
+    bump('resources', *(
+        f'{name}:{pk}' for pk in owned.keys() | rated | commented for name in ('resource', 'comments', 'ratings')
+    ))
+
+
+def moderate(action, data):
+    """Apply ``action`` to the resources selected by ``data``; returns ``(outcomes, more)``."""
+    queryset = Resource.objects.all()
+    if ACTIONS[action] is None:
+        outcomes, more = moderation.apply_delete(queryset, data, fields=('file',), delete=_delete)
+    else:
+        outcomes, more = moderation.apply_update(
+            queryset, data, ACTIONS[action], extra={'updated_at': timezone.now()}
+        )
+    changed = moderation.changed_ids(outcomes)
+    if changed:
+        related = ('resource', 'comments', 'ratings') if ACTIONS[action] is None else ('resource',)
+        bump('resources', *(f'{name}:{pk}' for pk in changed for name in related))
+    return outcomes, more
@@ -0,0 +1,117 @@
+"""Thumbnails and low-resolution previews of resource files.
+
+After a resource's file changes, the ``library.generate_previews`` task renders the
+first page (images with Pillow, PDFs with poppler's ``pdftoppm`` when it is installed)
+into a PNG thumbnail and a small JPEG preview on a task worker, so the upload request
+never waits for it. Previews are stored next to the blob under
+``previews/ab/cd/<sha256>/``, so a file shared by several resources is rendered once.
+"""
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from core.versions import bump
+from .storage import BLOB_DIR, PREVIEW_DIR, preview_dir
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL = 'thumb.png'
+PREVIEW = 'preview.jpg'
+
+
+def reset(resource):
+    """Forget the previews of a resource whose file is about to change."""
+    resource.thumbnail = ''
+    resource.preview = ''
+    resource.preview_status = 'pending'
+
+
+def _render_pdf(path, size):
+    if not shutil.which('pdftoppm'):
+        return None
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as directory:
+        prefix = os.path.join(directory, 'page')
+        subprocess.run(
+            ['pdftoppm', '-png', '-f', '1', '-l', '1', '-singlefile', '-scale-to', str(size), path, prefix],
+            check=True, capture_output=True, timeout=60,
+        )
+        with Image.open(f'{prefix}.png') as image:
+            return image.convert('RGB')
+
+
+def render_first_page(path, size):
+    """Return an RGB ``PIL.Image`` of the first page/frame no larger than ``size``, or None."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    with open(path, 'rb') as handle:
+        is_pdf = handle.read(5) == b'%PDF-'
+    if is_pdf:
+        return _render_pdf(path, size)
+    try:
+        with Image.open(path) as image:
+            # Lets the JPEG decoder downscale while decoding instead of afterwards.
+            image.draft('RGB', (size, size))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size))
+            return image.convert('RGB')
+    except UnidentifiedImageError:
+        return None
+
+
+def _encode(image, size, fmt, **options):
+    copy = image.copy()
+    copy.thumbnail((size, size))
+    buffer = io.BytesIO()
+    copy.save(buffer, fmt, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def generate(resource_id):
+    """Render and store previews for one resource; returns the resulting status."""
+    from .models import Resource
+
+    resource = Resource.objects.filter(pk=resource_id).only('id', 'file').first()
+    if resource is None or not resource.file:
+        return None
+    name = resource.file.name
+    if name.startswith(f'{BLOB_DIR}/'):
+        directory = preview_dir(os.path.basename(name))
+    else:
+        directory = f'{PREVIEW_DIR}/resources/{resource.pk}'
+    thumbnail, preview = f'{directory}/{THUMBNAIL}', f'{directory}/{PREVIEW}'
+
+    status = 'ready'
+    if not (default_storage.exists(thumbnail) and default_storage.exists(preview)):
+        try:
+            image = render_first_page(resource.file.path, settings.PREVIEW_SIZE)
+        except Exception:
+            logger.exception('Failed to render a preview of resource %s', resource.pk)
+            image, status = None, 'failed'
+        if image is None:
+            status = 'unsupported' if status == 'ready' else status
+        else:
+            for target in (thumbnail, preview):
+                default_storage.delete(target)
+            thumbnail = default_storage.save(
+                thumbnail, _encode(image, settings.PREVIEW_THUMBNAIL_SIZE, 'PNG', optimize=True)
+            )
+            preview = default_storage.save(
+                preview, _encode(image, settings.PREVIEW_SIZE, 'JPEG', quality=70, optimize=True)
+            )
+
+    fields = {'preview_status': status}
+    if status == 'ready':
+        fields.update(thumbnail=thumbnail, preview=preview)
+    # Only if the file has not been replaced in the meantime.
+    if Resource.objects.filter(pk=resource.pk, file=name).update(**fields):
+        bump('resources', f'resource:{resource.pk}')
+    return status
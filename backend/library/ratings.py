@@ -0,0 +1,90 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+
+from . import analytics
+from .models import Resource, Rating
+
+HISTOGRAM_FIELDS = {stars: f'rating_{stars}_count' for stars in range(1, 6)}
+
+AVERAGE_EXPRESSION = Case(
+    When(rating_count=0, then=Value(0.0)),
+    default=Cast('rating_sum', FloatField()) / F('rating_count'),
+    output_field=FloatField(),
+)
+
+
+def apply_rating_change(resource_id, old=None, new=None):
+    """Move a resource's stored aggregates from rating ``old`` to ``new`` (either may be None)."""
+    if old == new:
+        return
+    updates = {}
+    sum_delta = (new or 0) - (old or 0)
+    count_delta = (new is not None) - (old is not None)
+    if sum_delta:
+        updates['rating_sum'] = F('rating_sum') + sum_delta
+    if count_delta:
+        updates['rating_count'] = F('rating_count') + count_delta
+    if old is not None:
+        updates[HISTOGRAM_FIELDS[old]] = F(HISTOGRAM_FIELDS[old]) - 1
+    if new is not None:
+        updates[HISTOGRAM_FIELDS[new]] = F(HISTOGRAM_FIELDS[new]) + 1
+
+    with transaction.atomic():
+        queryset = Resource.objects.filter(pk=resource_id)
+        queryset.update(**updates)
+        queryset.update(rating_avg=AVERAGE_EXPRESSION)
+
+
+def set_rating(resource, user, value):
+    """Create or update ``user``'s rating of ``resource``. Returns ``(rating, created)``."""
+    with transaction.atomic():
+        rating = Rating.objects.select_for_update().filter(resource=resource, user=user).first()
+        if rating is None:
+            try:
+                with transaction.atomic():
+                    rating = Rating.objects.create(resource=resource, user=user, rating=value)
+            except IntegrityError:
+                # A concurrent request created the rating first; update that one instead.
+                rating = Rating.objects.select_for_update().get(resource=resource, user=user)
+            else:
+                apply_rating_change(resource.pk, new=value)
+                analytics.record(resource.pk, 'ratings')
+                return rating, True
+        old = rating.rating
+        rating.rating = value
+        rating.save(update_fields=['rating', 'updated_at'])
+        apply_rating_change(resource.pk, old=old, new=value)
+        return rating, False
+
+
+def rebuild_rating_aggregates(batch_size=1000, resource_ids=None):
+    """Recompute stored aggregates from the Rating table, for every resource or only ``resource_ids``.
+
+    Returns rows fixed.
+    """
+    aggregates = {
+        'rating_sum': Sum('rating'),
+        'rating_count': Count('id'),
+        **{field: Count('id', filter=Q(rating=stars)) for stars, field in HISTOGRAM_FIELDS.items()},
+    }
+    fields = list(aggregates)
+    rows = Rating.objects.order_by().values('resource_id').annotate(**aggregates)
+    stored = Resource.objects.order_by('pk').values('pk', 'rating_avg', *fields)
+    if resource_ids is not None:
+        rows = rows.filter(resource_id__in=resource_ids)
+        stored = stored.filter(pk__in=resource_ids)
+    computed = {row['resource_id']: row for row in rows.iterator()}
+
+    empty = {field: 0 for field in fields}
+    changed = []
+    for row in stored.iterator(chunk_size=batch_size):
+        expected = computed.get(row['pk'], empty)
+        if any(row[field] != expected[field] for field in fields):
+            resource = Resource(pk=row['pk'], **{field: expected[field] for field in fields})
+            resource.rating_avg = expected['rating_sum'] / expected['rating_count'] if expected['rating_count'] else 0.0
+            changed.append(resource)
+
+    with transaction.atomic():
+        Resource.objects.bulk_update(changed, fields + ['rating_avg'], batch_size=batch_size)
+    return len(changed)
@@ -0,0 +1,53 @@
+"""Saved (bookmarked) resources, read and written through ``users.SavedResource``.
+
+Every operation is a single indexed statement on the (user, resource) unique index
+or the (user, saved_at) index; nothing loads a user's saved resources into Python.
+"""
+from django.db import transaction
+
+from core.versions import bump
+from users.models import SavedResource
+from . import analytics
+
+MAX_BULK = 500
+
+
+def save_many(user, resource_ids):
+    """Save ``resource_ids`` for ``user``; returns the ids that were not saved before."""
+    resource_ids = list(dict.fromkeys(resource_ids))
+    with transaction.atomic():
+        existing = set(
+            SavedResource.objects.filter(user=user, resource_id__in=resource_ids).values_list('resource_id', flat=True)
+        )
+        added = [pk for pk in resource_ids if pk not in existing]
+        SavedResource.objects.bulk_create(
+            [SavedResource(user=user, resource_id=pk) for pk in added], ignore_conflicts=True
+        )
+    if added:
+        analytics.record_many({(pk, 'saves'): 1 for pk in added})
+        bump(f'saved:{user.pk}')
+    return added
+
+
+def unsave_many(user, resource_ids):
+    """Remove ``resource_ids`` from ``user``'s saved resources; returns how many were removed."""
+    removed, _ = SavedResource.objects.filter(user=user, resource_id__in=resource_ids).delete()
+    if removed:
+        bump(f'saved:{user.pk}')
+    return removed
+
+
+def toggle(user, resource_id):
+    """Unsave the resource if it is saved, save it otherwise; returns True if it is now saved."""
+    if unsave_many(user, [resource_id]):
+        return False
+    save_many(user, [resource_id])
+    return True
+
+
+def saved_ids(user):
+    return list(
+        SavedResource.objects.filter(user=user)
+        .order_by('-saved_at', '-resource_id')
+        .values_list('resource_id', flat=True)
+    )
@@ -0,0 +1,167 @@
+"""Full-text search over resource title, description and author.
+
+The backend is picked from ``settings.RESOURCE_SEARCH_BACKEND`` (a dotted path) or,
+by default, from the database vendor:
+
+* PostgreSQL: a weighted ``search_vector`` tsvector column with a GIN index,
+* SQLite: an FTS5 table ``library_resource_fts`` keyed by resource id,
+* anything else: ``icontains`` matching, as DRF's SearchFilter did.
+
+The index is created by migration 0006, kept in sync from ``library.signals`` (which
+also re-indexes an author's resources when their username changes) and rebuilt with
+``manage.py rebuild_search_index``. Matching querysets are annotated with
+``search_rank`` (higher is better).
+"""
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Resource
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchBackend:
+    def search(self, queryset, text):
+        raise NotImplementedError
+
+    def index(self, pks):
+        pass
+
+    def remove(self, pks):
+        pass
+
+    def clear(self):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        """Re-index every resource. Returns the number of resources indexed."""
+        self.clear()
+        pks = list(Resource.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            self.index(pks[start:start + batch_size])
+        return len(pks)
+
+
+class ContainsSearchBackend(SearchBackend):
+    def search(self, queryset, text):
+        for token in tokenize(text):
+            queryset = queryset.filter(
+                Q(title__icontains=token) | Q(description__icontains=token) | Q(owner__username__icontains=token)
+            )
+        return queryset
+
+
+class PostgresSearchBackend(SearchBackend):
+    config = 'simple'
+
+    def search(self, queryset, text):
+        tokens = tokenize(text)
+        if not tokens:
+            return queryset
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        table = Resource._meta.db_table
+        return queryset.filter(
+            RawSQL(
+                f'"{table}"."search_vector" @@ to_tsquery(%s, %s)',
+                (self.config, query),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'ts_rank("{table}"."search_vector", to_tsquery(%s, %s))',
+                (self.config, query),
+                output_field=FloatField(),
+            )
+        )
+
+    def index(self, pks):
+        if not pks:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                UPDATE {Resource._meta.db_table} AS r SET search_vector =
+                    setweight(to_tsvector(%s, coalesce(r.title, '')), 'A') ||
+                    setweight(to_tsvector(%s, coalesce(r.description, '')), 'B') ||
+                    setweight(to_tsvector(%s, coalesce(u.username, '')), 'C')
+                FROM {get_user_model()._meta.db_table} AS u
+                WHERE u.id = r.owner_id AND r.id = ANY(%s)
+                ''',
+                [self.config, self.config, self.config, list(pks)],
+            )
+
+
+class SqliteSearchBackend(SearchBackend):
+    table = 'library_resource_fts'
+    # bm25 column weights for title, description, author
+    weights = (10.0, 4.0, 1.0)
+
+    def search(self, queryset, text):
+        tokens = tokenize(text)
+        if not tokens:
+            return queryset
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        resource_table = Resource._meta.db_table
+        # Join the FTS table so MATCH runs once and bm25() reads the matched row. A
+        # correlated rank subquery would repeat the MATCH for every candidate row.
+        return queryset.extra(
+            tables=[self.table],
+            where=[f'{self.table}.rowid = "{resource_table}"."id"', f'{self.table} MATCH %s'],
+            params=[query],
+        ).annotate(
+            search_rank=RawSQL(f'-bm25({self.table}, {weights})', (), output_field=FloatField()),
+        )
+
+    def index(self, pks):
+        if not pks:
+            return
+        pks = list(pks)
+        placeholders = ', '.join(['%s'] * len(pks))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', pks)
+            cursor.execute(
+                f'''
+                INSERT INTO {self.table} (rowid, title, description, author)
+                SELECT r.id, r.title, r.description, u.username
+                FROM {Resource._meta.db_table} AS r
+                JOIN {get_user_model()._meta.db_table} AS u ON u.id = r.owner_id
+                WHERE r.id IN ({placeholders})
+                ''',
+                pks,
+            )
+
+    def remove(self, pks):
+        if not pks:
+            return
+        pks = list(pks)
+        placeholders = ', '.join(['%s'] * len(pks))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', pks)
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+
+VENDOR_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SqliteSearchBackend,
+}
+
+
+def get_search_backend():
+    path = getattr(settings, 'RESOURCE_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    return VENDOR_BACKENDS.get(connection.vendor, ContainsSearchBackend)()
@@ -1,5 +1,9 @@
 from rest_framework import serializers
-from .models import Tag, Resource, Rating, Comment
+
+from core.moderation import BulkActionSerializer
+from core.sparse import SparseFieldsetMixin
+from . import moderation
+from .models import Tag, Resource, Rating, Comment, UploadSession
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -12,7 +16,7 @@ class TagSerializer(serializers.ModelSerializer):
 
 class RatingSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
-    user_id = serializers.ReadOnlyField(source='user.id')
+    user_id = serializers.ReadOnlyField()
 
     class Meta:
         model = Rating
@@ -22,7 +26,7 @@ class RatingSerializer(serializers.ModelSerializer):
 
 class CommentSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
-    user_id = serializers.ReadOnlyField(source='user.id')
+    user_id = serializers.ReadOnlyField()
 
     class Meta:
         model = Comment
@@ -30,28 +34,76 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at', 'updated_at')
 
 
-class ResourceSerializer(serializers.ModelSerializer):
+class ResourceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tags = serializers.PrimaryKeyRelatedField(many=True, queryset=Tag.objects.all())
     owner = serializers.ReadOnlyField(source='owner.username')
-    owner_id = serializers.ReadOnlyField(source='owner.id')
+    owner_id = serializers.ReadOnlyField()
+    original_filename = serializers.ReadOnlyField()
+    thumbnail = serializers.ImageField(read_only=True)
+    preview = serializers.ImageField(read_only=True)
+    preview_status = serializers.ReadOnlyField()
     average_rating = serializers.ReadOnlyField()
     rating_count = serializers.ReadOnlyField()
+    rating_histogram = serializers.ReadOnlyField()
+    comment_count = serializers.ReadOnlyField()
     user_rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Resource
-        fields = ('id', 'title', 'description', 'file', 'tags', 'owner', 'owner_id', 'status', 
+        fields = ('id', 'title', 'description', 'file', 'original_filename', 'thumbnail', 'preview', 'preview_status', 'tags', 'owner', 'owner_id', 'status', 
                   'views_count', 'downloads_count', 'is_hidden', 'is_problematic', 
-                  'created_at', 'updated_at', 'average_rating', 'rating_count', 'user_rating')
+                  'created_at', 'updated_at', 'average_rating', 'rating_count', 'rating_histogram', 'comment_count', 'user_rating')
 
     def get_user_rating(self, obj):
+        if 'user_rating_value' in obj.__dict__:
+            return obj.user_rating_value
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             rating = Rating.objects.filter(resource=obj, user=request.user).first()
             return rating.rating if rating else None
         return None
 
+    expandable_fields = ('tags',)
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['tags'] = TagSerializer(instance.tags.all(), many=True).data
+        if 'tags' in representation and 'tags' in self.expand:
+            representation['tags'] = TagSerializer(instance.tags.all(), many=True).data
         return representation
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ('id', 'filename', 'size', 'received', 'sha256', 'resource', 'created_at', 'updated_at')
+        read_only_fields = ('received', 'sha256', 'resource', 'created_at', 'updated_at')
+
+    def validate_size(self, value):
+        if value < 1:
+            raise serializers.ValidationError('Size must be positive')
+        return value
+
+
+class UploadCompleteSerializer(serializers.ModelSerializer):
+    tags = serializers.PrimaryKeyRelatedField(many=True, queryset=Tag.objects.all())
+    sha256 = serializers.CharField(required=False, write_only=True)
+
+    class Meta:
+        model = Resource
+        fields = ('title', 'description', 'tags', 'sha256')
+
+
+class ResourceIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+
+
+class ResourceFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Resource.STATUS_CHOICES, required=False)
+    is_hidden = serializers.BooleanField(required=False)
+    is_problematic = serializers.BooleanField(required=False)
+    owner = serializers.IntegerField(min_value=1, required=False)
+
+
+class ResourceModerationSerializer(BulkActionSerializer):
+    action = serializers.ChoiceField(choices=list(moderation.ACTIONS))
+    filter = ResourceFilterSerializer(required=False)
@@ -0,0 +1,134 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.versions import bump
+from . import moderation, previews, tasks
+from .models import Comment, Rating, Resource, Tag
+from .comments import apply_comment_change
+from .ratings import apply_rating_change
+from .search import get_search_backend
+from .storage import change_references
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    if not moderation.is_bulk_deleting(instance.resource_id):
+        apply_rating_change(instance.resource_id, old=instance.rating)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if not moderation.is_bulk_deleting(instance.resource_id):
+        apply_comment_change(instance.resource_id, -1)
+
+
+@receiver(pre_save, sender=Resource)
+def file_changing(sender, instance, raw=False, **kwargs):
+    if raw or not instance.file:
+        return
+    if not instance.file._committed:
+        instance.original_filename = os.path.basename(instance.file.name)
+    if not instance.file._committed or instance.file.name != getattr(instance, '_loaded_file_name', None):
+        previews.reset(instance)
+
+
+@receiver(post_save, sender=Resource)
+def file_changed(sender, instance, raw=False, **kwargs):
+    loaded = getattr(instance, '_loaded_file_name', None)
+    current = instance.file.name
+    if raw or loaded == current:
+        return
+    change_references(current, 1)
+    change_references(loaded, -1)
+    instance._loaded_file_name = current
+    if current:
+        tasks.generate_previews.delay(instance.pk)
+
+
+@receiver(post_delete, sender=Resource)
+def release_blob_reference(sender, instance, **kwargs):
+    if not moderation.is_bulk_deleting(instance.pk):
+        change_references(getattr(instance, '_loaded_file_name', instance.file.name), -1)
+
+
+@receiver(post_save, sender=Resource)
+def resource_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index([instance.pk])
+
+
+@receiver(pre_save, sender=get_user_model())
+def username_changing(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None or (update_fields is not None and 'username' not in update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+    instance._username_changed = previous is not None and previous != instance.username
+
+
+@receiver(post_save, sender=get_user_model())
+def username_changed(sender, instance, raw=False, **kwargs):
+    if getattr(instance, '_username_changed', False):
+        instance._username_changed = False
+        # The author name is indexed for search and shown in resource lists and details.
+        pks = list(Resource.objects.filter(owner=instance).values_list('pk', flat=True))
+        search = get_search_backend()
+        for start in range(0, len(pks), 1000):
+            search.index(pks[start:start + 1000])
+        bump('resources', *(f'resource:{pk}' for pk in pks))
+
+
+@receiver(post_delete, sender=Resource)
+def resource_deleted(sender, instance, **kwargs):
+    if not moderation.is_bulk_deleting(instance.pk):
+        get_search_backend().remove([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Resource)
+def bump_resource_versions(sender, instance, **kwargs):
+    if not moderation.is_bulk_deleting(instance.pk):
+        bump('resources', f'resource:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def bump_tag_versions(sender, instance, **kwargs):
+    bump('tags')
+
+
+@receiver([post_save, post_delete], sender=Rating)
+def bump_rating_versions(sender, instance, **kwargs):
+    if not moderation.is_bulk_deleting(instance.resource_id):
+        bump('resources', f'resource:{instance.resource_id}', f'ratings:{instance.resource_id}')
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def bump_comment_versions(sender, instance, **kwargs):
+    if not moderation.is_bulk_deleting(instance.resource_id):
+        bump('resources', f'resource:{instance.resource_id}', f'comments:{instance.resource_id}')
+
+
+@receiver(m2m_changed, sender=Resource.tags.through)
+def bump_resource_tag_versions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump('resources', f'resource:{instance.pk}')
+    elif pk_set:
+        bump('resources', *[f'resource:{pk}' for pk in pk_set])
+    else:
+        bump('resources', 'tags')
+
+
+@receiver(m2m_changed, sender=get_user_model().saved_resources.through)
+def bump_saved_versions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump(f'saved:{instance.pk}')
+    elif pk_set:
+        bump(*[f'saved:{pk}' for pk in pk_set])
+    else:
+        bump('resources')
+
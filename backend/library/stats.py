@@ -0,0 +1,25 @@
+from django.db.models import Count, Q, Sum
+
+from .models import Resource
+
+SNAPSHOT_KEY = 'library:resource-stats'
+
+
+def compute_resource_stats():
+    """Admin dashboard totals: one conditional aggregate plus the tag grouping."""
+    totals = Resource.objects.aggregate(
+        total_resources=Count('id'),
+        approved=Count('id', filter=Q(status='approved')),
+        pending=Count('id', filter=Q(status='pending')),
+        rejected=Count('id', filter=Q(status='rejected')),
+        hidden=Count('id', filter=Q(is_hidden=True)),
+        problematic=Count('id', filter=Q(is_problematic=True)),
+        total_views=Sum('views_count'),
+        total_downloads=Sum('downloads_count'),
+    )
+    totals['total_views'] = totals['total_views'] or 0
+    totals['total_downloads'] = totals['total_downloads'] or 0
+    totals['top_tags'] = list(
+        Resource.objects.values('tags__name').annotate(count=Count('id')).order_by('-count')[:10]
+    )
+    return totals
@@ -0,0 +1,184 @@
+"""Content-addressed storage for resource files.
+
+Every file is stored once under ``blobs/ab/cd/<sha256>`` no matter how many resources
+use it. ``library.models.Blob`` tracks each stored file and how many resources
+reference it; ``library.signals`` keeps the count current and ``collect_garbage``
+(``manage.py gc_blobs``) deletes blobs nobody references any more, together with
+their previews.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from functools import partial
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+BLOB_DIR = 'blobs'
+PREVIEW_DIR = 'previews'
+
+
+def blob_name(sha256):
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def preview_dir(sha256):
+    return f'{PREVIEW_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # The final name is decided by the content in _save; never suffix it.
+        return name
+
+    def _spool(self, chunks):
+        """Write ``chunks`` to a temporary file in the store; return ``(path, sha256, size)``."""
+        temp_dir = self.path(os.path.join(BLOB_DIR, 'tmp'))
+        os.makedirs(temp_dir, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                hasher.update(chunk)
+                size += len(chunk)
+        return handle.name, hasher.hexdigest(), size
+
+    def _place(self, path, sha256):
+        """Move the local file at ``path`` to its blob name unless that content is already stored."""
+        name = blob_name(sha256)
+        target = self.path(name)
+        if os.path.exists(target):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+            if self.file_permissions_mode is not None:
+                os.chmod(target, self.file_permissions_mode)
+        return name
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return self.adopt(*self._spool(content.chunks()))
+
+    def adopt(self, path, sha256, size=None):
+        """Move the local file at ``path`` (with known digest) into the store; return its name."""
+        from .models import Blob
+
+        with transaction.atomic():
+            # Touch the row before trusting that its file exists. The UPDATE locks the row
+            # against collect_garbage and restarts the GC grace period of a blob that is
+            # about to gain a reference; it matches nothing once the row is collected.
+            if Blob.objects.filter(sha256=sha256).update(updated_at=timezone.now()):
+                return self._place(path, sha256)
+            name = self._place(path, sha256)
+            size = os.path.getsize(self.path(name)) if size is None else size
+            try:
+                with transaction.atomic():
+                    Blob.objects.create(sha256=sha256, name=name, size=size)
+            except IntegrityError:
+                # A concurrent first upload of the same content created the row.
+                Blob.objects.filter(sha256=sha256).update(updated_at=timezone.now())
+        return name
+
+    def copy_in(self, path):
+        """Copy the local file at ``path`` into the store; return ``(name, sha256, size)``.
+
+        Unlike ``adopt`` this does not touch the database, so it is safe to run on many
+        threads at once; the caller records the Blob rows.
+        """
+        with open(path, 'rb') as source:
+            temp_path, sha256, size = self._spool(iter(lambda: source.read(64 * 1024), b''))
+        return self._place(temp_path, sha256), sha256, size
+
+
+resource_storage = ContentAddressedStorage()
+
+
+def get_resource_storage():
+    return resource_storage
+
+
+def change_references(name, delta):
+    from .models import Blob
+
+    if name:
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') + delta, updated_at=timezone.now())
+
+
+def _remove_files(blobs):
+    for blob in blobs:
+        resource_storage.delete(blob.name)
+        shutil.rmtree(resource_storage.path(preview_dir(blob.sha256)), ignore_errors=True)
+
+
+def collect_garbage(batch_size=500, grace=timedelta(hours=1)):
+    """Delete unreferenced blobs (and stray files under blobs/) older than ``grace``."""
+    from .models import Blob
+
+    cutoff = timezone.now() - grace
+    removed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Blob.objects.select_for_update()
+                .filter(ref_count__lte=0, updated_at__lt=cutoff)
+                .order_by('updated_at')[:batch_size]
+            )
+            # Re-check under the lock: adopt() may have touched the row since the SELECT
+            # (which does not lock on SQLite). Files go only with a deleted row, once that
+            # delete is committed.
+            doomed = [
+                blob for blob in batch
+                if Blob.objects.filter(pk=blob.pk, ref_count__lte=0, updated_at__lt=cutoff).delete()[0]
+            ]
+            transaction.on_commit(partial(_remove_files, doomed))
+            removed += len(doomed)
+        if len(batch) < batch_size:
+            break
+
+    root = resource_storage.path(BLOB_DIR)
+    for directory, _, files in os.walk(root):
+        paths = {
+            os.path.relpath(os.path.join(directory, file), resource_storage.location).replace(os.sep, '/'): file
+            for file in files
+        }
+        known = set(Blob.objects.filter(name__in=list(paths)).values_list('name', flat=True))
+        for name in paths.keys() - known:
+            path = resource_storage.path(name)
+            if os.path.getmtime(path) < cutoff.timestamp():
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def migrate_file(resource):
+    """Move a legacy ``resources/`` file into the blob store in place. Returns the new name or None."""
+    from .models import Resource
+
+    old_name = resource.file.name
+    if not old_name or old_name.startswith(f'{BLOB_DIR}/'):
+        return None
+    path = resource_storage.path(old_name)
+    if not os.path.exists(path):
+        return None
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(64 * 1024), b''):
+            hasher.update(block)
+    sha256 = hasher.hexdigest()
+
+    with transaction.atomic():
+        # Several resources may point at the same legacy file; move it once.
+        sharing = Resource.objects.filter(file=old_name)
+        count = sharing.count()
+        name = resource_storage.adopt(path, sha256)
+        sharing.filter(original_filename='').update(original_filename=os.path.basename(old_name))
+        sharing.update(file=name)
+        change_references(name, count)
+    return name
@@ -0,0 +1,263 @@
+"""Seeded synthetic datasets for load and performance testing (``manage.py generate_dataset``).
+
+The same seed on an empty database always produces the same rows. Volumes are set
+per table. The distributions are skewed like real traffic:
+- resource popularity (ratings, comments, saves, views) follows a Zipf law;
+- authorship is heavy-tailed over a minority of teachers;
+- tags cluster into topics, so tags that share a topic co-occur.
+
+Users, tags and resources are written with ``bulk_create`` in batches; resources point
+at a handful of tiny placeholder blobs. The high-volume link tables (ratings, comments,
+saves and resource tags) skip model instances and go straight to ``executemany`` with
+``ON CONFLICT DO NOTHING``, which SQLite and PostgreSQL both accept. Afterwards the
+stored aggregates of the new resources are set with one ``UPDATE ... FROM`` per table,
+the new resources are indexed for search and the planner statistics are refreshed.
+"""
+import itertools
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from core.versions import bump
+from users.models import SavedResource
+from .models import Blob, Comment, Rating, Resource, Tag
+from .ratings import HISTOGRAM_FIELDS
+from .search import get_search_backend
+from .storage import resource_storage
+
+PRESETS = {
+    'small': {'users': 1_000, 'tags': 50, 'resources': 10_000, 'ratings': 50_000, 'comments': 20_000, 'saves': 20_000},
+    'medium': {
+        'users': 10_000, 'tags': 200, 'resources': 100_000, 'ratings': 1_000_000, 'comments': 300_000,
+        'saves': 300_000,
+    },
+    'large': {
+        'users': 100_000, 'tags': 500, 'resources': 1_000_000, 'ratings': 10_000_000, 'comments': 10_000_000,
+        'saves': 10_000_000,
+    },
+}
+TOPIC_SIZE = 10
+PLACEHOLDER_FILES = 8
+WORDS = (
+    'algebra', 'biology', 'chemistry', 'history', 'geometry', 'grammar', 'physics', 'reading', 'writing',
+    'statistics', 'ecology', 'economics', 'poetry', 'music', 'coding', 'robotics', 'climate', 'civics',
+    'worksheet', 'lesson', 'quiz', 'notes', 'slides', 'lab', 'project', 'review', 'guide', 'exercises',
+)
+COMMENTS = (
+    'Thanks, this worked well in class.', 'Great examples.', 'Could you add an answer key?',
+    'My students loved it.', 'A few typos on page two.', 'Very clear explanations.', 'Too advanced for grade 6.',
+    'Used it for revision, very helpful.',
+)
+
+
+def zipf_cumulative(n, exponent):
+    """Cumulative weights of ranks 1..n under a Zipf law, for ``Random.choices``."""
+    return list(itertools.accumulate(rank ** -exponent for rank in range(1, n + 1)))
+
+
+class DatasetGenerator:
+    def __init__(self, seed=0, prefix='synthetic', batch_size=5000, zipf=1.1, password=None, log=None):
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.zipf = zipf
+        self.password = make_password(password)  # hashed once, shared by every user
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def _timed(self, name, model, func, *args):
+        started, before = time.monotonic(), model.objects.count()
+        func(*args)
+        created = model.objects.count() - before
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.counts[name] = created
+        self.log(f'{name}: {created} rows in {elapsed:.1f}s ({created / elapsed:.0f} rows/s)')
+
+    def generate(self, users, tags, resources, ratings, comments, saves):
+        User = get_user_model()
+        if User.objects.filter(email__startswith=f'{self.prefix}-').exists():
+            raise ValueError(f'A dataset with prefix {self.prefix!r} already exists')
+        self._timed('users', User, self.create_users, users)
+        self._timed('tags', Tag, self.create_tags, tags)
+        self._timed('resources', Resource, self.create_resources, resources)
+        self._timed('ratings', Rating, self.create_ratings, ratings)
+        self._timed('comments', Comment, self.create_comments, comments)
+        self._timed('saves', SavedResource, self.create_saves, saves)
+        self.finish()
+        return self.counts
+
+    def create_users(self, total):
+        User = get_user_model()
+        teachers = max(1, total // 10)
+        for start, size in self._batches(total):
+            User.objects.bulk_create([
+                User(
+                    username=f'{self.prefix}-{n}', email=f'{self.prefix}-{n}@example.test', password=self.password,
+                    user_type='teacher' if n < teachers else 'student', is_approved=n < teachers,
+                )
+                for n in range(start, start + size)
+            ])
+        ids = list(
+            User.objects.filter(email__startswith=f'{self.prefix}-').order_by('pk').values_list('pk', 'user_type')
+        )
+        self.teacher_ids = [pk for pk, user_type in ids if user_type == 'teacher']
+        self.user_ids = [pk for pk, _ in ids]
+        # Activity rank is independent of signup order.
+        self.rng.shuffle(self.user_ids)
+        self.rng.shuffle(self.teacher_ids)
+        self.user_weights = zipf_cumulative(len(self.user_ids), 0.8)
+        self.author_weights = zipf_cumulative(len(self.teacher_ids), 1.2)
+
+    def create_tags(self, total):
+        Tag.objects.bulk_create(
+            [Tag(name=f'{self.prefix}-{WORDS[n % len(WORDS)]}-{n}') for n in range(total)], ignore_conflicts=True
+        )
+        names = Tag.objects.filter(name__startswith=f'{self.prefix}-').order_by('pk').values_list('pk', flat=True)
+        tag_ids = list(names)
+        self.topics = [tag_ids[i:i + TOPIC_SIZE] for i in range(0, len(tag_ids), TOPIC_SIZE)]
+        self.topic_weights = zipf_cumulative(len(self.topics), 1.0)
+
+    def _placeholders(self):
+        return [
+            resource_storage.save('placeholder.pdf', ContentFile(f'%PDF-1.4\n% placeholder {n}\n'.encode()))
+            for n in range(PLACEHOLDER_FILES)
+        ]
+
+    def _resource_tags(self):
+        topic = self.rng.choices(self.topics, cum_weights=self.topic_weights)[0]
+        chosen = set(self.rng.sample(topic, min(len(topic), self.rng.randint(1, 3))))
+        if self.rng.random() < 0.2:
+            chosen.add(self.rng.choice(self.rng.choice(self.topics)))
+        return chosen
+
+    def create_resources(self, total):
+        files = self._placeholders()
+        references = {name: 0 for name in files}
+        popularity = zipf_cumulative(total, self.zipf)
+        # The resource at popularity rank r gets about 500000 / r**zipf views.
+        views = [int(500_000 / rank ** self.zipf) for rank in range(1, total + 1)]
+        self.rng.shuffle(views)
+        self.resource_ids = []
+        for start, size in self._batches(total):
+            rows, tag_sets = [], []
+            owners = self.rng.choices(self.teacher_ids, cum_weights=self.author_weights, k=size)
+            for n, owner_id in zip(range(start, start + size), owners):
+                name = files[n % len(files)]
+                references[name] += 1
+                roll = self.rng.random()
+                rows.append(Resource(
+                    title=f'{" ".join(self.rng.sample(WORDS, 3)).capitalize()} {n}',
+                    description=' '.join(self.rng.choices(WORDS, k=self.rng.randint(5, 40))),
+                    file=name, original_filename=f'resource-{n}.pdf', preview_status='unsupported',
+                    owner_id=owner_id,
+                    status='approved' if roll < 0.85 else 'pending' if roll < 0.95 else 'rejected',
+                    is_hidden=self.rng.random() < 0.02, is_problematic=self.rng.random() < 0.01,
+                    views_count=views[n], downloads_count=views[n] // 5,
+                ))
+                tag_sets.append(self._resource_tags())
+            with transaction.atomic():
+                # SQLite 3.35+ and PostgreSQL return the new primary keys.
+                pks = [row.pk for row in Resource.objects.bulk_create(rows)]
+                self._insert(
+                    Resource.tags.through, ('resource_id', 'tag_id'),
+                    [(pk, tag_id) for pk, tags in zip(pks, tag_sets) for tag_id in tags],
+                )
+            self.resource_ids.extend(pks)
+        Blob.objects.filter(name__in=files).update(
+            ref_count=F('ref_count') + Case(*[When(name=name, then=Value(count)) for name, count in references.items()])
+        )
+        # Popularity rank follows the same shuffle as the view counts.
+        ranked = sorted(range(total), key=lambda n: -views[n])
+        self.resource_ids = [self.resource_ids[n] for n in ranked]
+        self.resource_weights = popularity
+
+    def _pairs(self, size):
+        resources = self.rng.choices(self.resource_ids, cum_weights=self.resource_weights, k=size)
+        users = self.rng.choices(self.user_ids, cum_weights=self.user_weights, k=size)
+        return zip(resources, users)
+
+    def _insert(self, model, columns, rows):
+        """Insert plain tuples, skipping duplicates of a unique key."""
+        if not rows:
+            return
+        placeholders = ', '.join(['%s'] * len(columns))
+        # One transaction per batch: in autocommit SQLite would commit every row.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {model._meta.db_table} ({", ".join(columns)}) VALUES ({placeholders}) '
+                'ON CONFLICT DO NOTHING',
+                rows,
+            )
+
+    def _now(self):
+        return connection.ops.adapt_datetimefield_value(timezone.now())
+
+    def create_ratings(self, total):
+        for _, size in self._batches(total):
+            now, rows = self._now(), []
+            for resource_id, user_id in self._pairs(size):
+                # A stable per-resource quality between 2.5 and 4.8 stars.
+                mean = 2.5 + (resource_id * 2654435761 % 1000) / 1000 * 2.3
+                value = min(5, max(1, round(self.rng.gauss(mean, 0.9))))
+                rows.append((resource_id, user_id, value, now, now))
+            self._insert(Rating, ('resource_id', 'user_id', 'rating', 'created_at', 'updated_at'), rows)
+
+    def create_comments(self, total):
+        for _, size in self._batches(total):
+            now = self._now()
+            self._insert(Comment, ('resource_id', 'user_id', 'text', 'created_at', 'updated_at'), [
+                (resource_id, user_id, self.rng.choice(COMMENTS), now, now)
+                for resource_id, user_id in self._pairs(size)
+            ])
+
+    def create_saves(self, total):
+        for _, size in self._batches(total):
+            now = self._now()
+            self._insert(SavedResource, ('resource_id', 'user_id', 'saved_at'), [
+                (resource_id, user_id, now) for resource_id, user_id in self._pairs(size)
+            ])
+
+    def _update_from(self, assignments, source):
+        """Copy aggregates of ``source`` (a GROUP BY resource_id) onto the new resources."""
+        low, high = min(self.resource_ids), max(self.resource_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Resource._meta.db_table} SET {assignments} '
+                f'FROM ({source} WHERE resource_id BETWEEN %s AND %s GROUP BY resource_id) AS a '
+                f'WHERE {Resource._meta.db_table}.id = a.resource_id',
+                [low, high],
+            )
+
+    def finish(self):
+        started = time.monotonic()
+        if self.resource_ids:
+            histogram = ', '.join(
+                f'SUM(CASE WHEN rating = {stars} THEN 1 ELSE 0 END) AS {field}'
+                for stars, field in HISTOGRAM_FIELDS.items()
+            )
+            self._update_from(
+                'rating_sum = a.total, rating_count = a.n, rating_avg = a.total * 1.0 / a.n, '
+                + ', '.join(f'{field} = a.{field}' for field in HISTOGRAM_FIELDS.values()),
+                f'SELECT resource_id, SUM(rating) AS total, COUNT(*) AS n, {histogram} FROM {Rating._meta.db_table}',
+            )
+            self._update_from(
+                'comment_count = a.n', f'SELECT resource_id, COUNT(*) AS n FROM {Comment._meta.db_table}'
+            )
+            pks = sorted(self.resource_ids)
+            search = get_search_backend()
+            for start in range(0, len(pks), self.batch_size):
+                search.index(pks[start:start + self.batch_size])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        bump('resources', 'users', 'tags')
+        self.log(f'aggregates, search index and statistics rebuilt in {time.monotonic() - started:.1f}s')
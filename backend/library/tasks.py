@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from core.snapshots import refresh_snapshot
+from tasks.queue import task
+from . import analytics, counters, previews, stats, uploads
+from .storage import collect_garbage
+
+
+@task()
+def generate_previews(resource_id):
+    previews.generate(resource_id)
+
+
+@task()
+def generate_previews_many(resource_ids):
+    for resource_id in resource_ids:
+        previews.generate(resource_id)
+
+
+@task(max_attempts=1)
+def flush_counters():
+    counters.flush()
+
+
+@task()
+def refresh_stats():
+    refresh_snapshot(stats.SNAPSHOT_KEY, stats.compute_resource_stats)
+
+
+@task()
+def compact_stats(keep_days=90, keep_weeks=52):
+    analytics.compact(keep_days=keep_days, keep_weeks=keep_weeks)
+
+
+@task()
+def cleanup_uploads():
+    for session in uploads.expired_sessions().iterator():
+        uploads.discard(session)
+
+
+@task()
+def gc_blobs(grace_minutes=60):
+    collect_garbage(grace=timedelta(minutes=grace_minutes))
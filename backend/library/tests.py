@@ -1,3 +1,1456 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import analytics, benchmark, counters, previews, uploads
+from .models import Blob, Tag, Resource, Rating, Comment, ResourceStat, UploadSession
+from .comments import add_comment, rebuild_comment_counts
+from .ratings import rebuild_rating_aggregates, set_rating
+from .search import get_search_backend
+from .storage import blob_name, collect_garbage, get_resource_storage
+from core import batch, metrics, profiling
+from users.models import SavedResource
+
+User = get_user_model()
+
+
+class ResourceListQueryBudgetTests(TestCase):
+    """Every list endpoint must cost the same number of queries regardless of row count."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', is_staff=True
+        )
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', user_type='teacher'
+        )
+        self.tags = [Tag.objects.create(name=f'tag{i}') for i in range(3)]
+
+    def seed(self, count):
+        for i in range(count):
+            resource = Resource.objects.create(
+                title=f'Resource {i}',
+                description='Description',
+                file='resources/example.pdf',
+                owner=self.teacher,
+                status='approved' if i % 2 == 0 else 'pending',
+            )
+            resource.tags.set(self.tags[: i % 3 + 1])
+            set_rating(resource, self.admin, i % 5 + 1)
+            self.admin.saved_resources.add(resource)
+
+    def assert_query_budget(self, url, budget, user=None):
+        self.client.force_authenticate(user)
+        for count in (2, 8):
+            self.seed(count)
+            with self.assertNumQueries(budget):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_list(self):
+        self.assert_query_budget('/api/library/resources/', 2)
+
+    def test_list_authenticated_with_rating_order(self):
+        self.assert_query_budget('/api/library/resources/?ordering=rating', 2, user=self.admin)
+
+    def test_my(self):
+        self.assert_query_budget('/api/library/resources/my/', 2, user=self.teacher)
+
+    def test_saved(self):
+        self.assert_query_budget('/api/library/resources/saved/', 2, user=self.admin)
+
+    def test_user_resources(self):
+        self.assert_query_budget(f'/api/library/resources/user_resources/?user_id={self.teacher.id}', 2)
+
+    def test_pending(self):
+        self.assert_query_budget('/api/library/resources/pending/', 2, user=self.admin)
+
+    def test_all(self):
+        self.assert_query_budget('/api/library/resources/all/', 2, user=self.admin)
+
+    def test_user_rating_annotation(self):
+        self.seed(3)
+        for resource in Resource.objects.with_list_data(self.admin):
+            self.assertEqual(resource.user_rating_value, Rating.objects.get(resource=resource, user=self.admin).rating)
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.voters = [
+            User.objects.create_user(email=f'voter{i}@example.com', username=f'voter{i}') for i in range(3)
+        ]
+        self.resource = Resource.objects.create(
+            title='Resource', description='Description', file='resources/example.pdf', owner=self.owner
+        )
+
+    def assert_aggregates(self, total, count, histogram):
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.rating_sum, total)
+        self.assertEqual(self.resource.rating_count, count)
+        self.assertAlmostEqual(self.resource.rating_avg, total / count if count else 0.0)
+        self.assertEqual(self.resource.rating_histogram, {stars: histogram.get(stars, 0) for stars in range(1, 6)})
+
+    def test_create_update_delete(self):
+        set_rating(self.resource, self.voters[0], 5)
+        set_rating(self.resource, self.voters[1], 2)
+        self.assert_aggregates(7, 2, {5: 1, 2: 1})
+
+        rating, created = set_rating(self.resource, self.voters[1], 4)
+        self.assertFalse(created)
+        self.assert_aggregates(9, 2, {5: 1, 4: 1})
+
+        rating.delete()
+        self.assert_aggregates(5, 1, {5: 1})
+
+    def test_concurrent_first_rating_falls_back_to_an_update(self):
+        set_rating(self.resource, self.voters[0], 3)  # committed by the other request
+        missed = mock.Mock()
+        missed.filter.return_value.first.return_value = None
+        with mock.patch.object(
+            Rating.objects, 'select_for_update', side_effect=[missed, Rating.objects.select_for_update()]
+        ):
+            rating, created = set_rating(self.resource, self.voters[0], 5)
+        self.assertFalse(created)
+        self.assertEqual(rating.rating, 5)
+        self.assert_aggregates(5, 1, {5: 1})
+
+    def test_rebuild(self):
+        Rating.objects.create(resource=self.resource, user=self.voters[0], rating=3)
+        Rating.objects.create(resource=self.resource, user=self.voters[1], rating=4)
+        self.assertEqual(rebuild_rating_aggregates(), 1)
+        self.assert_aggregates(7, 2, {3: 1, 4: 1})
+        self.assertEqual(rebuild_rating_aggregates(), 0)
+
+    def test_rating_ordering(self):
+        other = Resource.objects.create(
+            title='Other', description='Description', file='resources/example.pdf', owner=self.owner,
+            status='approved',
+        )
+        Resource.objects.filter(pk=self.resource.pk).update(status='approved')
+        set_rating(self.resource, self.voters[0], 2)
+        set_rating(other, self.voters[0], 5)
+        response = self.client.get('/api/library/resources/?ordering=rating')
+        self.assertEqual([row['id'] for row in response.json()['results']], [other.pk, self.resource.pk])
+        response = self.client.get('/api/library/resources/?ordering=-rating')
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.resource.pk, other.pk])
+
+
+class CommentTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.readers = [
+            User.objects.create_user(email=f'reader{i}@example.com', username=f'reader{i}') for i in range(3)
+        ]
+        self.resource = Resource.objects.create(
+            title='Resource', description='Description', file='resources/example.pdf', owner=self.owner,
+            status='approved',
+        )
+        self.url = f'/api/library/resources/{self.resource.pk}/'
+        self.client = APIClient()
+
+    def comment_count(self):
+        self.resource.refresh_from_db()
+        return self.resource.comment_count
+
+    def test_count_follows_create_and_delete(self):
+        self.client.force_authenticate(self.readers[0])
+        first = self.client.post(f'{self.url}comments/', {'text': 'First'}).json()
+        self.client.post(f'{self.url}comments/', {'text': 'Second'})
+        self.assertEqual(self.comment_count(), 2)
+        self.client.delete(f'{self.url}delete_comment/', {'comment_id': first['id']}, format='json')
+        self.assertEqual(self.comment_count(), 1)
+        self.readers[0].delete()
+        self.assertEqual(self.comment_count(), 0)
+
+    def test_rebuild(self):
+        Comment.objects.bulk_create([Comment(resource=self.resource, user=self.owner, text='x') for _ in range(3)])
+        self.assertEqual(rebuild_comment_counts(), 1)
+        self.assertEqual(self.comment_count(), 3)
+        self.assertEqual(rebuild_comment_counts(), 0)
+
+    def test_comments_and_ratings_are_paginated_with_authors(self):
+        for i, reader in enumerate(self.readers):
+            Comment.objects.create(resource=self.resource, user=reader, text=f'Comment {i}')
+            set_rating(self.resource, reader, i + 1)
+        for kind in ('comments', 'ratings'):
+            with self.assertNumQueries(2):  # the resource, then one page joined with its authors
+                data = self.client.get(f'{self.url}{kind}/?page_size=2').json()
+            rest = self.client.get(data['next']).json()
+            self.assertIsNone(rest['next'])
+            rows = data['results'] + rest['results']
+            self.assertEqual([row['user'] for row in rows], ['reader2', 'reader1', 'reader0'])
+
+
+class BulkModerationTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', username='staff', is_staff=True)
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner')
+        Blob.objects.create(sha256='a' * 64, name='blobs/shared', size=1)
+        self.resources = [
+            Resource.objects.create(
+                title=f'Resource {i}', description='Description', file='blobs/shared', owner=self.owner,
+                status='approved' if i == 0 else 'pending',
+            )
+            for i in range(4)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def moderate(self, **body):
+        return self.client.post('/api/library/resources/moderate/', body, format='json')
+
+    def test_ids_report_an_outcome_each(self):
+        first, second = self.resources[:2]
+        response = self.moderate(action='approve', ids=[second.pk, first.pk, 999])
+        self.assertEqual(response.json(), {
+            'action': 'approve',
+            'results': [
+                {'id': second.pk, 'outcome': 'updated'},
+                {'id': first.pk, 'outcome': 'unchanged'},
+                {'id': 999, 'outcome': 'not_found'},
+            ],
+            'more': False,
+        })
+        self.assertEqual(Resource.objects.filter(status='approved').count(), 2)
+
+    @override_settings(BULK_MODERATION_MAX=2)
+    def test_filter_clears_pending_queue_in_batches(self):
+        first = self.moderate(action='approve', filter={'status': 'pending'}).json()
+        self.assertEqual((len(first['results']), first['more']), (2, True))
+        second = self.moderate(action='approve', filter={'status': 'pending'}).json()
+        self.assertEqual((len(second['results']), second['more']), (1, False))
+        self.assertFalse(Resource.objects.filter(status='pending').exists())
+
+    def test_delete_releases_blob_references_once(self):
+        doomed = self.resources[1:]
+        for resource in doomed:
+            set_rating(resource, self.staff, 4)
+            Comment.objects.create(resource=resource, user=self.staff, text='Comment')
+        response = self.moderate(action='delete', ids=[resource.pk for resource in doomed])
+        self.assertEqual({row['outcome'] for row in response.json()['results']}, {'deleted'})
+        self.assertEqual(list(Resource.objects.values_list('pk', flat=True)), [self.resources[0].pk])
+        self.assertFalse(Rating.objects.exists() or Comment.objects.exists())
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+    def test_destroy_skips_per_rating_aggregate_updates(self):
+        resource = self.resources[0]
+        for i in range(3):
+            reader = User.objects.create_user(email=f'reader{i}@example.com', username=f'reader{i}')
+            set_rating(resource, reader, 5)
+            Comment.objects.create(resource=resource, user=reader, text='Comment')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f'/api/library/resources/{resource.pk}/')
+        self.assertEqual(response.status_code, 204)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "library_resource"')]
+        self.assertEqual(updates, [])
+        self.assertFalse(Rating.objects.exists() or Comment.objects.exists())
+        self.assertEqual(Blob.objects.get().ref_count, 3)
+
+    def test_user_deletion_recomputes_surviving_resources_once(self):
+        reader = User.objects.create_user(email='reader@example.com', username='reader')
+        kept = self.resources[0]
+        set_rating(kept, self.staff, 4)
+        for resource in self.resources:
+            set_rating(resource, reader, 2)
+            add_comment(resource, reader, 'Comment')
+        with CaptureQueriesContext(connection) as queries:
+            reader.delete()
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "library_resource"')]
+        self.assertEqual(len(updates), 2)
+        kept.refresh_from_db()
+        self.assertEqual((kept.rating_count, kept.rating_sum, kept.rating_avg, kept.comment_count), (1, 4, 4.0, 0))
+        self.assertEqual(Resource.objects.filter(rating_count=0).count(), 3)
+
+    def test_owner_deletion_releases_their_resources(self):
+        set_rating(self.resources[0], self.staff, 4)
+        self.owner.delete()
+        self.assertFalse(Resource.objects.exists() or Rating.objects.exists())
+        self.assertEqual(Blob.objects.get().ref_count, 0)
+
+    def test_validation_and_permissions(self):
+        self.assertEqual(self.moderate(action='hide', ids=[1], filter={'status': 'pending'}).status_code, 400)
+        self.assertEqual(self.moderate(action='hide', filter={}).status_code, 400)
+        self.assertEqual(self.moderate(action='publish', ids=[1]).status_code, 400)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.moderate(action='hide', ids=[1]).status_code, 403)
+
+
+class ImportResourcesTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.files = tempfile.TemporaryDirectory()
+        self.addCleanup(self.files.cleanup)
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner')
+        Tag.objects.create(name='math')
+        for name, content in (('a.txt', b'same'), ('b.txt', b'same'), ('c.txt', b'other')):
+            with open(os.path.join(self.files.name, name), 'wb') as handle:
+                handle.write(content)
+        self.manifest = os.path.join(self.files.name, 'manifest.jsonl')
+        records = [
+            {'id': 'r1', 'title': 'One', 'file': 'a.txt', 'tags': ['math', 'physics']},
+            {'id': 'r2', 'title': 'Two', 'file': 'b.txt', 'tags': ['physics']},
+            {'id': 'r1', 'title': 'One again', 'file': 'a.txt'},
+            {'id': 'r3', 'title': 'Three', 'file': 'missing.txt'},
+            {'id': 'r4', 'title': 'Four', 'file': '../outside.txt'},
+            {'id': 'r5', 'title': 'Five', 'file': 'c.txt', 'owner': 'nobody@example.com'},
+            {'id': 'r6', 'title': 'Six', 'file': 'c.txt', 'status': 'pending'},
+        ]
+        with open(self.manifest, 'w') as handle:
+            handle.writelines(json.dumps(record) + '\n' for record in records)
+
+    def run_import(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command(
+            'import_resources', self.manifest, '--files', self.files.name, '--owner', 'owner@example.com',
+            '--batch-size', '3', '--no-previews', *args, stdout=out, stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_is_batched_and_idempotent(self):
+        out, err = self.run_import()
+        self.assertIn('Imported 3 resources', out)
+        self.assertEqual(err.count('\n'), 3)  # missing file, outside path, unknown owner
+        resources = {r.external_id: r for r in Resource.objects.prefetch_related('tags')}
+        self.assertEqual(sorted(resources), ['r1', 'r2', 'r6'])
+        self.assertEqual(sorted(tag.name for tag in resources['r1'].tags.all()), ['math', 'physics'])
+        self.assertEqual((resources['r6'].status, resources['r1'].original_filename), ('pending', 'a.txt'))
+        self.assertEqual(resources['r1'].file.name, resources['r2'].file.name)
+        self.assertEqual(Blob.objects.get(name=resources['r1'].file.name).ref_count, 2)
+        self.assertEqual(get_search_backend().search(Resource.objects.all(), 'Six').get().external_id, 'r6')
+        with open(f'{self.manifest}.checkpoint') as handle:
+            self.assertEqual(json.load(handle), {'position': 7})
+
+        self.assertIn('Imported 0 resources', self.run_import()[0])  # resumes at the end
+        out, _ = self.run_import('--restart')
+        self.assertIn('Imported 0 resources', out)
+        self.assertIn('4 already imported or repeated', out)
+        self.assertEqual(Resource.objects.count(), 3)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=None)
+class GenerateDatasetTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def generate(self, prefix, seed=7):
+        call_command(
+            'generate_dataset', '--users', '20', '--tags', '12', '--resources', '40', '--ratings', '150',
+            '--comments', '60', '--saves', '50', '--batch-size', '16', '--seed', str(seed), '--prefix', prefix,
+            stdout=io.StringIO(),
+        )
+        resources = Resource.objects.filter(owner__email__startswith=f'{prefix}-').order_by('pk')
+        return [
+            (r.title, r.status, r.views_count, sorted(t.name.split('-', 1)[1] for t in r.tags.all()))
+            for r in resources.prefetch_related('tags')
+        ]
+
+    def test_same_seed_gives_same_rows_and_consistent_aggregates(self):
+        first = self.generate('a')
+        self.assertEqual(len(first), 40)
+        self.assertEqual(self.generate('b'), first)
+        self.assertNotEqual(self.generate('c', seed=8), first)
+
+        self.assertEqual(rebuild_rating_aggregates(), 0)
+        self.assertEqual(rebuild_comment_counts(), 0)
+        self.assertEqual(Comment.objects.count(), 180)
+        self.assertEqual(Blob.objects.aggregate(total=Sum('ref_count'))['total'], 120)
+        self.assertTrue(Rating.objects.exists() and SavedResource.objects.exists())
+
+    def test_existing_prefix_is_refused(self):
+        self.generate('a')
+        with self.assertRaisesMessage(CommandError, 'already exists'):
+            self.generate('a')
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        counters.get_buffer().drain()
+        owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.resource = Resource.objects.create(
+            title='Resource', description='Description', file='resources/example.pdf', owner=owner,
+            status='approved',
+        )
+
+    def test_measure_records_latency_queries_and_size(self):
+        scenario = benchmark.Scenario('detail', 'get', f'/api/library/resources/{self.resource.pk}/')
+        result = benchmark.Benchmark(iterations=5, warmup=1).measure(scenario)
+        self.assertEqual(result['status'], 200)
+        self.assertGreater(result['queries'], 0)
+        self.assertGreater(result['bytes'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+        counters.get_buffer().drain()
+
+    def test_compare_applies_thresholds(self):
+        baseline = {'s': {'list': {'p50_ms': 10.0, 'p95_ms': 20.0, 'queries': 2, 'bytes': 1000}}}
+        within = {'s': {'list': {'p50_ms': 12.0, 'p95_ms': 24.0, 'queries': 2, 'bytes': 1050}}}
+        self.assertEqual(benchmark.compare(within, baseline), [])
+        worse = {'s': {'list': {'p50_ms': 14.0, 'p95_ms': 20.0, 'queries': 3, 'bytes': 1000}, 'new': {}}}
+        self.assertEqual(benchmark.compare(worse, baseline), [
+            ('s', 'list', 'p50_ms', 10.0, 14.0), ('s', 'list', 'queries', 2, 3),
+        ])
+        self.assertEqual(benchmark.compare(worse, baseline, latency=0.5, queries=1), [])
+
+
+class BufferedCounterTests(TestCase):
+    def setUp(self):
+        counters.get_buffer().drain()
+        owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.resource = Resource.objects.create(
+            title='Resource', description='Description', file='resources/example.pdf', owner=owner,
+            status='approved',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def test_views_and_downloads_are_buffered(self):
+        updated_at = self.resource.updated_at
+        self.client.get(f'/api/library/resources/{self.resource.pk}/')
+        self.client.get(f'/api/library/resources/{self.resource.pk}/')
+        self.client.post(f'/api/library/resources/{self.resource.pk}/download/')
+        self.resource.refresh_from_db()
+        self.assertEqual((self.resource.views_count, self.resource.downloads_count), (0, 0))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(counters.flush(), 2)
+        resource_updates = [q for q in queries if q['sql'].startswith('UPDATE "library_resource" ')]
+        self.assertEqual(len(resource_updates), 2)  # one per (field, amount)
+        self.resource.refresh_from_db()
+        self.assertEqual((self.resource.views_count, self.resource.downloads_count), (2, 1))
+        self.assertEqual(self.resource.updated_at, updated_at)
+
+    def test_owner_opens_own_unpublished_resource(self):
+        Resource.objects.filter(pk=self.resource.pk).update(status='pending')
+        url = f'/api/library/resources/{self.resource.pk}/'
+        response = self.client.get(url)
+        self.assertEqual((response.status_code, response.json()['status']), (200, 'pending'))
+        self.assertEqual(counters.flush(), 1)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_cache_buffer(self):
+        buffer = counters.CacheBuffer('default')
+        buffer.drain()
+        buffer.add('views_count', self.resource.pk, 2)
+        buffer.add('views_count', self.resource.pk, 3)
+        buffer.add('downloads_count', self.resource.pk, 1)
+        self.assertEqual(
+            buffer.drain(), {('views_count', self.resource.pk): 5, ('downloads_count', self.resource.pk): 1}
+        )
+        self.assertEqual(buffer.drain(), {})
+        buffer.add('views_count', self.resource.pk, 1)
+        self.assertEqual(buffer.drain(), {('views_count', self.resource.pk): 1})
+
+    def hold_journal_entry(self, buffer):
+        """Make the next ``buffer.add`` take a journal position without writing it yet."""
+        held, set_entry = [], buffer.cache.set
+
+        def set_later(key, value, *args, **kwargs):
+            if key.startswith(f'{buffer.prefix}:journal:') and not held:
+                held.append(lambda: set_entry(key, value, *args, **kwargs))
+                return
+            set_entry(key, value, *args, **kwargs)
+
+        return held, mock.patch.object(buffer.cache, 'set', set_later)
+
+    def test_cache_buffer_waits_for_a_journal_entry_being_written(self):
+        buffer = counters.CacheBuffer('default')
+        buffer.drain()
+        held, holding = self.hold_journal_entry(buffer)
+        with holding:
+            buffer.add('views_count', self.resource.pk, 2)
+        buffer.add('downloads_count', self.resource.pk, 1)
+        self.assertEqual(buffer.drain(), {})
+        held[0]()
+        buffer.add('views_count', self.resource.pk, 1)  # still dirty, so not journaled again
+        self.assertEqual(
+            buffer.drain(), {('views_count', self.resource.pk): 3, ('downloads_count', self.resource.pk): 1}
+        )
+
+    def test_cache_buffer_skips_the_entry_of_a_dead_writer(self):
+        buffer = counters.CacheBuffer('default')
+        buffer.drain()
+        other = Resource.objects.create(
+            title='Other', description='D', file='resources/a.pdf', owner=self.resource.owner, status='approved',
+        )
+        _, holding = self.hold_journal_entry(buffer)
+        with holding:
+            buffer.add('views_count', other.pk, 2)
+        buffer.add('views_count', self.resource.pk, 1)
+        self.assertEqual(buffer.drain(), {})
+        with mock.patch.object(counters.time, 'time', return_value=time.time() + buffer.lock_timeout):
+            self.assertEqual(buffer.drain(), {('views_count', self.resource.pk): 1})
+
+    @override_settings(COUNTER_FLUSH_INTERVAL=0)
+    def test_write_through_takes_no_row_lock(self):
+        with CaptureQueriesContext(connection) as queries:
+            counters.increment(self.resource.pk, 'views_count')
+        resource_reads = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "library_resource"' in q['sql']]
+        self.assertEqual(resource_reads, [])  # no locking read ahead of the update
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.views_count, 1)
+        self.assertEqual(ResourceStat.objects.get(resource=self.resource, metric='views').value, 1)
+
+    def test_cache_buffer_has_one_drainer_at_a_time(self):
+        buffer = counters.CacheBuffer('default')
+        buffer.drain()
+        buffer.add('views_count', self.resource.pk, 2)
+        cache.add(f'{buffer.prefix}:lock', 'another drainer', timeout=buffer.lock_timeout)
+        self.assertEqual(buffer.drain(), {})
+        cache.delete(f'{buffer.prefix}:lock')
+        self.assertEqual(buffer.drain(), {('views_count', self.resource.pk): 2})
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=None)
+class CounterFlushCommitTests(TransactionTestCase):
+    def setUp(self):
+        counters.get_buffer().drain()
+        self.addCleanup(counters.get_buffer().drain)
+        owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.gone, self.kept = (
+            Resource.objects.create(title=title, description='D', file='resources/a.pdf', owner=owner)
+            for title in ('Gone', 'Kept')
+        )
+
+    def test_deltas_of_deleted_resources_are_dropped(self):
+        counters.increment(self.gone.pk, 'views_count')
+        counters.increment(self.kept.pk, 'views_count', 2)
+        self.gone.delete()
+
+        self.assertEqual(counters.flush(), 1)
+        self.kept.refresh_from_db()
+        self.assertEqual(self.kept.views_count, 2)
+        self.assertEqual(list(ResourceStat.objects.values_list('resource_id', 'value')), [(self.kept.pk, 2)])
+        self.assertEqual(counters.get_buffer().drain(), {})
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=None)
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        counters.get_buffer().drain()
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', is_staff=True)
+        self.resource = Resource.objects.create(
+            title='Resource', description='Description', file='resources/example.pdf', owner=self.owner,
+            status='approved',
+        )
+        self.client = APIClient()
+
+    def test_activity_is_rolled_up(self):
+        self.client.force_authenticate(self.admin)
+        self.client.get(f'/api/library/resources/{self.resource.pk}/')
+        self.client.post(f'/api/library/resources/{self.resource.pk}/download/')
+        self.client.post(f'/api/library/resources/{self.resource.pk}/ratings/', {'rating': 4})
+        self.client.post(f'/api/library/resources/{self.resource.pk}/save/')
+        counters.flush()
+
+        today = timezone.localdate()
+        values = dict(ResourceStat.objects.filter(period='day', date=today).values_list('metric', 'value'))
+        self.assertEqual(values, {'views': 1, 'downloads': 1, 'ratings': 1, 'saves': 1})
+
+        response = self.client.get('/api/library/resources/analytics/', {'metrics': 'views'})
+        self.assertEqual(response.json()['series']['views'], [{'date': str(today), 'period': 'day', 'value': 1}])
+
+    def test_permissions(self):
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(f'/api/library/resources/{self.resource.pk}/analytics/').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/library/resources/analytics/?author={self.owner.pk}').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/library/resources/analytics/?author={self.admin.pk}').status_code, 403)
+        self.assertEqual(self.client.get('/api/library/resources/analytics/').status_code, 403)
+
+    def test_invalid_ids(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get('/api/library/resources/analytics/?author=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/library/resources/abc/analytics/').status_code, 404)
+
+    def test_compact(self):
+        today = timezone.localdate()
+        for offset in range(200):
+            analytics.record(self.resource.pk, 'views', 1, today - timedelta(days=offset))
+        analytics.compact(keep_days=30, keep_weeks=12)
+        self.assertEqual(ResourceStat.objects.aggregate(total=Sum('value'))['total'], 200)
+        self.assertFalse(ResourceStat.objects.filter(period='day', date__lt=today - timedelta(days=30)).exists())
+        self.assertTrue(ResourceStat.objects.filter(period='week').exists())
+        self.assertTrue(ResourceStat.objects.filter(period='month').exists())
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', username='marko')
+        self.in_description = self.create('Lecture notes', 'Covers thermodynamics basics')
+        self.in_title = self.create('Thermodynamics', 'Lecture notes')
+        self.unrelated = self.create('Poetry', 'Sonnets')
+
+    def create(self, title, description):
+        return Resource.objects.create(
+            title=title, description=description, file='resources/example.pdf', owner=self.owner,
+            status='approved',
+        )
+
+    def search(self, term):
+        response = self.client.get('/api/library/resources/', {'search': term})
+        return [row['id'] for row in response.json()['results']]
+
+    def test_ranked_prefix_search(self):
+        self.assertEqual(self.search('thermo'), [self.in_title.pk, self.in_description.pk])
+
+    def test_author_and_multiple_terms(self):
+        self.assertEqual(len(self.search('marko')), 3)
+        self.assertEqual(self.search('sonnets marko'), [self.unrelated.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.unrelated.title = 'Thermal poetry'
+        self.unrelated.save()
+        self.assertIn(self.unrelated.pk, self.search('thermal'))
+        self.in_title.delete()
+        self.assertEqual(self.search('thermo'), [self.in_description.pk])
+
+    def test_match_runs_once_and_pages_follow_rank(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get('/api/library/resources/', {'search': 'thermo', 'page_size': 1}).json()
+        self.assertEqual([q['sql'].count('MATCH') for q in queries if 'MATCH' in q['sql']], [1])
+        second = self.client.get(first['next']).json()
+        self.assertEqual(
+            [first['results'][0]['id'], second['results'][0]['id']], [self.in_title.pk, self.in_description.pk]
+        )
+        self.assertIsNone(second['next'])
+
+    def test_username_change_reindexes_the_authors_resources(self):
+        self.owner.username = 'renamed'
+        self.owner.save()
+        self.assertEqual(self.search('marko'), [])
+        self.assertEqual(len(self.search('renamed')), 3)
+
+    def test_rebuild(self):
+        backend = get_search_backend()
+        backend.clear()
+        self.assertEqual(self.search('thermo'), [])
+        self.assertEqual(backend.rebuild(batch_size=2), 3)
+        self.assertEqual(len(self.search('thermo')), 2)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        for i in range(7):
+            Resource.objects.create(
+                title=f'Resource {i}', description='Description', file='resources/example.pdf',
+                owner=self.admin, status='approved', views_count=i % 2,
+            )
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(row['id'] for row in data['results'])
+            url, pages = data['next'], pages + 1
+        return ids, pages
+
+    def test_pages_cover_every_row_once_despite_ties(self):
+        ids, pages = self.walk('/api/library/resources/?ordering=-views_count&page_size=2')
+        self.assertEqual(pages, 4)
+        expected = list(Resource.objects.order_by('-views_count', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_rating_ordering_and_admin_lists(self):
+        ids, _ = self.walk('/api/library/resources/?ordering=rating&page_size=3')
+        self.assertEqual(sorted(ids), sorted(Resource.objects.values_list('id', flat=True)))
+        ids, _ = self.walk('/api/library/resources/all/?page_size=3')
+        self.assertEqual(len(ids), 7)
+
+    def test_count_is_staff_only(self):
+        self.assertEqual(self.client.get('/api/library/resources/?count=approx').json()['count'], 7)
+        self.client.force_authenticate(None)
+        self.assertNotIn('count', self.client.get('/api/library/resources/?count=exact').json())
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/library/resources/?cursor=garbage').status_code, 404)
+
+    def test_next_link_keeps_https_behind_the_proxy(self):
+        data = self.client.get('/api/library/resources/?page_size=2', HTTP_X_FORWARDED_PROTO='https').json()
+        self.assertTrue(data['next'].startswith('https://'))
+
+
+class StatsSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        Resource.objects.create(
+            title='Resource', description='Description', file='resources/example.pdf', owner=self.admin,
+            status='approved', views_count=3,
+        )
+
+    def test_snapshot_is_reused_until_fresh_requested(self):
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/library/resources/stats/').json()
+        self.assertEqual((data['total_resources'], data['approved'], data['total_views']), (1, 1, 3))
+
+        Resource.objects.create(title='Other', description='', file='resources/example.pdf', owner=self.admin)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/library/resources/stats/').json()['total_resources'], 1)
+        data = self.client.get('/api/library/resources/stats/?fresh=1').json()
+        self.assertEqual((data['total_resources'], data['pending']), (2, 1))
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=None)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        counters.get_buffer().drain()
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.resource = Resource.objects.create(
+            title='Resource', description='Description', file='resources/example.pdf', owner=self.owner,
+            status='approved',
+        )
+        self.client = APIClient()
+
+    def assert_not_modified(self, url):
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def test_list_and_tags(self):
+        etag = self.assert_not_modified('/api/library/resources/')
+        tag_etag = self.assert_not_modified('/api/library/tags/')
+        tag = Tag.objects.create(name='new')
+        self.assertNotEqual(self.client.get('/api/library/tags/')['ETag'], tag_etag)
+        self.resource.tags.add(tag)
+        self.assertEqual(self.client.get('/api/library/resources/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_rating_and_comments(self):
+        url = f'/api/library/resources/{self.resource.pk}/'
+        etag = self.assert_not_modified(url)
+        comments_etag = self.assert_not_modified(f'{url}comments/')
+        self.assertEqual(counters.flush(), 1)  # the 304 still counted as a view
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)  # counts are not stamped
+
+        set_rating(self.resource, self.owner, 3)
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+        Comment.objects.create(resource=self.resource, user=self.owner, text='Hi')
+        self.assertNotEqual(self.client.get(f'{url}comments/')['ETag'], comments_etag)
+
+    def test_detail_follows_the_author_name(self):
+        url = f'/api/library/resources/{self.resource.pk}/'
+        etag = self.assert_not_modified(url)
+        self.owner.username = 'renamed'
+        self.owner.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()['owner']), (200, 'renamed'))
+
+    def test_etag_is_per_user(self):
+        anonymous = self.client.get('/api/library/resources/')['ETag']
+        self.client.force_authenticate(self.owner)
+        self.assertNotEqual(self.client.get('/api/library/resources/')['ETag'], anonymous)
+
+    def test_saved_list_follows_saves(self):
+        self.client.force_authenticate(self.owner)
+        etag = self.assert_not_modified('/api/library/resources/saved/')
+        self.owner.saved_resources.add(self.resource)
+        self.assertNotEqual(self.client.get('/api/library/resources/saved/')['ETag'], etag)
+
+
+class DownloadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        os.makedirs(os.path.join(self.media.name, 'resources'))
+        with open(os.path.join(self.media.name, 'resources', 'notes.pdf'), 'wb') as handle:
+            handle.write(bytes(range(100)))
+        owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.resource = Resource.objects.create(
+            title='Resource', description='Description', file='resources/notes.pdf', owner=owner,
+            status='approved',
+        )
+        self.url = f'/api/library/resources/{self.resource.pk}/download/'
+
+    def test_full_download_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(100)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('notes.pdf', response['Content-Disposition'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+    def test_single_and_suffix_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(95, 100)))
+
+    def test_multiple_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1,50-51')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges'))
+        body = b''.join(response.streaming_content)
+        self.assertIn(b'Content-Range: bytes 0-1/100\r\n\r\n\x00\x01', body)
+        self.assertIn(b'Content-Range: bytes 50-51/100\r\n\r\n23', body)
+
+    def test_unsatisfiable_and_stale_if_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=200-300')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DOWNLOAD_OFFLOAD='x-accel-redirect', DOWNLOAD_ACCEL_PREFIX='/protected/')
+    def test_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/resources/notes.pdf')
+        self.assertEqual(response.content, b'')
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name, UPLOAD_CHUNK_MAX_SIZE=4)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(email='teacher@example.com', username='teacher')
+        self.tag = Tag.objects.create(name='Physics')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.content = b'0123456789'
+
+    def put(self, session_id, offset, data):
+        return self.client.put(
+            f'/api/library/uploads/{session_id}/chunk/', data, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {offset}-{offset + len(data) - 1}/{len(self.content)}',
+        )
+
+    def test_upload_resume_and_complete(self):
+        session = self.client.post('/api/library/uploads/', {'filename': 'notes.pdf', 'size': 10}).json()
+        self.assertEqual(self.put(session['id'], 0, b'0123').json()['received'], 4)
+
+        conflict = self.put(session['id'], 8, b'89')
+        self.assertEqual((conflict.status_code, conflict.json()['received']), (409, 4))
+        self.assertEqual(self.put(session['id'], 4, b'45678').status_code, 409)  # over the chunk limit
+
+        uploads._hashers.clear()  # as if the next chunk landed on another worker
+        self.put(session['id'], 4, b'4567')
+        self.assertEqual(self.client.get(f'/api/library/uploads/{session["id"]}/').json()['received'], 8)
+        done = self.put(session['id'], 8, b'89').json()
+        self.assertEqual(done['sha256'], hashlib.sha256(self.content).hexdigest())
+
+        bad = self.client.post(f'/api/library/uploads/{session["id"]}/complete/', {
+            'title': 'Notes', 'description': 'Lecture notes', 'tags': [self.tag.pk], 'sha256': '0' * 64,
+        })
+        self.assertEqual(bad.status_code, 400)
+        response = self.client.post(f'/api/library/uploads/{session["id"]}/complete/', {
+            'title': 'Notes', 'description': 'Lecture notes', 'tags': [self.tag.pk], 'sha256': done['sha256'],
+        })
+        self.assertEqual(response.status_code, 201)
+        resource = Resource.objects.get(pk=response.json()['id'])
+        self.assertEqual((resource.owner, resource.status), (self.user, 'pending'))
+        with resource.file.open('rb') as handle:
+            self.assertEqual(handle.read(), self.content)
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, 'uploads', f'{session["id"]}.part')))
+
+    def test_incomplete_upload_cannot_complete_and_expires(self):
+        session = self.client.post('/api/library/uploads/', {'filename': 'notes.pdf', 'size': 10}).json()
+        self.put(session['id'], 0, b'0123')
+        response = self.client.post(f'/api/library/uploads/{session["id"]}/complete/', {
+            'title': 'Notes', 'description': 'Lecture notes', 'tags': [self.tag.pk],
+        })
+        self.assertEqual(response.status_code, 409)
+
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        call_command('cleanup_uploads', stdout=io.StringIO())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, 'uploads', f'{session["id"]}.part')))
+
+
+class BlobStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner')
+
+    def create(self, filename, content):
+        return Resource.objects.create(
+            title=filename, description='Description', file=ContentFile(content, name=filename), owner=self.owner,
+        )
+
+    def test_identical_files_share_one_blob(self):
+        first = self.create('notes.pdf', b'same bytes')
+        second = self.create('copy.pdf', b'same bytes')
+        name = blob_name(hashlib.sha256(b'same bytes').hexdigest())
+        self.assertEqual((first.file.name, second.file.name), (name, name))
+        self.assertEqual((first.original_filename, second.download_filename), ('notes.pdf', 'copy.pdf'))
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+        response = self.client.get(f'/api/library/resources/{second.pk}/download/')
+        self.assertIn('copy.pdf', response['Content-Disposition'])
+        self.assertEqual(b''.join(response.streaming_content), b'same bytes')
+
+    def test_unreferenced_blobs_are_collected_after_grace_period(self):
+        kept = self.create('notes.pdf', b'kept')
+        replaced = self.create('draft.pdf', b'old')
+        old_name = replaced.file.name
+        replaced.file = ContentFile(b'new', name='final.pdf')
+        replaced.save()
+        Resource.objects.get(pk=kept.pk).delete()
+        self.assertEqual(
+            dict(Blob.objects.values_list('name', 'ref_count')),
+            {kept.file.name: 0, old_name: 0, replaced.file.name: 1},
+        )
+
+        self.assertEqual(collect_garbage(), 0)  # still inside the grace period
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(collect_garbage(), 2)
+        self.assertEqual(list(Blob.objects.values_list('name', flat=True)), [replaced.file.name])
+        # The files outlive the deleted rows until the transaction commits.
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, old_name)))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, old_name)))
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, replaced.file.name)))
+
+    def test_adopting_an_unreferenced_blob_keeps_it_from_collection(self):
+        name = self.create('draft.pdf', b'content').file.name
+        Resource.objects.all().delete()
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        self.create('again.pdf', b'content')
+        Blob.objects.update(ref_count=0)  # not referenced yet when the collector runs
+        self.assertEqual(collect_garbage(), 0)
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, name)))
+
+    def test_concurrent_first_uploads_share_the_blob(self):
+        storage = get_resource_storage()
+        place = storage._place
+
+        def place_after_another_upload(path, sha256):
+            name = place(path, sha256)
+            Blob.objects.create(sha256=sha256, name=name, size=7)
+            return name
+
+        with mock.patch.object(storage, '_place', side_effect=place_after_another_upload):
+            resource = self.create('notes.pdf', b'content')
+        self.assertEqual(Blob.objects.get().name, resource.file.name)
+
+    def test_migrate_legacy_files(self):
+        os.makedirs(os.path.join(self.media.name, 'resources'))
+        with open(os.path.join(self.media.name, 'resources', 'notes.pdf'), 'wb') as handle:
+            handle.write(b'legacy')
+        resources = [
+            Resource.objects.create(title=str(i), description='D', file='resources/notes.pdf', owner=self.owner)
+            for i in range(2)
+        ]
+        Blob.objects.all().delete()
+
+        call_command('migrate_to_blobs', stdout=io.StringIO())
+        name = blob_name(hashlib.sha256(b'legacy').hexdigest())
+        for resource in resources:
+            resource.refresh_from_db()
+            self.assertEqual((resource.file.name, resource.download_filename), (name, 'notes.pdf'))
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, 'resources', 'notes.pdf')))
+
+
+@override_settings(TASKS_EAGER=True, PREVIEW_THUMBNAIL_SIZE=32, PREVIEW_SIZE=64)
+class PreviewTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner')
+
+    def create(self, filename, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            resource = Resource.objects.create(
+                title=filename, description='Description', file=ContentFile(content, name=filename),
+                owner=self.owner, status='approved',
+            )
+        resource.refresh_from_db()
+        return resource
+
+    def image(self, size=(200, 100)):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_image_previews_are_generated_after_commit(self):
+        from PIL import Image
+
+        resource = self.create('photo.png', self.image())
+        self.assertEqual(resource.preview_status, 'ready')
+        with Image.open(resource.thumbnail.path) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('PNG', (32, 16)))
+        with Image.open(resource.preview.path) as preview:
+            self.assertEqual((preview.format, preview.size), ('JPEG', (64, 32)))
+
+        data = self.client.get('/api/library/resources/').json()['results'][0]
+        self.assertTrue(data['thumbnail'].endswith(resource.thumbnail.name))
+        self.assertEqual(data['preview_status'], 'ready')
+
+    def test_shared_file_is_rendered_once_and_collected_with_its_blob(self):
+        first = self.create('a.png', self.image())
+        with mock.patch.object(previews, 'render_first_page') as render:
+            second = self.create('b.png', self.image())
+        render.assert_not_called()
+        self.assertEqual(second.thumbnail.name, first.thumbnail.name)
+
+        Resource.objects.all().delete()
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            collect_garbage()
+        self.assertFalse(os.path.exists(first.thumbnail.path))
+
+    @skipUnless(shutil.which('pdftoppm'), 'poppler-utils is not installed')
+    def test_pdf_previews_are_rendered_with_pdftoppm(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.open(io.BytesIO(self.image())).save(buffer, 'PDF')
+        resource = self.create('notes.pdf', buffer.getvalue())
+        self.assertEqual(resource.preview_status, 'ready')
+        with Image.open(resource.thumbnail.path) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('PNG', (32, 16)))
+
+    def test_unsupported_files_and_replacement(self):
+        resource = self.create('notes.txt', b'plain text')
+        self.assertEqual((resource.preview_status, resource.thumbnail.name), ('unsupported', ''))
+
+        resource.file = ContentFile(self.image(), name='scan.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            resource.save()
+        resource.refresh_from_db()
+        self.assertEqual(resource.preview_status, 'ready')
+
+    def test_backfill_command(self):
+        resource = self.create('photo.png', self.image())
+        Resource.objects.update(preview_status='pending', thumbnail='', preview='')
+        call_command('generate_previews', stdout=io.StringIO())
+        resource.refresh_from_db()
+        self.assertEqual(resource.preview_status, 'ready')
+
+
+class SavedResourceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='student@example.com', username='student')
+        owner = User.objects.create_user(email='owner@example.com', username='owner')
+        self.resources = [
+            Resource.objects.create(
+                title=f'Resource {i}', description='D', file='resources/a.pdf', owner=owner, status='approved',
+            )
+            for i in range(4)
+        ]
+        self.hidden = Resource.objects.create(
+            title='Hidden', description='D', file='resources/a.pdf', owner=owner, status='approved', is_hidden=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ids(self):
+        return self.client.get('/api/library/resources/saved/ids/').json()['ids']
+
+    def test_toggle_is_constant_time(self):
+        first = self.resources[0]
+        for resource in self.resources[1:]:
+            self.user.saved_resources.add(resource)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/api/library/resources/{first.pk}/save/')
+        self.assertEqual(response.json()['status'], 'resource added to saved')
+        self.assertFalse(any('"library_resource"' in q['sql'] and 'saved' in q['sql'] for q in queries.captured_queries))
+        response = self.client.post(f'/api/library/resources/{first.pk}/save/')
+        self.assertEqual(response.json()['status'], 'resource removed from saved')
+        self.assertNotIn(first.pk, self.ids())
+        self.assertEqual(ResourceStat.objects.get(resource=first, metric='saves').value, 1)
+
+    def test_bulk_save_unsave_and_order(self):
+        ids = [resource.pk for resource in self.resources]
+        response = self.client.post(
+            '/api/library/resources/saved/add/', {'ids': [ids[0], ids[1], self.hidden.pk]}, format='json'
+        )
+        self.assertEqual(response.json()['added'], [ids[0], ids[1]])
+        SavedResource.objects.filter(resource_id=ids[0]).update(saved_at=timezone.now() - timedelta(days=1))
+        self.client.post('/api/library/resources/saved/add/', {'ids': ids}, format='json')
+        SavedResource.objects.filter(resource_id__in=ids[2:]).update(saved_at=timezone.now() + timedelta(days=1))
+        self.assertEqual(self.ids()[-2:], [ids[1], ids[0]])
+
+        page = self.client.get('/api/library/resources/saved/?page_size=3').json()
+        rest = self.client.get(page['next']).json()
+        self.assertEqual(
+            [r['id'] for r in page['results'] + rest['results']], self.ids()
+        )
+
+        response = self.client.post('/api/library/resources/saved/remove/', {'ids': ids[:3]}, format='json')
+        self.assertEqual(response.json()['removed'], 3)
+        self.assertEqual(self.ids(), [ids[3]])
+        self.assertEqual(
+            self.client.post('/api/library/resources/saved/add/', {'ids': []}, format='json').status_code, 400
+        )
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', username='staff', is_staff=True)
+        self.resource = Resource.objects.create(
+            title='Notes', description='D', file='resources/a.pdf', owner=self.staff, status='approved',
+        )
+        self.client = APIClient()
+        metrics.clear()
+        self.addCleanup(counters.get_buffer().drain)
+
+    def test_server_timing_and_histograms_per_action(self):
+        response = self.client.get('/api/library/resources/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+, ')
+        self.client.get(f'/api/library/resources/{self.resource.pk}/comments/')
+        self.client.get(f'/api/library/resources/{self.resource.pk}/comments/')
+
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.client.force_authenticate(self.staff)
+        text = self.client.get('/metrics').content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="ResourceViewSet.list"} 1', text)
+        self.assertIn('http_request_duration_seconds_count{view="ResourceViewSet.comments"} 2', text)
+        self.assertIn('http_responses_total{view="ResourceViewSet.comments",status="200"} 2', text)
+        self.assertIn('http_request_db_queries_bucket{view="ResourceViewSet.comments",le="+Inf"} 2', text)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_scrape_token(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_requests_are_logged_with_their_statements(self):
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(f'/api/library/resources/{self.resource.pk}/comments/')
+        self.assertIn('(ResourceViewSet.comments) 200', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(PROFILE_ROOT=self.root.name, PROFILE_MAX_COUNT=2)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.staff = User.objects.create_user(email='staff@example.com', username='staff', is_staff=True)
+        self.member = User.objects.create_user(email='member@example.com', username='member')
+        Resource.objects.create(
+            title='Notes', description='D', file='resources/a.pdf', owner=self.staff, status='approved',
+        )
+        self.client = APIClient()
+
+    def bearer(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_staff_request_is_profiled_and_listed(self):
+        response = self.client.get('/api/library/resources/?search=notes', HTTP_X_PROFILE='1', **self.bearer(self.staff))
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+
+        self.client.force_authenticate(self.staff)
+        listed = self.client.get('/api/profiles/').json()['results']
+        self.assertEqual([entry['id'] for entry in listed], [profile_id])
+        self.assertEqual(listed[0]['path'], '/api/library/resources/?search=notes')
+        document = self.client.get(f'/api/profiles/{profile_id}/').json()
+        self.assertEqual(document['queries'], len(document['sql']))
+        self.assertTrue(any('library_resource' in statement['sql'] for statement in document['sql']))
+        self.assertIn('cumulative', document['functions'])
+        download = self.client.get(f'/api/profiles/{profile_id}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertGreater(len(b''.join(download.streaming_content)), 0)
+
+    def test_other_requests_are_not_profiled(self):
+        for headers in ({}, {'HTTP_X_PROFILE': '1'}, {'HTTP_X_PROFILE': '1', **self.bearer(self.member)}):
+            self.assertNotIn('X-Profile-Id', self.client.get('/api/library/resources/', **headers))
+        self.assertEqual(os.listdir(self.root.name), [])
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get('/api/profiles/').status_code, 403)
+
+    def test_query_parameter_and_retention(self):
+        ids = [
+            self.client.get('/api/library/resources/?_profile=1', **self.bearer(self.staff))['X-Profile-Id']
+            for _ in range(3)
+        ]
+        self.assertEqual(profiling.stored_ids(), sorted(ids, reverse=True)[:2])
+        self.assertEqual(len(os.listdir(self.root.name)), 4)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get('/api/profiles/..%2Fsettings/').status_code, 404)
+
+
+class BatchRequestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='staff@example.com', username='staff', is_staff=True)
+        self.resource = Resource.objects.create(
+            title='Notes', description='D', file='resources/a.pdf', owner=self.user, status='approved',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.addCleanup(counters.get_buffer().drain)
+
+    def batch(self, *urls, **extra):
+        requests = [{'url': url} if isinstance(url, str) else url for url in urls]
+        return self.client.post('/api/batch/', {'requests': requests, **extra}, format='json')
+
+    def test_reads_are_dispatched_with_the_batch_user(self):
+        response = self.batch(
+            f'/api/library/resources/{self.resource.pk}/',
+            '/api/library/resources/saved/ids/',
+            '/api/users/users/me/',
+            '/api/library/resources/?page_size=1',
+            '/api/nowhere/',
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['responses']
+        self.assertEqual([r['status'] for r in results], [200, 200, 200, 200, 404])
+        self.assertEqual(results[0]['body']['title'], 'Notes')
+        self.assertEqual(results[1]['body'], {'ids': []})
+        self.assertEqual(results[2]['body']['email'], 'staff@example.com')
+        self.assertEqual(results[3]['body']['results'][0]['id'], self.resource.pk)
+
+        etag = results[3]['headers']['ETag']
+        again = self.batch({'url': '/api/library/resources/?page_size=1', 'headers': {'If-None-Match': etag}})
+        self.assertEqual(again.json()['responses'][0]['status'], 304)
+
+    def test_streamed_responses_are_closed(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        os.makedirs(os.path.join(media.name, 'resources'))
+        with open(os.path.join(media.name, 'resources', 'a.pdf'), 'wb') as handle:
+            handle.write(b'pdf')
+        with override_settings(MEDIA_ROOT=media.name), \
+                mock.patch('core.batch._release', side_effect=batch._release) as release:
+            results = self.batch(f'/api/library/resources/{self.resource.pk}/download/').json()['responses']
+        self.assertEqual(results[0]['status'], 200)
+        response = release.call_args.args[0]
+        self.assertTrue(response.closed and response.file_to_stream.closed)
+
+    def test_sub_requests_keep_the_database_connection(self):
+        # close_old_connections runs on request_finished; sub-requests must not send it.
+        with mock.patch.object(connection, 'close_if_unusable_or_obsolete') as close_if_obsolete:
+            results = self.batch(f'/api/library/resources/{self.resource.pk}/', '/api/library/tags/').json()
+        self.assertEqual([r['status'] for r in results['responses']], [200, 200])
+        close_if_obsolete.assert_not_called()
+
+    def test_anonymous_batches_see_anonymous_results(self):
+        self.client.force_authenticate(None)
+        results = self.batch('/api/users/users/me/', '/api/library/resources/').json()['responses']
+        self.assertEqual([r['status'] for r in results], [401, 200])
+
+    def test_only_reads_of_api_paths(self):
+        self.assertEqual(self.batch({'url': '/api/library/resources/', 'method': 'POST'}).status_code, 400)
+        self.assertEqual(self.batch('/admin/').status_code, 400)
+        self.assertEqual(self.batch('/api/batch/').status_code, 400)
+        with override_settings(BATCH_MAX_REQUESTS=2):
+            self.assertEqual(self.batch(*['/api/library/tags/'] * 3).status_code, 400)
+
+
+class ParallelBatchTests(TransactionTestCase):
+    def test_parallel_results_keep_request_order(self):
+        user = User.objects.create_user(email='staff@example.com', username='staff')
+        tags = [Tag.objects.create(name=f'tag{i}') for i in range(4)]
+        client = APIClient()
+        client.force_authenticate(user)
+        requests = [{'url': f'/api/library/tags/{tag.pk}/'} for tag in tags]
+        response = client.post('/api/batch/', {'requests': requests, 'parallel': True}, format='json')
+        self.assertEqual([r['body']['name'] for r in response.json()['responses']], [t.name for t in tags])
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='student@example.com', username='student')
+        tag = Tag.objects.create(name='Maths')
+        for i in range(3):
+            resource = Resource.objects.create(
+                title=f'Resource {i}', description='Long description', file='resources/a.pdf', owner=self.user,
+                status='approved',
+            )
+            resource.tags.add(tag)
+        self.tag = tag
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/library/resources/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results'], [q['sql'] for q in queries.captured_queries]
+
+    def test_fields_prune_output_and_queries(self):
+        results, queries = self.get('fields=title,average_rating')
+        self.assertEqual(set(results[0]), {'id', 'title', 'average_rating'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"users_user"', queries[0])
+        self.assertNotIn('"library_rating"', queries[0])
+        self.assertNotIn('"description"', queries[0])
+
+    def test_omit_and_expand(self):
+        results, queries = self.get('omit=description,user_rating,owner')
+        self.assertNotIn('description', results[0])
+        self.assertEqual(results[0]['tags'], [{'id': self.tag.pk, 'name': 'Maths'}])
+        self.assertEqual(results[0]['owner_id'], self.user.pk)
+        self.assertNotIn('"users_user"', queries[0])
+
+        results, _ = self.get('fields=tags&expand=')
+        self.assertEqual(results[0]['tags'], [self.tag.pk])
+
+    def test_writes_use_the_full_serializer(self):
+        resource = Resource.objects.first()
+        response = self.client.patch(
+            f'/api/library/resources/{resource.pk}/?fields=title', {'title': 'Renamed'}, format='json'
+        )
+        self.assertEqual(response.json()['description'], 'Long description')
+
+
+def explain(sql):
+    """Return ``(scans, sorts)``: tables read without an index, and whether a sort step is planned."""
+    scans, sorts = set(), False
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # With sequential scans priced out, a Seq Scan in the plan means no usable index.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+            nodes = [plan[0]['Plan']]
+            while nodes:
+                node = nodes.pop()
+                if node['Node Type'] == 'Seq Scan':
+                    scans.add(node['Relation Name'])
+                sorts = sorts or node['Node Type'] == 'Sort'
+                nodes.extend(node.get('Plans', []))
+        else:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            for row in cursor.fetchall():
+                detail = row[-1]
+                if detail.startswith('SCAN ') and ' USING ' not in detail:
+                    scans.add(detail.split()[1])
+                sorts = sorts or detail.startswith('USE TEMP B-TREE FOR')
+    return scans, sorts
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN every query behind the hot endpoints and fail when one stops using an index."""
+
+    HOT_TABLES = {
+        'library_resource', 'library_comment', 'library_rating', 'library_resource_tags', 'library_tag',
+        'users_user', 'users_user_saved_resources',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owners = [User.objects.create_user(email=f'owner{i}@example.com', username=f'owner{i}') for i in range(5)]
+        cls.staff = User.objects.create_user(email='staff@example.com', username='staff', is_staff=True)
+        tags = Tag.objects.bulk_create([Tag(name=f'tag{i}') for i in range(10)])
+        statuses = ['approved'] * 6 + ['pending', 'rejected']
+        resources = Resource.objects.bulk_create([
+            Resource(
+                title=f'Resource {i}', description='Description', file='resources/a.pdf',
+                owner=cls.owners[i % 5], status=statuses[i % 8], is_hidden=i % 13 == 0,
+            )
+            for i in range(400)
+        ])
+        Resource.tags.through.objects.bulk_create([
+            Resource.tags.through(resource=resource, tag=tags[i % 10]) for i, resource in enumerate(resources)
+        ])
+        Comment.objects.bulk_create([
+            Comment(resource=resources[i % 40], user=cls.owners[i % 5], text='Comment') for i in range(400)
+        ])
+        Rating.objects.bulk_create([
+            Rating(resource=resources[i], user=cls.owners[j], rating=3) for i in range(0, 400, 3) for j in range(5)
+        ])
+        SavedResource.objects.bulk_create([SavedResource(user=cls.staff, resource=r) for r in resources[::7]])
+        cls.resource = resources[1]
+        cls.rated = resources[3]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def tearDown(self):
+        counters.get_buffer().drain()  # views counted by the detail request
+
+    def assert_plans(self, url, user=None, allow_sort=False):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            scans, sorts = explain(sql)
+            self.assertFalse(scans & self.HOT_TABLES, f'{url} scans {scans}:\n{sql}')
+            if not allow_sort:
+                self.assertFalse(sorts, f'{url} sorts instead of reading an index in order:\n{sql}')
+        return response
+
+    def assert_pages(self, url, user=None):
+        response = self.assert_plans(url, user)
+        self.assertIsNotNone(response.json()['next'])
+        self.assert_plans(response.json()['next'], user)
+
+    def test_public_list(self):
+        self.assert_pages('/api/library/resources/')
+        self.assert_pages('/api/library/resources/', self.owners[0])
+
+    def test_my_resources(self):
+        self.assert_pages('/api/library/resources/my/', self.owners[1])
+
+    def test_user_resources(self):
+        self.assert_pages(f'/api/library/resources/user_resources/?user_id={self.owners[2].pk}')
+
+    def test_pending(self):
+        self.assert_plans('/api/library/resources/pending/', self.staff)
+
+    def test_detail_and_comments(self):
+        self.assert_plans(f'/api/library/resources/{self.resource.pk}/', self.owners[0])
+        self.assert_plans(f'/api/library/resources/{self.resource.pk}/comments/')
+        self.assert_pages(f'/api/library/resources/{self.resource.pk}/comments/?page_size=4')
+        self.assert_pages(f'/api/library/resources/{self.rated.pk}/ratings/?page_size=2')
+
+    def test_saved(self):
+        self.assert_plans('/api/library/resources/saved/ids/', self.staff)
+        # Ordered by the joined saved_at; the sort is over one user's saved rows only.
+        self.assert_plans('/api/library/resources/saved/', self.staff, allow_sort=True)
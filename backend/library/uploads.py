@@ -0,0 +1,116 @@
+"""Chunked, resumable uploads.
+
+Chunks are appended to ``MEDIA_ROOT/uploads/<session id>.part`` strictly in order, and
+the SHA-256 of the content is updated as the bytes stream past, so the file is
+never buffered in memory or read back. The hash state lives in this process; if a
+later chunk lands on a different worker the already-received prefix is re-hashed
+once from disk.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UploadSession
+from .storage import resource_storage
+
+READ_SIZE = 64 * 1024
+MAX_HASHERS = 256
+
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    pass
+
+
+def part_path(session):
+    return os.path.join(settings.MEDIA_ROOT, 'uploads', f'{session.pk}.part')
+
+
+def _hasher(session):
+    """Return a sha256 object positioned at ``session.received`` bytes."""
+    with _hashers_lock:
+        offset, hasher = _hashers.pop(session.pk, (None, None))
+    if offset == session.received:
+        return hasher
+    hasher = hashlib.sha256()
+    if session.received:
+        with open(part_path(session), 'rb') as handle:
+            for block in iter(lambda: handle.read(READ_SIZE), b''):
+                hasher.update(block)
+    return hasher
+
+
+def _remember(session, hasher):
+    with _hashers_lock:
+        _hashers[session.pk] = (session.received, hasher)
+        while len(_hashers) > MAX_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def append_chunk(session, stream, offset, length):
+    """Append ``length`` bytes read from ``stream`` at ``offset``; the caller holds the row lock."""
+    if offset != session.received:
+        raise UploadError(f'Expected offset {session.received}')
+    if length <= 0 or length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(f'Chunk size must be between 1 and {settings.UPLOAD_CHUNK_MAX_SIZE} bytes')
+    if session.received + length > session.size:
+        raise UploadError('Chunk extends past the declared size')
+
+    hasher = _hasher(session)
+    path = part_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, 'ab') as handle:
+        handle.truncate(session.received)
+        while written < length:
+            block = stream.read(min(READ_SIZE, length - written))
+            if not block:
+                break
+            handle.write(block)
+            hasher.update(block)
+            written += len(block)
+    if written != length:
+        # Leave the part file at the last good offset so the client can resume.
+        with open(path, 'ab') as handle:
+            handle.truncate(session.received)
+        with _hashers_lock:
+            _hashers.pop(session.pk, None)
+        raise UploadError('Chunk body shorter than declared')
+
+    session.received += written
+    if session.received == session.size:
+        session.sha256 = hasher.hexdigest()
+    session.save(update_fields=['received', 'sha256', 'updated_at'])
+    _remember(session, hasher)
+
+
+def finish(session):
+    """Move the completed part file into the blob store and return its storage name."""
+    if session.received != session.size:
+        raise UploadError('Upload is incomplete')
+    name = resource_storage.adopt(part_path(session), session.sha256, session.size)
+    with _hashers_lock:
+        _hashers.pop(session.pk, None)
+    return name
+
+
+def discard(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+    with _hashers_lock:
+        _hashers.pop(session.pk, None)
+    session.delete()
+
+
+def expired_sessions():
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    return UploadSession.objects.filter(updated_at__lt=cutoff, resource__isnull=True)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TagViewSet, ResourceViewSet
+from .views import TagViewSet, ResourceViewSet, UploadViewSet
 
 router = DefaultRouter()
 router.register(r'tags', TagViewSet)
 router.register(r'resources', ResourceViewSet)
+router.register(r'uploads', UploadViewSet, basename='upload')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,32 +1,59 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, status
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+import os
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Tag, Resource, Rating, Comment
-from .serializers import TagSerializer, ResourceSerializer, RatingSerializer, CommentSerializer
+from .models import Tag, Resource, Comment, UploadSession
+from .serializers import (
+    TagSerializer, ResourceSerializer, RatingSerializer, CommentSerializer, UploadSessionSerializer,
+    UploadCompleteSerializer, ResourceIdsSerializer, ResourceModerationSerializer,
+)
+from .filters import ResourceOrderingFilter, ResourceSearchFilter
+from core.moderation import NOT_FOUND, response_data
+from core.pagination import KeysetPagination
+from core.snapshots import get_snapshot
+from core.sparse import requested_fields
+from core.versions import ConditionalGetMixin
+from .comments import add_comment
+from .ratings import set_rating
+from .downloads import serve_file
+from .storage import resource_storage
+from . import analytics, counters, moderation, saved, stats, uploads
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters
-from django.db.models import Q, Avg
-from django.db import models
+from django.db.models import F, Q
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
 
 
 # Create your views here.
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def get_version_keys(self, request):
+        if self.action in ('list', 'retrieve'):
+            return ['tags']
+        return None
 
-class ResourceViewSet(viewsets.ModelViewSet):
+
+class ResourceViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Resource.objects.filter(status='approved')
     serializer_class = ResourceSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ResourceSearchFilter, ResourceOrderingFilter]
     filterset_fields = ['tags__name', 'owner', 'owner__id']
     search_fields = ['title', 'description', 'owner__username']
-    ordering_fields = ['created_at', 'views_count', 'downloads_count', 'average_rating']
+    ordering_fields = ['created_at', 'views_count', 'downloads_count', 'rating_avg']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -34,104 +61,159 @@ class ResourceViewSet(viewsets.ModelViewSet):
         return context
 
     def get_queryset(self):
-        queryset = Resource.objects.filter(status='approved', is_hidden=False)
+        if self.action in ('comments', 'ratings'):
+            # Only the resource's visibility matters; rows come from the related table.
+            return Resource.objects.filter(status='approved', is_hidden=False).only('id')
+        visible = Q(status='approved', is_hidden=False)
+        if self.action == 'retrieve' and self.request.user.is_authenticated:
+            # Owners also open their own pending, rejected or hidden resources.
+            visible |= Q(owner=self.request.user)
+        queryset = Resource.objects.filter(visible).with_list_data(
+            self.request.user, fields=self.serialized_fields()
+        )
         
         # Пошук за автором
         author_search = self.request.query_params.get('author', None)
         if author_search:
             queryset = queryset.filter(owner__username__icontains=author_search)
-        
-        # Сортування
-        ordering = self.request.query_params.get('ordering', None)
-        if ordering:
-            if ordering == 'rating':
-                queryset = queryset.annotate(avg_rating=models.Avg('ratings__rating')).order_by('-avg_rating')
-            elif ordering == '-rating':
-                queryset = queryset.annotate(avg_rating=models.Avg('ratings__rating')).order_by('avg_rating')
-            else:
-                queryset = queryset.order_by(ordering)
-        
-        if self.action == 'retrieve':
-            resource = queryset.filter(pk=self.kwargs.get('pk')).first()
-            if resource and self.request.user.is_authenticated and resource.owner == self.request.user:
-                resource.views_count += 1
-                resource.save()
-                return Resource.objects.filter(pk=self.kwargs.get('pk'))
-            if resource and resource.status == 'approved' and not resource.is_hidden:
-                resource.views_count += 1
-                resource.save()
-            return queryset.filter(pk=self.kwargs.get('pk'))
-        
+
         return queryset
 
+    def serialized_fields(self):
+        return requested_fields(self.request, ResourceSerializer.Meta.fields)
+
+    def get_version_keys(self, request):
+        pk = self.kwargs.get('pk')
+        keys = {
+            'list': ['resources', 'tags'],
+            'my': ['resources', 'tags'],
+            'list_saved': ['resources', 'tags', f'saved:{request.user.pk}'],
+            'saved_ids': ['resources', f'saved:{request.user.pk}'],
+            'user_resources': ['resources', 'tags'],
+            'pending': ['resources', 'tags'],
+            'all': ['resources', 'tags'],
+            'retrieve': [f'resource:{pk}', 'tags'],
+            'comments': [f'comments:{pk}'],
+            'ratings': [f'ratings:{pk}'],
+        }
+        return keys.get(self.action)
+
+    def not_modified(self, request):
+        if self.action == 'retrieve':
+            counters.increment(int(self.kwargs['pk']), 'views_count')
+
+    def paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        counters.increment(instance.pk, 'views_count')
+        instance.views_count += 1
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
+
+    def perform_destroy(self, instance):
+        # One cascade without per-rating and per-comment aggregate updates.
+        moderation.delete_resource(instance)
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my(self, request):
-        user_resources = Resource.objects.filter(owner=request.user)
-        serializer = self.get_serializer(user_resources, many=True)
-        return Response(serializer.data)
+        user_resources = Resource.objects.filter(owner=request.user).with_list_data(
+            request.user, fields=self.serialized_fields()
+        )
+        return self.paginated_response(user_resources.order_by('-created_at'))
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def save(self, request, pk=None):
         resource = self.get_object()
-        user = request.user
-        if resource in user.saved_resources.all():
-            user.saved_resources.remove(resource)
-            return Response({'status': 'resource removed from saved'}, status=status.HTTP_200_OK)
-        else:
-            user.saved_resources.add(resource)
+        if saved.toggle(request.user, resource.pk):
             return Response({'status': 'resource added to saved'}, status=status.HTTP_200_OK)
+        return Response({'status': 'resource removed from saved'}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='saved')
     def list_saved(self, request):
         user = request.user
-        saved_resources = user.saved_resources.all()
-        serializer = self.get_serializer(saved_resources, many=True)
-        return Response(serializer.data)
+        saved_resources = (
+            Resource.objects.filter(saved_entries__user=user)
+            .annotate(saved_at=F('saved_entries__saved_at'))
+            .with_list_data(user, fields=self.serialized_fields())
+        )
+        return self.paginated_response(saved_resources.order_by('-saved_at'))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='saved/ids')
+    def saved_ids(self, request):
+        return Response({'ids': saved.saved_ids(request.user)})
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated], url_path='saved/add')
+    def save_many(self, request):
+        serializer = ResourceIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(
+            Resource.objects.filter(status='approved', is_hidden=False, pk__in=serializer.validated_data['ids'])
+            .values_list('pk', flat=True)
+        )
+        return Response({'added': saved.save_many(request.user, ids)})
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated], url_path='saved/remove')
+    def unsave_many(self, request):
+        serializer = ResourceIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'removed': saved.unsave_many(request.user, serializer.validated_data['ids'])})
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticatedOrReadOnly])
     def user_resources(self, request):
         user_id = request.query_params.get('user_id')
         if not user_id:
             return Response({'error': 'user_id parameter required'}, status=400)
-        user_resources = Resource.objects.filter(owner_id=user_id, status='approved', is_hidden=False)
-        serializer = self.get_serializer(user_resources, many=True)
-        return Response(serializer.data)
+        user_resources = Resource.objects.filter(
+            owner_id=user_id, status='approved', is_hidden=False
+        ).with_list_data(request.user, fields=self.serialized_fields())
+        return self.paginated_response(user_resources.order_by('-created_at'))
+
+    def _moderate_one(self, pk, action_name, message):
+        try:
+            pk = int(pk)
+        except ValueError:
+            pk = None
+        if pk is None or moderation.moderate(action_name, {'ids': [pk]})[0][pk] == NOT_FOUND:
+            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'status': message}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def moderate(self, request):
+        """Apply one moderation action to a list of ids or to every resource matching a filter."""
+        serializer = ResourceModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action_name = serializer.validated_data['action']
+        outcomes, more = moderation.moderate(action_name, serializer.validated_data)
+        return Response(response_data(action_name, outcomes, more))
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
     def pending(self, request):
-        pending_resources = Resource.objects.filter(status='pending')
-        serializer = self.get_serializer(pending_resources, many=True)
-        return Response(serializer.data)
+        pending_resources = Resource.objects.filter(status='pending').with_list_data(
+            request.user, fields=self.serialized_fields()
+        )
+        return self.paginated_response(pending_resources.order_by('-created_at'))
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def approve(self, request, pk=None):
-        try:
-            resource = Resource.objects.get(pk=pk)
-        except Resource.DoesNotExist:
-            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-        resource.status = 'approved'
-        resource.save()
-        return Response({'status': 'resource approved'}, status=status.HTTP_200_OK)
+        return self._moderate_one(pk, 'approve', 'resource approved')
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def reject(self, request, pk=None):
-        try:
-            resource = Resource.objects.get(pk=pk)
-        except Resource.DoesNotExist:
-            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-        resource.status = 'rejected'
-        resource.save()
-        return Response({'status': 'resource rejected'}, status=status.HTTP_200_OK)
+        return self._moderate_one(pk, 'reject', 'resource rejected')
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
     def all(self, request):
         status_filter = request.query_params.get('status', None)
         hidden_filter = request.query_params.get('hidden', None)
         problematic_filter = request.query_params.get('problematic', None)
-        queryset = Resource.objects.all().order_by('-created_at')
+        queryset = Resource.objects.with_list_data(request.user, fields=self.serialized_fields()).order_by('-created_at')
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         if hidden_filter == 'true':
@@ -142,88 +224,65 @@ class ResourceViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(is_problematic=True)
         elif problematic_filter == 'false':
             queryset = queryset.filter(is_problematic=False)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def hide(self, request, pk=None):
-        try:
-            resource = Resource.objects.get(pk=pk)
-        except Resource.DoesNotExist:
-            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-        resource.is_hidden = True
-        resource.save()
-        return Response({'status': 'resource hidden'}, status=status.HTTP_200_OK)
+        return self._moderate_one(pk, 'hide', 'resource hidden')
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def unhide(self, request, pk=None):
-        try:
-            resource = Resource.objects.get(pk=pk)
-        except Resource.DoesNotExist:
-            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-        resource.is_hidden = False
-        resource.save()
-        return Response({'status': 'resource unhidden'}, status=status.HTTP_200_OK)
+        return self._moderate_one(pk, 'unhide', 'resource unhidden')
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def mark_problematic(self, request, pk=None):
-        try:
-            resource = Resource.objects.get(pk=pk)
-        except Resource.DoesNotExist:
-            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-        resource.is_problematic = True
-        resource.save()
-        return Response({'status': 'resource marked as problematic'}, status=status.HTTP_200_OK)
+        return self._moderate_one(pk, 'mark_problematic', 'resource marked as problematic')
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def unmark_problematic(self, request, pk=None):
-        try:
-            resource = Resource.objects.get(pk=pk)
-        except Resource.DoesNotExist:
-            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-        resource.is_problematic = False
-        resource.save()
-        return Response({'status': 'resource unmarked as problematic'}, status=status.HTTP_200_OK)
+        return self._moderate_one(pk, 'unmark_problematic', 'resource unmarked as problematic')
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def delete(self, request, pk=None):
+        return self._moderate_one(pk, 'delete', 'resource deleted')
+
+    def _file_paths(self, name):
+        # Older rows stored names with a leading /media/; try the storage path first.
         try:
-            resource = Resource.objects.get(pk=pk)
-        except Resource.DoesNotExist:
-            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-        resource.delete()
-        return Response({'status': 'resource deleted'}, status=status.HTTP_200_OK)
+            yield resource_storage.path(name)
+        except SuspiciousFileOperation:
+            pass
+        yield os.path.join(settings.MEDIA_ROOT, name.removeprefix('/media/').lstrip('/'))
 
     @action(detail=True, methods=['get', 'post'], permission_classes=[permissions.IsAuthenticatedOrReadOnly])
     def download(self, request, pk=None):
-        from django.http import FileResponse, Http404, HttpResponse
-        from django.conf import settings
-        import os
-        
-        try:
-            resource = Resource.objects.get(pk=pk)
-        except Resource.DoesNotExist:
-            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
-        
         if request.method == 'POST':
-            resource.downloads_count += 1
-            resource.save()
+            if not Resource.objects.filter(pk=pk).exists():
+                return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
+            counters.increment(int(pk), 'downloads_count')
             return Response({'status': 'download counted'}, status=status.HTTP_200_OK)
-        
-        if not resource.file:
+
+        row = Resource.objects.filter(pk=pk).values_list('file', 'original_filename').first()
+        if row is None:
+            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
+        name, original_filename = row
+        if not name:
             raise Http404("File not found")
-        
-        file_path = resource.file.path if hasattr(resource.file, 'path') else os.path.join(settings.MEDIA_ROOT, str(resource.file))
-        
-        if not os.path.exists(file_path):
-            file_path = os.path.join(settings.MEDIA_ROOT, str(resource.file).lstrip('/media/'))
-            if not os.path.exists(file_path):
-                raise Http404("File not found on server")
-        
-        response = FileResponse(open(file_path, 'rb'), as_attachment=True, filename=os.path.basename(file_path))
+
+        for file_path in self._file_paths(name):
+            try:
+                file_stat = os.stat(file_path)
+                break
+            except OSError:
+                continue
+        else:
+            raise Http404("File not found on server")
+
+        response = serve_file(request, file_path, original_filename or os.path.basename(file_path), stat=file_stat)
         response['Access-Control-Allow-Origin'] = '*'
         response['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
-        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Range, If-Range, If-None-Match'
+        response['Access-Control-Expose-Headers'] = 'Content-Range, Content-Length, Accept-Ranges, ETag, Last-Modified'
         return response
 
     @action(detail=True, methods=['get', 'post'], permission_classes=[permissions.IsAuthenticatedOrReadOnly])
@@ -234,17 +293,13 @@ class ResourceViewSet(viewsets.ModelViewSet):
             if not rating_value or not (1 <= int(rating_value) <= 5):
                 return Response({'error': 'Rating must be between 1 and 5'}, status=status.HTTP_400_BAD_REQUEST)
             
-            rating, created = Rating.objects.update_or_create(
-                resource=resource,
-                user=request.user,
-                defaults={'rating': int(rating_value)}
-            )
+            rating, created = set_rating(resource, request.user, int(rating_value))
             serializer = RatingSerializer(rating)
             return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
         else:
-            ratings = resource.ratings.all()
-            serializer = RatingSerializer(ratings, many=True)
-            return Response(serializer.data)
+            ratings = resource.ratings.select_related('user').order_by('-created_at')
+            page = self.paginate_queryset(ratings)
+            return self.get_paginated_response(RatingSerializer(page, many=True).data)
 
     @action(detail=True, methods=['get', 'post'], permission_classes=[permissions.IsAuthenticatedOrReadOnly])
     def comments(self, request, pk=None):
@@ -256,13 +311,13 @@ class ResourceViewSet(viewsets.ModelViewSet):
             if not text:
                 return Response({'error': 'Text is required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            comment = Comment.objects.create(resource=resource, user=request.user, text=text)
+            comment = add_comment(resource, request.user, text)
             serializer = CommentSerializer(comment)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
-            comments = resource.comments.all()
-            serializer = CommentSerializer(comments, many=True)
-            return Response(serializer.data)
+            comments = resource.comments.select_related('user').order_by('-created_at')
+            page = self.paginate_queryset(comments)
+            return self.get_paginated_response(CommentSerializer(page, many=True).data)
 
     @action(detail=True, methods=['delete'], permission_classes=[permissions.IsAuthenticated])
     def delete_comment(self, request, pk=None):
@@ -281,30 +336,119 @@ class ResourceViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
     def stats(self, request):
-        from django.db.models import Count
-        total_resources = Resource.objects.count()
-        approved = Resource.objects.filter(status='approved').count()
-        pending = Resource.objects.filter(status='pending').count()
-        rejected = Resource.objects.filter(status='rejected').count()
-        
-        resources_by_tag = Resource.objects.values('tags__name').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]
-        
-        from django.db.models import Sum
-        total_views = Resource.objects.aggregate(total=Sum('views_count'))['total'] or 0
-        total_downloads = Resource.objects.aggregate(total=Sum('downloads_count'))['total'] or 0
-        hidden_resources = Resource.objects.filter(is_hidden=True).count()
-        problematic_resources = Resource.objects.filter(is_problematic=True).count()
-        
+        snapshot = get_snapshot(
+            stats.SNAPSHOT_KEY, stats.compute_resource_stats, fresh=request.query_params.get('fresh') == '1'
+        )
+        return Response({**snapshot['data'], 'generated_at': snapshot['generated_at']})
+
+    def _analytics_range(self, request):
+        try:
+            end = parse_date(request.query_params.get('end', '')) or timezone.localdate()
+            start = parse_date(request.query_params.get('start', '')) or end - timedelta(days=29)
+        except ValueError:
+            return None
+        metrics = [m for m in request.query_params.get('metrics', '').split(',') if m] or None
+        if metrics and not set(metrics) <= set(analytics.METRICS):
+            return None
+        return start, end, metrics
+
+    def _analytics_response(self, request, **lookups):
+        params = self._analytics_range(request)
+        if params is None or params[0] > params[1]:
+            return Response({'error': 'Invalid date range or metrics'}, status=status.HTTP_400_BAD_REQUEST)
+        start, end, metrics = params
         return Response({
-            'total_resources': total_resources,
-            'approved': approved,
-            'pending': pending,
-            'rejected': rejected,
-            'hidden': hidden_resources,
-            'problematic': problematic_resources,
-            'total_views': total_views,
-            'total_downloads': total_downloads,
-            'top_tags': list(resources_by_tag),
+            'start': start,
+            'end': end,
+            'series': analytics.series(start, end, metrics, **lookups),
         })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def analytics(self, request):
+        author_id = request.query_params.get('author')
+        if author_id:
+            try:
+                author_id = int(author_id)
+            except ValueError:
+                return Response({'error': 'Invalid author'}, status=status.HTTP_400_BAD_REQUEST)
+            if request.user.id != author_id and not request.user.is_staff:
+                return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+            return self._analytics_response(request, resource__owner_id=author_id)
+        if not request.user.is_staff:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        return self._analytics_response(request)
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated],
+            url_path='analytics', url_name='resource-analytics')
+    def resource_analytics(self, request, pk=None):
+        try:
+            owner_id = Resource.objects.filter(pk=int(pk)).values_list('owner_id', flat=True).first()
+        except ValueError:
+            owner_id = None
+        if owner_id is None:
+            return Response({'error': 'Resource not found'}, status=status.HTTP_404_NOT_FOUND)
+        if owner_id != request.user.id and not request.user.is_staff:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        return self._analytics_response(request, resource_id=int(pk))
+
+
+class UploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                    viewsets.GenericViewSet):
+    """Chunked uploads: create a session, PUT chunks in order, then complete it into a Resource."""
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+    def perform_destroy(self, instance):
+        uploads.discard(instance)
+
+    def _chunk_offset(self, request):
+        content_range = request.headers.get('Content-Range', '')
+        if content_range.startswith('bytes '):
+            return int(content_range[len('bytes '):].split('-', 1)[0])
+        return int(request.query_params.get('offset', 0))
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        try:
+            offset = self._chunk_offset(request)
+            length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return Response({'error': 'Invalid Content-Range or offset'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            session = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            if session.resource_id:
+                return Response({'error': 'Upload already completed'}, status=status.HTTP_409_CONFLICT)
+            try:
+                uploads.append_chunk(session, request.stream, offset, length)
+            except uploads.UploadError as exc:
+                return Response(
+                    {'error': str(exc), 'received': session.received}, status=status.HTTP_409_CONFLICT
+                )
+        return Response(self.get_serializer(session).data)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        with transaction.atomic():
+            session = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            if session.resource_id:
+                return Response(ResourceSerializer(session.resource, context={'request': request}).data)
+            serializer = UploadCompleteSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            expected = serializer.validated_data.pop('sha256', None)
+            if expected and session.received == session.size and expected.lower() != session.sha256:
+                return Response({'error': 'Checksum mismatch'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                name = uploads.finish(session)
+            except uploads.UploadError as exc:
+                return Response({'error': str(exc), 'received': session.received}, status=status.HTTP_409_CONFLICT)
+            resource = serializer.save(owner=request.user, file=name, original_filename=session.filename)
+            session.resource = resource
+            session.save(update_fields=['resource', 'updated_at'])
+        return Response(ResourceSerializer(resource, context={'request': request}).data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+    actions = ['requeue_tasks']
+
+    def requeue_tasks(self, request, queryset):
+        queryset.update(
+            status=self.model.QUEUED, attempts=0, run_at=timezone.now(), locked_by='', locked_until=None
+        )
+    requeue_tasks.short_description = "Requeue selected tasks"
@@ -0,0 +1,28 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from tasks.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background tasks and the periodic scheduler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Number of tasks run at the same time')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--no-scheduler', action='store_true', help='Do not queue periodic jobs from this worker')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            pool=options['pool'],
+            scheduler=not options['no_scheduler'],
+            burst=options['burst'],
+        )
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(f'Worker {worker.name} running {options["concurrency"]} {options["pool"]}(s)')
+        processed = worker.run()
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} tasks'))
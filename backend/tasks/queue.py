@@ -0,0 +1,171 @@
+"""Database-backed task queue.
+
+Functions decorated with ``@task`` are queued with ``.delay(*args, **kwargs)``. The
+row is written in the caller's transaction, so workers only see a task once the code
+that queued it has committed. Workers (``manage.py run_worker``) claim a task with a
+compare-and-set UPDATE that stamps a lease (``locked_until``). A worker that dies
+simply lets its lease expire and another worker runs the task again. Failures are
+retried with exponential backoff until ``max_attempts`` is used up.
+
+This works the same on SQLite and PostgreSQL and needs no broker. With
+``settings.TASKS_EAGER`` tasks run in-process once the transaction commits, which is
+what the tests use.
+"""
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# How many of the most urgent candidates a worker tries before polling again.
+CLAIM_WINDOW = 10
+# Tries at writing the outcome of a task that ran. A lost write leaves the task leased,
+# so it runs again once the lease expires.
+OUTCOME_WRITE_ATTEMPTS = 3
+
+_registry = {}
+
+
+def task(name=None, max_attempts=None, priority=0):
+    """Register ``func`` as a task named ``<app>.<function>`` unless ``name`` is given."""
+
+    def decorator(func):
+        task_name = name or f'{func.__module__.split(".")[0]}.{func.__name__}'
+        _registry[task_name] = func
+        func.task_name = task_name
+        func.delay = lambda *args, **kwargs: enqueue(
+            task_name, args, kwargs, priority=priority, max_attempts=max_attempts
+        )
+        return func
+
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'Unknown task {name!r}') from None
+
+
+def enqueue(name, args=(), kwargs=None, run_at=None, priority=0, max_attempts=None, key=None):
+    """Queue task ``name``. Returns the Task, or None if ``key`` was already used or in eager mode."""
+    if getattr(settings, 'TASKS_EAGER', False):
+        func = get_task(name)
+        transaction.on_commit(lambda: func(*args, **(kwargs or {})))
+        return None
+    fields = {
+        'name': name,
+        'args': list(args),
+        'kwargs': kwargs or {},
+        'run_at': run_at or timezone.now(),
+        'priority': priority,
+        'max_attempts': max_attempts or settings.TASK_MAX_ATTEMPTS,
+    }
+    if key is None:
+        return Task.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(key=key, **fields)
+    except IntegrityError:
+        return None
+
+
+def _claimable(now):
+    return Q(status=Task.QUEUED, run_at__lte=now) | Q(status=Task.RUNNING, locked_until__lt=now)
+
+
+def claim(worker_id, lease=None):
+    """Lease the most urgent runnable task to ``worker_id``; None when there is nothing to do."""
+    lease = timedelta(seconds=lease or settings.TASK_LEASE_SECONDS)
+    now = timezone.now()
+    candidates = list(
+        Task.objects.filter(_claimable(now)).order_by('-priority', 'run_at', 'id').values_list('pk', flat=True)[
+            :CLAIM_WINDOW
+        ]
+    )
+    for pk in candidates:
+        # The WHERE clause repeats the claimable test, so exactly one racing worker wins.
+        won = Task.objects.filter(_claimable(now), pk=pk).update(
+            status=Task.RUNNING,
+            locked_by=worker_id,
+            locked_until=now + lease,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if won:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def extend_lease(task_obj, worker_id, lease=None):
+    lease = timedelta(seconds=lease or settings.TASK_LEASE_SECONDS)
+    return Task.objects.filter(pk=task_obj.pk, status=Task.RUNNING, locked_by=worker_id).update(
+        locked_until=timezone.now() + lease
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: TASK_RETRY_DELAY, 2x, 4x, ... capped at TASK_RETRY_MAX_DELAY."""
+    delay = min(settings.TASK_RETRY_DELAY * 2 ** (attempts - 1), settings.TASK_RETRY_MAX_DELAY)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _record_outcome(owned, **fields):
+    """Update the claimed task row, retrying transient lock errors (SQLite "locked")."""
+    for attempt in range(1, OUTCOME_WRITE_ATTEMPTS + 1):
+        try:
+            return owned.update(**fields)
+        except OperationalError:
+            if attempt == OUTCOME_WRITE_ATTEMPTS:
+                raise
+            time.sleep(0.05 * attempt)
+
+
+def execute(task_obj, worker_id):
+    """Run a claimed task and record the outcome; returns True on success."""
+    owned = Task.objects.filter(pk=task_obj.pk, locked_by=worker_id)
+    try:
+        if task_obj.attempts > task_obj.max_attempts:
+            raise RuntimeError('Lease expired on the final attempt')
+        get_task(task_obj.name)(*task_obj.args, **task_obj.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if task_obj.attempts >= task_obj.max_attempts:
+            logger.error('Task %s failed permanently:\n%s', task_obj, error)
+            _record_outcome(
+                owned, status=Task.FAILED, locked_until=None, finished_at=now, last_error=error, updated_at=now
+            )
+        else:
+            logger.warning('Task %s failed, will retry:\n%s', task_obj, error)
+            _record_outcome(
+                owned,
+                status=Task.QUEUED,
+                run_at=now + retry_delay(task_obj.attempts),
+                locked_by='',
+                locked_until=None,
+                last_error=error,
+                updated_at=now,
+            )
+        return False
+    now = timezone.now()
+    _record_outcome(owned, status=Task.DONE, locked_until=None, finished_at=now, updated_at=now)
+    return True
+
+
+@task(name='tasks.purge')
+def purge(days=None):
+    """Delete finished tasks older than TASK_RETENTION_DAYS."""
+    cutoff = timezone.now() - timedelta(days=days or settings.TASK_RETENTION_DAYS)
+    deleted, _ = Task.objects.filter(status__in=[Task.DONE, Task.FAILED], finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,84 @@
+"""Cron-like periodic jobs.
+
+``settings.TASK_SCHEDULE`` maps a job name to ``{'task': ..., 'cron': ..., 'args': [...],
+'kwargs': {...}}``. ``cron`` is a standard five-field expression (minute, hour,
+day of month, month, day of week; ``*``, ``*/n``, ``a-b``, ``a-b/n``, ``a/n`` and lists)
+in ``settings.TIME_ZONE``. Every worker may run a scheduler. Each run is queued with the
+key ``schedule:<job>:<minute>``, so however many schedulers are alive, each minute's
+run is queued once.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .queue import enqueue
+
+FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        spec, _, step = part.partition('/')
+        if spec == '*':
+            first, last = low, high
+        elif '-' in spec:
+            first, last = (int(value) for value in spec.split('-', 1))
+        else:
+            first = int(spec)
+            last = high if step else first  # a/n runs from a to the end of the range
+        if not (low <= first <= last <= high):
+            raise ValueError(f'{part!r} is outside {low}-{high}')
+        values.update(range(first, last + 1, int(step) if step else 1))
+    return values
+
+
+class Cron:
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != len(FIELDS):
+            raise ValueError(f'Expected five fields in {expression!r}')
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(part, low, high) for part, (low, high) in zip(parts, FIELDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}  # 0 and 7 are both Sunday
+        # Like cron, a field starting with * (``*/n`` too) does not restrict the day.
+        self.any_day = parts[2].startswith('*')
+        self.any_weekday = parts[4].startswith('*')
+
+    def matches(self, moment):
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        # Like cron: when both are restricted, either one matching is enough.
+        return day or weekday
+
+
+class Scheduler:
+    def __init__(self, schedule=None):
+        schedule = settings.TASK_SCHEDULE if schedule is None else schedule
+        self.jobs = {name: (Cron(job['cron']), job) for name, job in schedule.items()}
+        self.last_minute = None
+
+    def tick(self, now=None):
+        """Queue every job due in the minutes since the previous tick; returns how many were queued."""
+        minute = timezone.localtime(now or timezone.now()).replace(second=0, microsecond=0)
+        if self.last_minute is None:
+            self.last_minute = minute - timedelta(minutes=1)
+        # Catch up after a stall, but never replay more than an hour of runs.
+        self.last_minute = max(self.last_minute, minute - timedelta(hours=1))
+        queued = 0
+        while self.last_minute < minute:
+            self.last_minute += timedelta(minutes=1)
+            for name, (cron, job) in self.jobs.items():
+                if cron.matches(self.last_minute) and enqueue(
+                    job['task'], job.get('args', ()), job.get('kwargs'),
+                    key=f'schedule:{name}:{self.last_minute:%Y%m%d%H%M}',
+                ):
+                    queued += 1
+        return queued
@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.db import OperationalError
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Task
+from .queue import claim, enqueue, execute, purge, task
+from .schedule import Cron, Scheduler
+from .worker import Worker
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.explode', max_attempts=2)
+def explode():
+    raise ValueError('boom')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_runs_most_urgent_task_once(self):
+        later = enqueue('tests.record', ['later'], run_at=timezone.now() + timedelta(hours=1))
+        record.delay('low')
+        enqueue('tests.record', ['high'], priority=5)
+
+        first = claim('worker-a')
+        self.assertEqual((first.args, first.status, first.attempts), (['high'], Task.RUNNING, 1))
+        self.assertTrue(execute(first, 'worker-a'))
+        second = claim('worker-b')
+        self.assertEqual(second.args, ['low'])
+        self.assertIsNone(claim('worker-c'))  # 'later' is not due and 'low' is leased
+        execute(second, 'worker-b')
+
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(Task.objects.get(pk=first.pk).status, Task.DONE)
+        self.assertEqual(Task.objects.get(pk=later.pk).status, Task.QUEUED)
+
+    def test_expired_lease_is_reclaimed_and_stale_owner_cannot_finish(self):
+        record.delay('x')
+        stale = claim('worker-a', lease=60)
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        fresh = claim('worker-b')
+        self.assertEqual((fresh.pk, fresh.attempts), (stale.pk, 2))
+
+        execute(stale, 'worker-a')
+        self.assertEqual(Task.objects.get().status, Task.RUNNING)
+        execute(fresh, 'worker-b')
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_failures_back_off_then_fail(self):
+        explode.delay()
+        first = claim('worker')
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            self.assertFalse(execute(first, 'worker'))
+        retried = Task.objects.get()
+        self.assertEqual(retried.status, Task.QUEUED)
+        self.assertIn('ValueError: boom', retried.last_error)
+        self.assertGreater(retried.run_at, timezone.now())
+        self.assertIsNone(claim('worker'))
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            execute(claim('worker'), 'worker')
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_outcome_write_is_retried_on_lock_errors(self):
+        record.delay('x')
+        claimed = claim('worker')
+        update = QuerySet.update
+        errors = [OperationalError('database table is locked')]
+
+        def locked_once(queryset, **fields):
+            if errors:
+                raise errors.pop()
+            return update(queryset, **fields)
+
+        with mock.patch.object(QuerySet, 'update', locked_once):
+            self.assertTrue(execute(claimed, 'worker'))
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_keys_deduplicate_and_purge(self):
+        self.assertIsNotNone(enqueue('tests.record', [1], key='once'))
+        self.assertIsNone(enqueue('tests.record', [1], key='once'))
+        Task.objects.update(status=Task.DONE, finished_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(purge(), 1)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delay('eager')
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['eager'])
+        self.assertFalse(Task.objects.exists())
+
+
+class ScheduleTests(TestCase):
+    def test_cron_fields(self):
+        cron = Cron('*/15 9-17 * * 1-5')
+        self.assertTrue(cron.matches(datetime(2024, 5, 6, 9, 30)))  # Monday
+        self.assertFalse(cron.matches(datetime(2024, 5, 6, 9, 31)))
+        self.assertFalse(cron.matches(datetime(2024, 5, 5, 9, 30)))  # Sunday
+        either = Cron('0 0 1 * 0')
+        self.assertTrue(either.matches(datetime(2024, 5, 1, 0, 0)))  # the 1st, a Wednesday
+        self.assertTrue(either.matches(datetime(2024, 5, 5, 0, 0)))  # a Sunday
+        with self.assertRaises(ValueError):
+            Cron('61 * * * *')
+
+    def test_stepped_star_does_not_restrict_the_day(self):
+        cron = Cron('0 0 */2 * 1')  # Mondays that fall on an odd day of the month
+        self.assertTrue(cron.matches(datetime(2024, 5, 13, 0, 0)))
+        self.assertFalse(cron.matches(datetime(2024, 5, 6, 0, 0)))  # a Monday, but the 6th
+        self.assertFalse(cron.matches(datetime(2024, 5, 1, 0, 0)))  # the 1st, a Wednesday
+        weekdays = Cron('0 0 1 * */3')  # the 1st, on Sundays, Wednesdays and Saturdays only
+        self.assertTrue(weekdays.matches(datetime(2024, 5, 1, 0, 0)))
+        self.assertFalse(weekdays.matches(datetime(2024, 5, 4, 0, 0)))  # a Saturday, but the 4th
+        self.assertFalse(weekdays.matches(datetime(2024, 8, 1, 0, 0)))  # the 1st, a Thursday
+
+    def test_start_with_step_runs_to_the_end_of_the_range(self):
+        cron = Cron('5/20 3/12 * * *')
+        self.assertEqual((cron.minutes, cron.hours), ({5, 25, 45}, {3, 15}))
+        self.assertEqual(Cron('0 0 * * 5/1').weekdays, {5, 6, 0})
+
+    def test_each_slot_is_queued_once_across_schedulers(self):
+        schedule = {'record': {'task': 'tests.record', 'cron': '*/5 * * * *', 'args': ['tick']}}
+        start = timezone.make_aware(datetime(2024, 5, 6, 10, 0))
+        first, second = Scheduler(schedule), Scheduler(schedule)
+        self.assertEqual(first.tick(start), 1)
+        self.assertEqual(second.tick(start), 0)
+        self.assertEqual(first.tick(start + timedelta(minutes=12)), 2)  # 10:05 and 10:10
+        self.assertEqual(Task.objects.filter(name='tests.record').count(), 3)
+
+
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_burst_worker_drains_queue(self):
+        for value in range(5):
+            record.delay(value)
+        worker = Worker(concurrency=3, scheduler=False, burst=True, poll_interval=0.01)
+        self.assertEqual(worker.run(), 5)
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 5)
+
+    def test_database_error_does_not_stop_the_loop(self):
+        record.delay('after-error')
+        worker = Worker(scheduler=False, burst=True, poll_interval=0.01)
+        with mock.patch('tasks.worker.claim', side_effect=[OperationalError('database table is locked'), None]):
+            with self.assertLogs('tasks.worker', 'ERROR'):
+                worker.run()
+        self.assertEqual(worker.processed, 0)
+        self.assertEqual(worker.run(), 1)
+        self.assertEqual(calls, ['after-error'])
+
+    @override_settings(TASK_LEASE_SECONDS=0.03)
+    def test_heartbeat_keeps_lease_of_long_task(self):
+        record.delay('slow')
+        worker = Worker(scheduler=False, burst=True)
+        leases = []
+
+        def slow(value):
+            import time
+
+            for _ in range(3):
+                time.sleep(0.03)
+                leases.append(Task.objects.get().locked_until)
+            calls.append(value)
+
+        with mock.patch.dict('tasks.queue._registry', {'tests.record': slow}):
+            worker.run()
+        self.assertEqual(calls, ['slow'])
+        self.assertGreater(leases[-1], leases[0])
@@ -0,0 +1,143 @@
+"""Worker pool that runs queued tasks (see ``tasks.queue``).
+
+A worker runs ``concurrency`` claim loops, either as threads in this process or as
+forked child processes (``pool='process'``), for CPU-bound tasks that the GIL would
+serialise. The parent thread also runs the periodic scheduler. While a task runs, a
+heartbeat renews its lease, so long tasks are not handed to a second worker.
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import DatabaseError, connection, connections
+
+from .queue import claim, execute, extend_lease
+from .schedule import Scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self, concurrency=1, pool='thread', scheduler=True, burst=False, poll_interval=None):
+        if pool not in ('thread', 'process'):
+            raise ValueError("pool must be 'thread' or 'process'")
+        self.concurrency = concurrency
+        self.pool = pool
+        self.scheduler = Scheduler() if scheduler else None
+        self.burst = burst
+        self.poll_interval = settings.TASK_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.name = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self.stopping = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def _heartbeat(self, task_obj, worker_id, done):
+        interval = settings.TASK_LEASE_SECONDS / 3
+        try:
+            while not done.wait(interval):
+                extend_lease(task_obj, worker_id)
+        finally:
+            connection.close()
+
+    def run_one(self, worker_id):
+        """Claim and run a single task; returns False when the queue had nothing runnable."""
+        task_obj = claim(worker_id)
+        if task_obj is None:
+            return False
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task_obj, worker_id, done), daemon=True)
+        heartbeat.start()
+        try:
+            execute(task_obj, worker_id)
+        finally:
+            done.set()
+            heartbeat.join()
+        with self._lock:
+            self.processed += 1
+        return True
+
+    def _loop(self, index):
+        worker_id = f'{self.name}/{index}'
+        try:
+            while not self.stopping.is_set():
+                try:
+                    ran = self.run_one(worker_id)
+                except DatabaseError:
+                    # A lost connection or lock timeout must not kill the loop. A failed
+                    # claim leaves the task queued; a task that ran is retried once its
+                    # lease expires.
+                    logger.exception('Worker %s could not reach the database', worker_id)
+                    connection.close()
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                if not ran:
+                    if self.burst:
+                        return
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    def _schedule(self):
+        if self.scheduler is None:
+            return
+        try:
+            self.scheduler.tick()
+        except Exception:
+            logger.exception('Scheduler tick failed')
+        finally:
+            connection.close()
+
+    def _run_threads(self):
+        threads = [
+            threading.Thread(target=self._loop, args=(index,), name=f'task-worker-{index}', daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            self._schedule()
+            self.stopping.wait(self.poll_interval)
+            if self.stopping.is_set():
+                break
+        for thread in threads:
+            thread.join()
+
+    def _run_processes(self):
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [context.Process(target=self._child, args=(index,)) for index in range(self.concurrency)]
+        for child in children:
+            child.start()
+        while any(child.is_alive() for child in children):
+            self._schedule()
+            self.stopping.wait(self.poll_interval)
+            if self.stopping.is_set():
+                break
+        for child in children:
+            child.terminate()  # SIGTERM: the child finishes its current task first
+        for child in children:
+            child.join()
+
+    def _child(self, index):
+        import signal
+
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self._loop(index)
+
+    def run(self):
+        logger.info('Worker %s starting %d %s(s)', self.name, self.concurrency, self.pool)
+        if self.pool == 'process':
+            self._run_processes()
+        else:
+            self._run_threads()
+        return self.processed
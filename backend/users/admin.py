@@ -1,4 +1,6 @@
 from django.contrib import admin
+from core.versions import bump
+from library.moderation import deleting_users
 from .models import User
 
 @admin.register(User)
@@ -9,5 +11,12 @@ class UserAdmin(admin.ModelAdmin):
     actions = ['approve_users']
 
     def approve_users(self, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
         queryset.update(is_approved=True)
+        # update() sends no post_save, so invalidate the cached users here.
+        bump('users', *(f'user:{pk}' for pk in ids))
     approve_users.short_description = "Approve selected users"
+
+    def delete_queryset(self, request, queryset):
+        with deleting_users(list(queryset.values_list('pk', flat=True))):
+            queryset.delete()
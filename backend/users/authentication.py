@@ -0,0 +1,58 @@
+"""JWT authentication that resolves the user from the cache.
+
+simplejwt's ``JWTAuthentication`` loads the user row on every request. Here the loaded
+user is cached for ``settings.AUTH_USER_CACHE_TTL`` seconds under a key that contains
+the user's ``user:<pk>`` version stamp (see ``core.versions``). Saving or deleting a
+user bumps that stamp, so blocking, approving or changing staff status takes effect on
+the next request rather than when the entry expires. Blocked users are rejected
+like inactive ones, from the cached copy.
+
+The password hash is deferred and never reaches the cache; with ``CHECK_REVOKE_TOKEN``
+only its digest, the value the token itself carries, is cached alongside.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.versions import get_versions
+
+KEY_PREFIX = 'auth-user'
+
+
+def cache_key(user_id):
+    version, = get_versions([f'user:{user_id}'])
+    return f'{KEY_PREFIX}:{user_id}:{version}'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        key = cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = self.user_model.objects.defer('password').get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+            if api_settings.CHECK_REVOKE_TOKEN:
+                password = self.user_model.objects.filter(pk=user.pk).values_list('password', flat=True).get()
+                user.password_digest = get_md5_hash_password(password)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TTL)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if getattr(user, 'is_blocked', False):
+            raise AuthenticationFailed(_('User is blocked'), code='user_blocked')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user.password_digest
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
@@ -0,0 +1,51 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Turn the implicit saved_resources table into the explicit SavedResource model.
+
+    The table, its rows and its (user, resource) unique constraint already exist, so
+    only the state changes; saved_at is then added with the migration time for
+    existing rows.
+    """
+
+    dependencies = [
+        ('library', '0009_resource_previews'),
+        ('users', '0004_user_block_reason_user_is_blocked'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='SavedResource',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_entries', to='library.resource')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_entries', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'users_user_saved_resources',
+                        'unique_together': {('user', 'resource')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='saved_resources',
+                    field=models.ManyToManyField(blank=True, related_name='saved_by', through='users.SavedResource', to='library.resource'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='savedresource',
+            name='saved_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='savedresource',
+            index=models.Index(fields=['user', '-saved_at'], name='users_user__user_id_5dd5d4_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0010_hot_path_indexes'),
+        ('users', '0005_savedresource'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='savedresource',
+            name='users_user__user_id_5dd5d4_idx',
+        ),
+        migrations.AddIndex(
+            model_name='savedresource',
+            index=models.Index(fields=['user', '-saved_at', '-resource'], name='saved_user_recent_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -13,10 +14,33 @@ class User(AbstractUser):
     is_approved = models.BooleanField(default=False)
     is_blocked = models.BooleanField(default=False)
     block_reason = models.TextField(blank=True, null=True)
-    saved_resources = models.ManyToManyField('library.Resource', related_name='saved_by', blank=True)
+    saved_resources = models.ManyToManyField(
+        'library.Resource', through='SavedResource', related_name='saved_by', blank=True
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
     def __str__(self):
         return self.email
+
+    def delete(self, *args, **kwargs):
+        # Ratings and comments on other users' resources cascade; their aggregates are recomputed once.
+        from library.moderation import deleting_users
+        with deleting_users([self.pk]):
+            return super().delete(*args, **kwargs)
+
+
+class SavedResource(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_entries')
+    resource = models.ForeignKey('library.Resource', on_delete=models.CASCADE, related_name='saved_entries')
+    saved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # Keeps the table of the former implicit many-to-many relation.
+        db_table = 'users_user_saved_resources'
+        unique_together = ('user', 'resource')
+        indexes = [models.Index(fields=['user', '-saved_at', '-resource'], name='saved_user_recent_idx')]
+
+    def __str__(self):
+        return f"{self.user} saved {self.resource_id}"
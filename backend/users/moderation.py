@@ -0,0 +1,29 @@
+"""User moderation actions, single or bulk (see ``core.moderation``).
+
+Updates skip ``save()`` and its signals, so the version stamps are bumped here. Those
+stamps also key the cached authentication users (see ``users.authentication``), so a
+block applies to the user's next request.
+"""
+from core import moderation
+from core.versions import bump
+from .models import User
+
+ACTIONS = ('approve', 'reject', 'block', 'unblock')
+
+
+def _values(action, reason=''):
+    return {
+        'approve': {'is_approved': True},
+        'reject': {'is_approved': False},
+        'block': {'is_blocked': True, 'block_reason': reason},
+        'unblock': {'is_blocked': False, 'block_reason': ''},
+    }[action]
+
+
+def moderate(action, data, reason=''):
+    """Apply ``action`` to the users selected by ``data``; returns ``(outcomes, more)``."""
+    outcomes, more = moderation.apply_update(User.objects.all(), data, _values(action, reason))
+    changed = moderation.changed_ids(outcomes)
+    if changed:
+        bump('users', *(f'user:{pk}' for pk in changed))
+    return outcomes, more
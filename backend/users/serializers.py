@@ -1,4 +1,7 @@
 from rest_framework import serializers
+
+from core.moderation import BulkActionSerializer
+from . import moderation
 from .models import User
 
 
@@ -22,3 +25,16 @@ class UserLoginSerializer(serializers.Serializer):
     def validate(self, data):
         # Add authentication logic here
         return data
+
+
+class UserFilterSerializer(serializers.Serializer):
+    user_type = serializers.ChoiceField(choices=User.USER_TYPE_CHOICES, required=False)
+    is_approved = serializers.BooleanField(required=False)
+    is_blocked = serializers.BooleanField(required=False)
+    is_staff = serializers.BooleanField(required=False)
+
+
+class UserModerationSerializer(BulkActionSerializer):
+    action = serializers.ChoiceField(choices=moderation.ACTIONS)
+    filter = UserFilterSerializer(required=False)
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
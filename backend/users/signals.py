@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.versions import bump
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def bump_user_versions(sender, instance, **kwargs):
+    bump('users', f'user:{instance.pk}')
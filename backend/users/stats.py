@@ -0,0 +1,18 @@
+from django.db.models import Count, Q
+
+from .models import User
+
+SNAPSHOT_KEY = 'users:user-stats'
+
+
+def compute_user_stats():
+    """Admin dashboard totals in a single conditional aggregate."""
+    return User.objects.aggregate(
+        total_users=Count('id'),
+        students=Count('id', filter=Q(user_type='student')),
+        teachers=Count('id', filter=Q(user_type='teacher')),
+        approved_teachers=Count('id', filter=Q(user_type='teacher', is_approved=True)),
+        pending_teachers=Count('id', filter=Q(user_type='teacher', is_approved=False)),
+        staff_users=Count('id', filter=Q(is_staff=True)),
+        blocked_users=Count('id', filter=Q(is_blocked=True)),
+    )
@@ -0,0 +1,8 @@
+from core.snapshots import refresh_snapshot
+from tasks.queue import task
+from . import stats
+
+
+@task()
+def refresh_stats():
+    refresh_snapshot(stats.SNAPSHOT_KEY, stats.compute_user_stats)
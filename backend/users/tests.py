@@ -1,3 +1,110 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import cache_key
+from .models import User
+
+
+class UserListPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', is_staff=True)
+        for i in range(4):
+            User.objects.create_user(email=f'teacher{i}@example.com', username=f'teacher{i}', user_type='teacher')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_pages_follow_date_joined(self):
+        data = self.client.get('/api/users/users/all/?page_size=3&count=exact').json()
+        self.assertEqual(data['count'], 5)
+        second = self.client.get(data['next']).json()
+        self.assertIsNone(second['next'])
+        emails = [row['email'] for row in data['results'] + second['results']]
+        self.assertEqual(emails, list(User.objects.order_by('-date_joined', '-id').values_list('email', flat=True)))
+
+    def test_pending(self):
+        data = self.client.get('/api/users/users/pending/?page_size=2').json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(len(self.client.get(data['next']).json()['results']), 2)
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', is_staff=True)
+        self.user = User.objects.create_user(email='student@example.com', username='student')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_user_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/users/users/me/').json()['email'], 'student@example.com')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/users/users/me/').status_code, 200)
+
+    def test_password_hash_is_not_cached(self):
+        self.user.set_password('secret')
+        self.user.save()
+        self.client.get('/api/users/users/me/')
+        cached = cache.get(cache_key(self.user.pk))
+        self.assertEqual(cached.pk, self.user.pk)
+        self.assertNotIn('password', cached.__dict__)
+
+    @mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+    def test_password_change_still_revokes_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.assertEqual(self.client.get('/api/users/users/me/').status_code, 200)
+        self.assertEqual(self.client.get('/api/users/users/me/').status_code, 200)
+        self.user.set_password('changed')
+        self.user.save()
+        response = self.client.get('/api/users/users/me/')
+        self.assertEqual((response.status_code, response.json()['code']), (401, 'password_changed'))
+
+    def test_block_and_unblock_take_effect_immediately(self):
+        self.client.get('/api/users/users/me/')
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        admin.post(f'/api/users/users/{self.user.pk}/block/', {'reason': 'spam'})
+        response = self.client.get('/api/users/users/me/')
+        self.assertEqual((response.status_code, response.json()['code']), (401, 'user_blocked'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/users/users/me/').status_code, 401)
+
+        admin.post(f'/api/users/users/{self.user.pk}/unblock/')
+        self.assertEqual(self.client.get('/api/users/users/me/').status_code, 200)
+
+
+class UserModerationTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', is_staff=True)
+        self.teachers = [
+            User.objects.create_user(email=f'teacher{i}@example.com', username=f'teacher{i}', user_type='teacher')
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_approve_pending_teachers_by_filter(self):
+        response = self.client.post(
+            '/api/users/users/moderate/',
+            {'action': 'approve', 'filter': {'user_type': 'teacher', 'is_approved': False}},
+            format='json',
+        )
+        self.assertEqual([row['outcome'] for row in response.json()['results']], ['updated'] * 3)
+        self.assertEqual(User.objects.filter(user_type='teacher', is_approved=True).count(), 3)
 
-# Create your tests here.
+    def test_block_ids_with_reason(self):
+        ids = [self.teachers[0].pk, self.teachers[1].pk]
+        response = self.client.post(
+            '/api/users/users/moderate/', {'action': 'block', 'ids': ids, 'reason': 'spam'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(User.objects.filter(is_blocked=True).order_by('pk').values_list('pk', 'block_reason')),
+            [(pk, 'spam') for pk in ids],
+        )
+        self.assertEqual(self.client.post('/api/users/users/999/unblock/').status_code, 404)
@@ -1,9 +1,14 @@
 from django.shortcuts import render
-from rest_framework import generics, viewsets, permissions
+from rest_framework import generics, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import User
-from .serializers import UserRegistrationSerializer
+from .serializers import UserModerationSerializer, UserRegistrationSerializer
+from core.moderation import NOT_FOUND, response_data
+from core.pagination import KeysetPagination
+from core.snapshots import get_snapshot
+from core.versions import ConditionalGetMixin
+from . import moderation, stats
 
 # Create your views here.
 
@@ -13,10 +18,23 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = User.objects.all()
+class UserViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = User.objects.order_by('-date_joined')
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_version_keys(self, request):
+        if self.action in ('list', 'retrieve', 'all', 'pending'):
+            return ['users']
+        if self.action == 'me':
+            return [f'user:{request.user.pk}']
+        return None
+
+    def paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def me(self, request):
@@ -26,28 +44,20 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
     def pending(self, request):
         pending_users = User.objects.filter(is_approved=False, user_type='teacher')
-        serializer = self.get_serializer(pending_users, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(pending_users.order_by('-date_joined'))
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def approve(self, request, pk=None):
-        user = self.get_object()
-        user.is_approved = True
-        user.save()
-        return Response({'status': 'user approved'}, status=200)
+        return self._moderate_one(pk, 'approve', {'status': 'user approved'})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def reject(self, request, pk=None):
-        user = self.get_object()
-        user.is_approved = False
-        user.save()
-        return Response({'status': 'user rejected'}, status=200)
+        return self._moderate_one(pk, 'reject', {'status': 'user rejected'})
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
     def all(self, request):
         users = User.objects.all().order_by('-date_joined')
-        serializer = self.get_serializer(users, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(users)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def toggle_staff(self, request, pk=None):
@@ -58,39 +68,34 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def block(self, request, pk=None):
-        user = self.get_object()
         reason = request.data.get('reason', '')
-        user.is_blocked = True
-        user.block_reason = reason
-        user.save()
-        return Response({'status': 'user blocked', 'reason': reason}, status=200)
+        return self._moderate_one(pk, 'block', {'status': 'user blocked', 'reason': reason}, reason=reason)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def unblock(self, request, pk=None):
-        user = self.get_object()
-        user.is_blocked = False
-        user.block_reason = ''
-        user.save()
-        return Response({'status': 'user unblocked'}, status=200)
+        return self._moderate_one(pk, 'unblock', {'status': 'user unblocked'})
+
+    def _moderate_one(self, pk, action_name, body, reason=''):
+        try:
+            pk = int(pk)
+        except ValueError:
+            pk = None
+        if pk is None or moderation.moderate(action_name, {'ids': [pk]}, reason)[0][pk] == NOT_FOUND:
+            return Response({'detail': 'No User matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(body, status=200)
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def moderate(self, request):
+        """Apply one moderation action to a list of ids or to every user matching a filter."""
+        serializer = UserModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action_name = serializer.validated_data['action']
+        outcomes, more = moderation.moderate(action_name, serializer.validated_data, serializer.validated_data['reason'])
+        return Response(response_data(action_name, outcomes, more))
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
     def stats(self, request):
-        from django.db.models import Count, Q
-        total_users = User.objects.count()
-        students = User.objects.filter(user_type='student').count()
-        teachers = User.objects.filter(user_type='teacher').count()
-        approved_teachers = User.objects.filter(user_type='teacher', is_approved=True).count()
-        pending_teachers = User.objects.filter(user_type='teacher', is_approved=False).count()
-        staff_users = User.objects.filter(is_staff=True).count()
-        
-        blocked_users = User.objects.filter(is_blocked=True).count()
-        
-        return Response({
-            'total_users': total_users,
-            'students': students,
-            'teachers': teachers,
-            'approved_teachers': approved_teachers,
-            'pending_teachers': pending_teachers,
-            'staff_users': staff_users,
-            'blocked_users': blocked_users,
-        })
+        snapshot = get_snapshot(
+            stats.SNAPSHOT_KEY, stats.compute_user_stats, fresh=request.query_params.get('fresh') == '1'
+        )
+        return Response({**snapshot['data'], 'generated_at': snapshot['generated_at']})
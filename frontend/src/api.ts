@@ -1,4 +1,4 @@
-import axios from 'axios';
+import axios, { type AxiosRequestConfig } from 'axios';
 
 const api = axios.create({
   baseURL: 'https://teamwork-back.onrender.com/api',
@@ -49,4 +49,37 @@ api.interceptors.response.use(
   },
 );
 
+export interface BatchResponse<T = any> {
+  status: number;
+  headers: Record<string, string>;
+  body: T;
+}
+
+// Fetches several API paths (relative to baseURL) in one round trip through /api/batch/.
+export const batchGet = async (paths: string[], parallel = true): Promise<BatchResponse[]> => {
+  const response = await api.post('/batch/', {
+    parallel,
+    requests: paths.map((path) => ({ method: 'GET', url: `/api${path}` })),
+  });
+  return response.data.responses;
+};
+
+export interface Page<T = any> {
+  next: string | null;
+  results: T[];
+}
+
+// Loads every page of a paginated list by following `next`. Only for lists that are
+// bounded per user, such as one author's resources; long lists load page by page.
+export const fetchAllPages = async <T = any>(url: string, config?: AxiosRequestConfig): Promise<T[]> => {
+  let response = await api.get<Page<T>>(url, config);
+  const results = [...response.data.results];
+  while (response.data.next) {
+    // `next` is an absolute URL that already carries the query parameters.
+    response = await api.get<Page<T>>(response.data.next);
+    results.push(...response.data.results);
+  }
+  return results;
+};
+
 export default api;
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import api from '../api';
+import api, { batchGet } from '../api';
 import { useNavigate } from 'react-router-dom';
 
 interface User {
@@ -57,6 +57,11 @@ const AdminPage: React.FC = () => {
   const [allUsers, setAllUsers] = useState<User[]>([]);
   const [pendingResources, setPendingResources] = useState<Resource[]>([]);
   const [allResources, setAllResources] = useState<Resource[]>([]);
+  // `next` page URLs of the lists above; null once a list is fully loaded.
+  const [nextPendingUsers, setNextPendingUsers] = useState<string | null>(null);
+  const [nextAllUsers, setNextAllUsers] = useState<string | null>(null);
+  const [nextPendingResources, setNextPendingResources] = useState<string | null>(null);
+  const [nextAllResources, setNextAllResources] = useState<string | null>(null);
   const [userStats, setUserStats] = useState<UserStats | null>(null);
   const [resourceStats, setResourceStats] = useState<ResourceStats | null>(null);
   const [loading, setLoading] = useState(true);
@@ -84,17 +89,22 @@ const AdminPage: React.FC = () => {
 
   const fetchData = async () => {
     try {
-      const [usersResponse, resourcesResponse, statsResponse, resourceStatsResponse] =
-        await Promise.all([
-          api.get('/users/users/pending/'),
-          api.get('/library/resources/pending/'),
-          api.get('/users/users/stats/'),
-          api.get('/library/resources/stats/'),
-        ]);
-      setPendingUsers(usersResponse.data);
-      setPendingResources(resourcesResponse.data);
-      setUserStats(statsResponse.data);
-      setResourceStats(resourceStatsResponse.data);
+      const [usersResponse, resourcesResponse, statsResponse, resourceStatsResponse] = await batchGet([
+        '/users/users/pending/',
+        '/library/resources/pending/',
+        '/users/users/stats/',
+        '/library/resources/stats/',
+      ]);
+      if (usersResponse.status === 403) {
+        navigate('/');
+        return;
+      }
+      setPendingUsers(usersResponse.body.results);
+      setNextPendingUsers(usersResponse.body.next);
+      setPendingResources(resourcesResponse.body.results);
+      setNextPendingResources(resourcesResponse.body.next);
+      setUserStats(statsResponse.body);
+      setResourceStats(resourceStatsResponse.body);
     } catch (error: any) {
       if (error.response?.status === 403) {
         navigate('/');
@@ -108,7 +118,8 @@ const AdminPage: React.FC = () => {
   const fetchAllUsers = async () => {
     try {
       const response = await api.get('/users/users/all/');
-      setAllUsers(response.data);
+      setAllUsers(response.data.results);
+      setNextAllUsers(response.data.next);
     } catch (error) {
       console.error(error);
     }
@@ -121,7 +132,23 @@ const AdminPage: React.FC = () => {
       if (resourceHiddenFilter !== 'all') params.hidden = resourceHiddenFilter;
       if (resourceProblematicFilter !== 'all') params.problematic = resourceProblematicFilter;
       const response = await api.get('/library/resources/all/', { params });
-      setAllResources(response.data);
+      setAllResources(response.data.results);
+      setNextAllResources(response.data.next);
+    } catch (error) {
+      console.error(error);
+    }
+  };
+
+  const loadNextPage = async <T,>(
+    next: string,
+    setItems: React.Dispatch<React.SetStateAction<T[]>>,
+    setNext: React.Dispatch<React.SetStateAction<string | null>>,
+  ) => {
+    try {
+      // `next` is an absolute URL; axios uses it as is instead of joining it to baseURL.
+      const response = await api.get(next);
+      setItems((items) => [...items, ...response.data.results]);
+      setNext(response.data.next);
     } catch (error) {
       console.error(error);
     }
@@ -164,6 +191,52 @@ const AdminPage: React.FC = () => {
     }
   };
 
+  // Approves every pending item with set-based bulk calls; a call reports `more` when a
+  // server-side batch limit stopped it early.
+  const approveAllPending = async (url: string, filter: Record<string, unknown>) => {
+    let more = true;
+    while (more) {
+      const response = await api.post(url, { action: 'approve', filter });
+      more = response.data.more;
+    }
+  };
+
+  const handleApproveAllUsers = async () => {
+    if (!window.confirm('Approve all pending users?')) {
+      return;
+    }
+    try {
+      await approveAllPending('/users/users/moderate/', { user_type: 'teacher', is_approved: false });
+      setPendingUsers([]);
+      setNextPendingUsers(null);
+      await fetchData();
+      if (activeTab === 'users') {
+        await fetchAllUsers();
+      }
+    } catch (error) {
+      console.error(error);
+      alert('Failed to approve users');
+    }
+  };
+
+  const handleApproveAllResources = async () => {
+    if (!window.confirm('Approve all pending resources?')) {
+      return;
+    }
+    try {
+      await approveAllPending('/library/resources/moderate/', { status: 'pending' });
+      setPendingResources([]);
+      setNextPendingResources(null);
+      await fetchData();
+      if (activeTab === 'resources') {
+        await fetchAllResources();
+      }
+    } catch (error) {
+      console.error(error);
+      alert('Failed to approve resources');
+    }
+  };
+
   const handleBlockUser = async () => {
     if (!selectedUserId || !blockReason.trim()) {
       alert('Please provide a reason for blocking');
@@ -353,7 +426,7 @@ const AdminPage: React.FC = () => {
               activeTab === 'users' ? '3px solid var(--primary)' : '3px solid transparent',
             transition: 'all 0.2s',
           }}>
-          Users ({pendingUsers.length} pending)
+          Users ({pendingUsers.length}{nextPendingUsers ? '+' : ''} pending)
         </button>
         <button
           onClick={() => setActiveTab('resources')}
@@ -368,7 +441,7 @@ const AdminPage: React.FC = () => {
               activeTab === 'resources' ? '3px solid var(--primary)' : '3px solid transparent',
             transition: 'all 0.2s',
           }}>
-          Resources ({pendingResources.length} pending)
+          Resources ({pendingResources.length}{nextPendingResources ? '+' : ''} pending)
         </button>
         <button
           onClick={() => setActiveTab('analytics')}
@@ -423,6 +496,7 @@ const AdminPage: React.FC = () => {
                   marginBottom: '0.5rem',
                 }}>
                 {pendingUsers.length + pendingResources.length}
+                {nextPendingUsers || nextPendingResources ? '+' : ''}
               </div>
               <div style={{ color: 'var(--gray-600)', fontWeight: 500 }}>Pending Actions</div>
             </div>
@@ -503,7 +577,7 @@ const AdminPage: React.FC = () => {
           {pendingUsers.length > 0 && (
             <div className="card" style={{ marginBottom: '1rem' }}>
               <h2 style={{ marginBottom: '1rem', color: 'var(--gray-900)' }}>
-                Pending Users ({pendingUsers.length})
+                Pending Users ({pendingUsers.length}{nextPendingUsers ? '+' : ''})
               </h2>
               <button onClick={() => setActiveTab('users')} className="btn btn-primary btn-sm">
                 Review All Users
@@ -514,7 +588,7 @@ const AdminPage: React.FC = () => {
           {pendingResources.length > 0 && (
             <div className="card">
               <h2 style={{ marginBottom: '1rem', color: 'var(--gray-900)' }}>
-                Pending Resources ({pendingResources.length})
+                Pending Resources ({pendingResources.length}{nextPendingResources ? '+' : ''})
               </h2>
               <button onClick={() => setActiveTab('resources')} className="btn btn-primary btn-sm">
                 Review All Resources
@@ -548,7 +622,20 @@ const AdminPage: React.FC = () => {
           </div>
 
           <div style={{ marginBottom: '2rem' }}>
-            <h2 style={{ marginBottom: '1rem', color: 'var(--gray-900)' }}>Pending Approval</h2>
+            <div
+              style={{
+                display: 'flex',
+                justifyContent: 'space-between',
+                alignItems: 'center',
+                marginBottom: '1rem',
+              }}>
+              <h2 style={{ margin: 0, color: 'var(--gray-900)' }}>Pending Approval</h2>
+              {pendingUsers.length > 0 && (
+                <button onClick={handleApproveAllUsers} className="btn btn-success">
+                  Approve all
+                </button>
+              )}
+            </div>
             {pendingUsers.length === 0 ? (
               <div className="empty-state">
                 <h3>No pending users</h3>
@@ -587,6 +674,14 @@ const AdminPage: React.FC = () => {
                 ))}
               </div>
             )}
+            {nextPendingUsers && (
+              <button
+                onClick={() => loadNextPage(nextPendingUsers, setPendingUsers, setNextPendingUsers)}
+                className="btn btn-secondary"
+                style={{ marginTop: '1rem' }}>
+                Load more pending users
+              </button>
+            )}
           </div>
 
           <div>
@@ -719,6 +814,14 @@ const AdminPage: React.FC = () => {
                 </div>
               </div>
             )}
+            {nextAllUsers && (
+              <button
+                onClick={() => loadNextPage(nextAllUsers, setAllUsers, setNextAllUsers)}
+                className="btn btn-secondary"
+                style={{ marginTop: '1rem' }}>
+                Load more users
+              </button>
+            )}
           </div>
         </div>
       )}
@@ -767,7 +870,20 @@ const AdminPage: React.FC = () => {
           </div>
 
           <div style={{ marginBottom: '2rem' }}>
-            <h2 style={{ marginBottom: '1rem', color: 'var(--gray-900)' }}>Pending Approval</h2>
+            <div
+              style={{
+                display: 'flex',
+                justifyContent: 'space-between',
+                alignItems: 'center',
+                marginBottom: '1rem',
+              }}>
+              <h2 style={{ margin: 0, color: 'var(--gray-900)' }}>Pending Approval</h2>
+              {pendingResources.length > 0 && (
+                <button onClick={handleApproveAllResources} className="btn btn-success">
+                  Approve all
+                </button>
+              )}
+            </div>
             {pendingResources.length === 0 ? (
               <div className="empty-state">
                 <h3>No pending resources</h3>
@@ -830,11 +946,19 @@ const AdminPage: React.FC = () => {
                 ))}
               </div>
             )}
+            {nextPendingResources && (
+              <button
+                onClick={() => loadNextPage(nextPendingResources, setPendingResources, setNextPendingResources)}
+                className="btn btn-secondary"
+                style={{ marginTop: '1rem' }}>
+                Load more pending resources
+              </button>
+            )}
           </div>
 
           <div>
             <h2 style={{ marginBottom: '1rem', color: 'var(--gray-900)' }}>
-              All Resources ({allResources.length})
+              All Resources ({allResources.length}{nextAllResources ? '+' : ''})
             </h2>
             {allResources.length === 0 ? (
               <div className="empty-state">
@@ -985,6 +1109,14 @@ const AdminPage: React.FC = () => {
                 ))}
               </div>
             )}
+            {nextAllResources && (
+              <button
+                onClick={() => loadNextPage(nextAllResources, setAllResources, setNextAllResources)}
+                className="btn btn-secondary"
+                style={{ marginTop: '1rem' }}>
+                Load more resources
+              </button>
+            )}
           </div>
         </div>
       )}
@@ -10,6 +10,7 @@ interface Resource {
   description: string;
   tags?: Tag[];
   file?: string;
+  thumbnail?: string | null;
   owner?: string;
   owner_id?: number;
   average_rating?: number;
@@ -20,6 +21,10 @@ interface Resource {
   created_at?: string;
 }
 
+// Only what the resource cards render; see ?fields= on the resources API.
+const CARD_FIELDS =
+  "id,title,description,tags,file,thumbnail,owner,owner_id,average_rating,rating_count";
+
 interface Tag {
   id: number;
   name: string;
@@ -27,6 +32,8 @@ interface Tag {
 
 const HomePage: React.FC = () => {
   const [resources, setResources] = useState<Resource[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [tags, setTags] = useState<Tag[]>([]);
   const [searchTerm, setSearchTerm] = useState("");
   const [authorSearch, setAuthorSearch] = useState("");
@@ -53,13 +60,15 @@ const HomePage: React.FC = () => {
       setLoading(true);
       try {
         const params = new URLSearchParams();
+        params.append("fields", CARD_FIELDS);
         if (searchTerm) params.append("search", searchTerm);
         if (authorSearch) params.append("author", authorSearch);
         if (selectedTag) params.append("tags__name", selectedTag);
         if (sortBy) params.append("ordering", sortBy);
 
         const response = await api.get("/library/resources/", { params });
-        setResources(response.data);
+        setResources(response.data.results);
+        setNextPage(response.data.next);
       } catch (error) {
         console.error(error);
       } finally {
@@ -70,15 +79,30 @@ const HomePage: React.FC = () => {
     fetchResources();
   }, [searchTerm, authorSearch, selectedTag, sortBy]);
 
+  const loadMore = async () => {
+    if (!nextPage || loadingMore) {
+      return;
+    }
+
+    setLoadingMore(true);
+    try {
+      // `next` is an absolute URL that keeps the filters, ordering and fields.
+      const response = await api.get(nextPage);
+      setResources((previous) => [...previous, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     const fetchSavedResources = async () => {
       if (auth?.isAuthenticated) {
         try {
-          const response = await api.get("/library/resources/saved/");
-          const saved = new Set<number>(
-            response.data.map((r: Resource) => r.id)
-          );
-          setSavedIds(saved);
+          const response = await api.get("/library/resources/saved/ids/");
+          setSavedIds(new Set<number>(response.data.ids));
         } catch (error) {
           console.error(error);
         }
@@ -184,6 +208,14 @@ const HomePage: React.FC = () => {
                     to={`/resource/${resource.id}`}
                     className="resource-card-title-link"
                   >
+                    {resource.thumbnail && (
+                      <img
+                        src={resource.thumbnail}
+                        alt=""
+                        loading="lazy"
+                        style={{ maxWidth: '100%', maxHeight: '160px', borderRadius: '8px' }}
+                      />
+                    )}
                     <h2 className="resource-card-title">{resource.title}</h2>
                   </Link>
                   <p className="resource-card-description">
@@ -280,6 +312,14 @@ const HomePage: React.FC = () => {
           ))}
         </div>
       )}
+
+      {!loading && nextPage && (
+        <div style={{ textAlign: "center", marginTop: "2rem" }}>
+          <button onClick={loadMore} className="btn btn-secondary" disabled={loadingMore}>
+            {loadingMore ? "Loading..." : "Load more resources"}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
@@ -1,6 +1,6 @@
 import React, { useEffect, useState, useContext } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import api from '../api';
+import api, { fetchAllPages } from '../api';
 import { AuthContext } from '../context/AuthContext';
 import './ProfilePage.css';
 
@@ -35,12 +35,13 @@ const ProfilePage: React.FC = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [profileResponse, resourcesResponse] = await Promise.all([
+        // The counters below cover all of the author's resources, so load every page.
+        const [profileResponse, resourceList] = await Promise.all([
           api.get('/users/users/me/'),
-          api.get('/library/resources/my/'),
+          fetchAllPages<Resource>('/library/resources/my/'),
         ]);
         setProfile(profileResponse.data);
-        setResources(resourcesResponse.data);
+        setResources(resourceList);
       } catch (error) {
         console.error(error);
       } finally {
@@ -1,6 +1,6 @@
 import React, { useEffect, useState, useContext } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
-import api from '../api';
+import api, { batchGet } from '../api';
 import { AuthContext } from '../context/AuthContext';
 
 interface Resource {
@@ -8,6 +8,8 @@ interface Resource {
   title: string;
   description: string;
   file?: string;
+  original_filename?: string;
+  preview?: string | null;
   tags?: Array<{ id: number; name: string }>;
   owner?: string;
   owner_id?: number;
@@ -15,6 +17,7 @@ interface Resource {
   created_at?: string;
   average_rating?: number;
   rating_count?: number;
+  comment_count?: number;
   user_rating?: number;
 }
 
@@ -32,6 +35,8 @@ const ResourceDetailPage: React.FC = () => {
   const auth = useContext(AuthContext);
   const [resource, setResource] = useState<Resource | null>(null);
   const [comments, setComments] = useState<Comment[]>([]);
+  const [commentCount, setCommentCount] = useState(0);
+  const [nextComments, setNextComments] = useState<string | null>(null);
   const [commentText, setCommentText] = useState('');
   const [rating, setRating] = useState<number>(0);
   const [hoveredRating, setHoveredRating] = useState<number>(0);
@@ -41,12 +46,30 @@ const ResourceDetailPage: React.FC = () => {
   const [isStaff, setIsStaff] = useState(false);
 
   useEffect(() => {
-    const fetchResource = async () => {
+    const fetchPage = async () => {
+      const paths = [`/library/resources/${id}/`, `/library/resources/${id}/comments/`];
+      if (auth?.isAuthenticated) {
+        paths.push('/library/resources/saved/ids/', '/users/users/me/');
+      }
       try {
-        const response = await api.get(`/library/resources/${id}/`);
-        setResource(response.data);
-        if (response.data.user_rating) {
-          setRating(response.data.user_rating);
+        const [resourceResponse, commentsResponse, savedResponse, meResponse] = await batchGet(paths);
+        if (resourceResponse.status === 200) {
+          setResource(resourceResponse.body);
+          setCommentCount(resourceResponse.body.comment_count || 0);
+          if (resourceResponse.body.user_rating) {
+            setRating(resourceResponse.body.user_rating);
+          }
+        }
+        if (commentsResponse.status === 200) {
+          setComments(commentsResponse.body.results);
+          setNextComments(commentsResponse.body.next);
+        }
+        if (savedResponse?.status === 200) {
+          setSaved(savedResponse.body.ids.includes(Number(id)));
+        }
+        if (meResponse?.status === 200) {
+          setCurrentUserId(meResponse.body.id);
+          setIsStaff(meResponse.body.is_staff || false);
         }
       } catch (error) {
         console.error(error);
@@ -55,43 +78,7 @@ const ResourceDetailPage: React.FC = () => {
       }
     };
 
-    const fetchComments = async () => {
-      try {
-        const response = await api.get(`/library/resources/${id}/comments/`);
-        setComments(response.data);
-      } catch (error) {
-        console.error(error);
-      }
-    };
-
-    const checkSaved = async () => {
-      if (auth?.isAuthenticated) {
-        try {
-          const response = await api.get('/library/resources/saved/');
-          const savedIds = response.data.map((r: Resource) => r.id);
-          setSaved(savedIds.includes(Number(id)));
-        } catch (error) {
-          console.error(error);
-        }
-      }
-    };
-
-    const fetchUserInfo = async () => {
-      if (auth?.isAuthenticated) {
-        try {
-          const response = await api.get('/users/users/me/');
-          setCurrentUserId(response.data.id);
-          setIsStaff(response.data.is_staff || false);
-        } catch (error) {
-          console.error(error);
-        }
-      }
-    };
-
-    fetchResource();
-    fetchComments();
-    checkSaved();
-    fetchUserInfo();
+    fetchPage();
   }, [id, auth?.isAuthenticated]);
 
   const handleSave = async () => {
@@ -138,6 +125,7 @@ const ResourceDetailPage: React.FC = () => {
     try {
       const response = await api.post(`/library/resources/${id}/comments/`, { text: commentText });
       setComments([response.data, ...comments]);
+      setCommentCount(commentCount + 1);
       setCommentText('');
     } catch (error) {
       console.error(error);
@@ -150,6 +138,22 @@ const ResourceDetailPage: React.FC = () => {
         data: { comment_id: commentId },
       });
       setComments(comments.filter((c) => c.id !== commentId));
+      setCommentCount(commentCount - 1);
+    } catch (error) {
+      console.error(error);
+    }
+  };
+
+  const loadMoreComments = async () => {
+    if (!nextComments) {
+      return;
+    }
+
+    try {
+      // `next` is an absolute URL; axios uses it as is instead of joining it to baseURL.
+      const response = await api.get(nextComments);
+      setComments([...comments, ...response.data.results]);
+      setNextComments(response.data.next);
     } catch (error) {
       console.error(error);
     }
@@ -294,7 +298,7 @@ const ResourceDetailPage: React.FC = () => {
       {resource.file && (
         <div style={{ marginBottom: '2rem' }}>
           <h3 style={{ marginBottom: '0.75rem', color: 'var(--gray-700)' }}>File</h3>
-          {getFileType(resource.file) === 'video' ? (
+          {getFileType(resource.original_filename || resource.file) === 'video' ? (
             <video
               controls
               style={{ width: '100%', maxWidth: '800px', borderRadius: '8px' }}
@@ -308,7 +312,7 @@ const ResourceDetailPage: React.FC = () => {
               <source src={`http://localhost:8000${resource.file}`} />
               Your browser does not support the video tag.
             </video>
-          ) : getFileType(resource.file) === 'audio' ? (
+          ) : getFileType(resource.original_filename || resource.file) === 'audio' ? (
             <audio
               controls
               style={{ width: '100%', maxWidth: '600px' }}
@@ -324,6 +328,13 @@ const ResourceDetailPage: React.FC = () => {
             </audio>
           ) : (
             <div>
+              {resource.preview && (
+                <img
+                  src={resource.preview}
+                  alt={`Preview of ${resource.title}`}
+                  style={{ display: 'block', maxWidth: '100%', marginBottom: '1rem', borderRadius: '8px' }}
+                />
+              )}
               <a
                 href={`http://localhost:8000/api/library/resources/${resource.id}/download/`}
                 target="_blank"
@@ -375,7 +386,7 @@ const ResourceDetailPage: React.FC = () => {
 
       <div style={{ marginTop: '3rem' }}>
         <h2 style={{ marginBottom: '1.5rem', color: 'var(--gray-900)' }}>
-          Comments ({comments.length})
+          Comments ({commentCount})
         </h2>
 
         {auth?.isAuthenticated ? (
@@ -466,6 +477,12 @@ const ResourceDetailPage: React.FC = () => {
             ))}
           </div>
         )}
+
+        {nextComments && (
+          <button onClick={loadMoreComments} className="btn btn-secondary" style={{ marginTop: '1.5rem' }}>
+            Load more comments
+          </button>
+        )}
       </div>
     </div>
   );
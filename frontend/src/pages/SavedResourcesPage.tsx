@@ -14,13 +14,15 @@ interface Resource {
 
 const SavedResourcesPage: React.FC = () => {
   const [resources, setResources] = useState<Resource[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchSavedResources = async () => {
       try {
         const response = await api.get('/library/resources/saved/');
-        setResources(response.data);
+        setResources(response.data.results);
+        setNextPage(response.data.next);
       } catch (error) {
         console.error(error);
       } finally {
@@ -31,6 +33,21 @@ const SavedResourcesPage: React.FC = () => {
     fetchSavedResources();
   }, []);
 
+  const loadMore = async () => {
+    if (!nextPage) {
+      return;
+    }
+
+    try {
+      // `next` is an absolute URL; axios uses it as is instead of joining it to baseURL.
+      const response = await api.get(nextPage);
+      setResources([...resources, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error(error);
+    }
+  };
+
   const handleUnsave = async (id: number) => {
     try {
       await api.post(`/library/resources/${id}/save/`);
@@ -110,6 +127,14 @@ const SavedResourcesPage: React.FC = () => {
           ))}
         </div>
       )}
+
+      {!loading && nextPage && (
+        <div style={{ textAlign: 'center', marginTop: '2rem' }}>
+          <button onClick={loadMore} className="btn btn-secondary">
+            Load more
+          </button>
+        </div>
+      )}
     </div>
   );
 };
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
-import api from '../api';
+import api, { fetchAllPages } from '../api';
 
 interface UserProfile {
   id: number;
@@ -32,12 +32,13 @@ const UserProfilePage: React.FC = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [profileResponse, resourcesResponse] = await Promise.all([
+        // The counters below cover all of the author's resources, so load every page.
+        const [profileResponse, resourceList] = await Promise.all([
           api.get(`/users/users/${id}/`),
-          api.get(`/library/resources/user_resources/?user_id=${id}`)
+          fetchAllPages<Resource>(`/library/resources/user_resources/?user_id=${id}`)
         ]);
         setProfile(profileResponse.data);
-        setResources(resourcesResponse.data);
+        setResources(resourceList);
       } catch (error) {
         console.error(error);
       } finally {